@@ -0,0 +1,91 @@
+import time
+
+import torch
+import tyro
+from gsplat.project_gaussians import project_gaussians
+from gsplat.rasterize import rasterize_gaussians
+
+
+def main(
+    height: int = 2160,
+    width: int = 3840,
+    num_points: int = 1_000_000,
+    num_views: int = 4,
+    block_width: int = 16,
+    device: str = "cuda" if torch.cuda.is_available() else "cpu",
+) -> None:
+    """Accumulates the gradients of several views of a random scene before a
+    step, with and without recompute_bins, and reports the bytes kept for the
+    backward passes, the peak memory on CUDA and the time per step."""
+    torch.manual_seed(0)
+    means3d = 4 * (torch.rand((num_points, 3), device=device) - 0.5)
+    means3d[:, 2] += 6
+    scales = 0.02 * torch.rand((num_points, 3), device=device)
+    quats = torch.randn((num_points, 4), device=device)
+    quats /= quats.norm(dim=-1, keepdim=True)
+    colors = torch.rand((num_points, 3), device=device, requires_grad=True)
+    opacities = torch.rand((num_points, 1), device=device, requires_grad=True)
+    means3d.requires_grad_(True)
+    focal = 0.5 * width
+
+    for recompute_bins in (False, True):
+        saved_bytes = []
+
+        def pack(x):
+            saved_bytes.append(x.numel() * x.element_size())
+            return x
+
+        if device == "cuda":
+            torch.cuda.synchronize()
+            torch.cuda.reset_peak_memory_stats()
+        start = time.time()
+        with torch.autograd.graph.saved_tensors_hooks(pack, lambda x: x):
+            loss = 0
+            for i in range(num_views):
+                viewmat = torch.eye(4, device=device)
+                viewmat[0, 3] = 0.1 * i
+                xys, depths, radii, conics, _, num_tiles_hit, _ = project_gaussians(
+                    means3d,
+                    scales,
+                    1,
+                    quats,
+                    viewmat,
+                    focal,
+                    focal,
+                    width / 2,
+                    height / 2,
+                    height,
+                    width,
+                    block_width,
+                )
+                out_img = rasterize_gaussians(
+                    xys,
+                    depths,
+                    radii,
+                    conics,
+                    num_tiles_hit,
+                    colors,
+                    opacities,
+                    height,
+                    width,
+                    block_width,
+                    recompute_bins=recompute_bins,
+                )
+                loss = loss + out_img.mean()
+        loss.backward()
+        if device == "cuda":
+            torch.cuda.synchronize()
+        elapsed = time.time() - start
+
+        message = (
+            f"recompute_bins={recompute_bins}: "
+            f"{sum(saved_bytes) / 2**20:.1f} MB kept for backward, "
+            f"{1000 * elapsed:.1f} ms per step"
+        )
+        if device == "cuda":
+            message += f", peak {torch.cuda.max_memory_allocated() / 2**20:.1f} MB"
+        print(message)
+
+
+if __name__ == "__main__":
+    tyro.cli(main)
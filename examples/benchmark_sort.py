@@ -0,0 +1,83 @@
+import time
+
+import torch
+import tyro
+from gsplat.project_gaussians import project_gaussians
+from gsplat.utils import SORT_MODES, bin_and_sort_gaussians
+
+
+def main(
+    height: int = 1080,
+    width: int = 1920,
+    num_points: int = 1_000_000,
+    block_width: int = 16,
+    iterations: int = 20,
+    device: str = "cuda" if torch.cuda.is_available() else "cpu",
+) -> None:
+    """Times the intersection sorting modes of bin_and_sort_gaussians on a random
+    scene and checks that they agree with the global sort."""
+    torch.manual_seed(0)
+    means3d = 4 * (torch.rand((num_points, 3), device=device) - 0.5)
+    means3d[:, 2] += 6
+    scales = 0.02 * torch.rand((num_points, 3), device=device)
+    quats = torch.randn((num_points, 4), device=device)
+    quats /= quats.norm(dim=-1, keepdim=True)
+    viewmat = torch.eye(4, device=device)
+    focal = 0.5 * width
+    xys, depths, radii, _, _, num_tiles_hit, _ = project_gaussians(
+        means3d,
+        scales,
+        1,
+        quats,
+        viewmat,
+        focal,
+        focal,
+        width / 2,
+        height / 2,
+        height,
+        width,
+        block_width,
+    )
+    tile_bounds = (
+        (width + block_width - 1) // block_width,
+        (height + block_width - 1) // block_width,
+        1,
+    )
+    cum_tiles_hit = torch.cumsum(num_tiles_hit, dim=0, dtype=torch.int32)
+    num_intersects = cum_tiles_hit[-1].item()
+    print(f"{num_points} gaussians, {num_intersects} intersections")
+
+    reference = None
+    for sort_mode in SORT_MODES:
+        args = (
+            num_points,
+            num_intersects,
+            xys,
+            depths,
+            radii,
+            cum_tiles_hit,
+            tile_bounds,
+            block_width,
+        )
+        # warm up
+        outputs = bin_and_sort_gaussians(*args, sort_mode=sort_mode)
+        if device == "cuda":
+            torch.cuda.synchronize()
+        start = time.time()
+        for _ in range(iterations):
+            bin_and_sort_gaussians(*args, sort_mode=sort_mode)
+        if device == "cuda":
+            torch.cuda.synchronize()
+        elapsed = (time.time() - start) / iterations
+
+        isect_ids_sorted, tile_bins = outputs[2], outputs[4]
+        if reference is None:
+            reference = (isect_ids_sorted, tile_bins)
+        matches = torch.equal(isect_ids_sorted, reference[0]) and torch.equal(
+            tile_bins, reference[1]
+        )
+        print(f"{sort_mode:>8}: {1000 * elapsed:.3f} ms, matches global: {matches}")
+
+
+if __name__ == "__main__":
+    tyro.cli(main)
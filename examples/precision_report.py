@@ -0,0 +1,102 @@
+import math
+
+import torch
+import tyro
+from gsplat.project_gaussians import project_gaussians
+from gsplat.rasterize import rasterize_gaussians
+from gsplat.sh import num_sh_bases, spherical_harmonics
+
+_DTYPES = {"float16": torch.float16, "bfloat16": torch.bfloat16, "uint8": torch.uint8}
+
+
+def _store(x: torch.Tensor, dtype: torch.dtype) -> torch.Tensor:
+    if dtype == torch.uint8:
+        return (255 * x.clamp(0, 1)).round().to(torch.uint8)
+    return x.to(dtype)
+
+
+def _psnr(x: torch.Tensor, ref: torch.Tensor) -> float:
+    mse = torch.mean((x - ref) ** 2).item()
+    return math.inf if mse == 0 else -10 * math.log10(mse)
+
+
+def main(
+    height: int = 256,
+    width: int = 256,
+    num_points: int = 100_000,
+    degree: int = 3,
+    block_width: int = 16,
+    device: str = "cuda" if torch.cuda.is_available() else "cpu",
+) -> None:
+    """Renders a random scene with its attributes stored in reduced precision and
+    reports the errors of the images and gradients against the float32 render."""
+    torch.manual_seed(0)
+    means3d = 4 * (torch.rand((num_points, 3), device=device) - 0.5)
+    means3d[:, 2] += 6
+    scales = 0.05 * torch.rand((num_points, 3), device=device)
+    quats = torch.randn((num_points, 4), device=device)
+    quats /= quats.norm(dim=-1, keepdim=True)
+    coeffs = 0.3 * torch.randn((num_points, num_sh_bases(degree), 3), device=device)
+    opacities = torch.rand((num_points, 1), device=device)
+    viewmat = torch.eye(4, device=device)
+    focal = 0.5 * width
+
+    def render(dtype: torch.dtype):
+        # uint8 only applies to the colors and opacities, the rest stays in float16
+        float_dtype = torch.float16 if dtype == torch.uint8 else dtype
+        params = [x.to(float_dtype).requires_grad_(True) for x in (means3d, coeffs)]
+        xys, depths, radii, conics, _, num_tiles_hit, _ = project_gaussians(
+            params[0],
+            scales.to(float_dtype),
+            1,
+            quats.to(float_dtype),
+            viewmat,
+            focal,
+            focal,
+            width / 2,
+            height / 2,
+            height,
+            width,
+            block_width,
+        )
+        viewdirs = params[0] - torch.inverse(viewmat)[:3, 3]
+        colors = torch.clamp_min(
+            spherical_harmonics(degree, viewdirs, params[1]) + 0.5, 0.0
+        )
+        if dtype == torch.uint8:
+            colors = _store(colors.detach(), dtype)
+        out_img = rasterize_gaussians(
+            xys,
+            depths,
+            radii,
+            conics,
+            num_tiles_hit,
+            colors,
+            _store(opacities, dtype),
+            height,
+            width,
+            block_width,
+        )
+        out_img.sum().backward()
+        return out_img.detach(), [
+            None if p.grad is None else p.grad.float() for p in params
+        ]
+
+    ref_img, ref_grads = render(torch.float32)
+    print(f"{num_points} gaussians, {height}x{width}, SH degree {degree}")
+    for name, dtype in _DTYPES.items():
+        img, grads = render(dtype)
+        print(
+            f"{name:>8}: image max error {(img - ref_img).abs().max().item():.2e}, "
+            f"PSNR {_psnr(img, ref_img):.1f} dB"
+        )
+        for grad_name, grad, ref_grad in zip(("means3d", "coeffs"), grads, ref_grads):
+            if grad is None:
+                # quantized colors get no gradient
+                continue
+            rel = (grad - ref_grad).norm() / ref_grad.norm().clamp(min=1e-12)
+            print(f"{'':>10}{grad_name} gradient relative error {rel.item():.2e}")
+
+
+if __name__ == "__main__":
+    tyro.cli(main)
@@ -7,6 +7,7 @@ from typing import Optional
 import numpy as np
 import torch
 import tyro
+from gsplat.autotune import autotune_block_width
 from gsplat.project_gaussians import project_gaussians
 from gsplat.rasterize import rasterize_gaussians
 from PIL import Image
@@ -79,7 +80,7 @@ class SimpleTrainer:
         iterations: int = 1000,
         lr: float = 0.01,
         save_imgs: bool = False,
-        B_SIZE: int = 14,
+        B_SIZE: Optional[int] = None,
     ):
         optimizer = optim.Adam(
             [self.rgbs, self.means, self.scales, self.opacities, self.quats], lr
@@ -87,7 +88,23 @@ class SimpleTrainer:
         mse_loss = torch.nn.MSELoss()
         frames = []
         times = [0] * 3  # project, rasterize, backward
-        B_SIZE = 16
+        if B_SIZE is None:
+            B_SIZE = autotune_block_width(
+                self.means,
+                self.scales,
+                1,
+                self.quats / self.quats.norm(dim=-1, keepdim=True),
+                self.viewmat,
+                self.focal,
+                self.focal,
+                self.W / 2,
+                self.H / 2,
+                self.H,
+                self.W,
+                torch.sigmoid(self.rgbs),
+                torch.sigmoid(self.opacities),
+            )
+            print(f"Using block width {B_SIZE}")
         for iter in range(iterations):
             start = time.time()
             (
@@ -179,6 +196,7 @@ def main(
     img_path: Optional[Path] = None,
     iterations: int = 1000,
     lr: float = 0.01,
+    block_width: Optional[int] = None,
 ) -> None:
     if img_path:
         gt_image = image_path_to_tensor(img_path)
@@ -193,6 +211,7 @@ def main(
         iterations=iterations,
         lr=lr,
         save_imgs=save_imgs,
+        B_SIZE=block_width,
     )
 
 
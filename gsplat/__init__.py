@@ -1,15 +1,42 @@
 from typing import Any
 import torch
-from .project_gaussians import project_gaussians
-from .rasterize import rasterize_gaussians
+from .project_gaussians import project_gaussians, project_gaussians_batch
+from .rasterize import rasterize_gaussians, rasterize_gaussians_batch
+from .render import render
 from .utils import (
     map_gaussian_to_intersects,
     bin_and_sort_gaussians,
     compute_cumulative_intersects,
     compute_cov2d_bounds,
+    compute_num_tiles_hit,
+    cull_gaussians,
+    get_intersection_stats,
     get_tile_bin_edges,
+    shrink_radii,
+    to_float32,
+)
+from .sh import (
+    demote_sh_degrees,
+    pack_sh_coeffs,
+    select_packed_coeffs,
+    spherical_harmonics,
+    unpack_sh_coeffs,
+)
+from .sh_cache import SHColorCache
+from .workspace import Workspace
+from .spatial_index import SpatialIndex
+from .lod import GaussianLOD
+from .compression import CompressedGaussians, compress_gaussians
+from .ply import PlyGaussians, load_ply, save_ply
+from .streaming import render_streaming
+from .autotune import autotune_block_width, get_autotune_cache_path
+from .backend import (
+    available_backends,
+    get_backend,
+    register_backend,
+    set_backend,
+    use_backend,
 )
-from .sh import spherical_harmonics
 from .version import __version__
 import warnings
 
@@ -18,12 +45,42 @@ __all__ = [
     "__version__",
     "project_gaussians",
     "rasterize_gaussians",
+    "project_gaussians_batch",
+    "rasterize_gaussians_batch",
+    "render",
     "spherical_harmonics",
+    "pack_sh_coeffs",
+    "unpack_sh_coeffs",
+    "demote_sh_degrees",
+    "select_packed_coeffs",
+    "SHColorCache",
+    "Workspace",
+    "SpatialIndex",
+    "GaussianLOD",
+    "CompressedGaussians",
+    "compress_gaussians",
+    "PlyGaussians",
+    "load_ply",
+    "save_ply",
+    "render_streaming",
+    "autotune_block_width",
+    "get_autotune_cache_path",
+    # backends
+    "available_backends",
+    "get_backend",
+    "register_backend",
+    "set_backend",
+    "use_backend",
     # utils
     "bin_and_sort_gaussians",
     "compute_cumulative_intersects",
     "compute_cov2d_bounds",
+    "compute_num_tiles_hit",
+    "cull_gaussians",
+    "get_intersection_stats",
     "get_tile_bin_edges",
+    "shrink_radii",
+    "to_float32",
     "map_gaussian_to_intersects",
     # Function.apply() will be deprecated
     "ProjectGaussians",
@@ -1,6 +1,9 @@
 """Pure PyTorch implementations of various functions"""
 
-import struct
+import collections
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import torch
 import torch.nn.functional as F
@@ -229,6 +232,36 @@ def quat_to_rotmat(quat: Tensor) -> Tensor:
     return normalized_quat_to_rotmat(F.normalize(quat, dim=-1))
 
 
+def rotmat_to_quat(mat: Tensor) -> Tensor:
+    assert mat.shape[-2:] == (3, 3), mat.shape
+    m = mat.reshape(mat.shape[:-2] + (9,))
+    m00, m01, m02, m10, m11, m12, m20, m21, m22 = torch.unbind(m, dim=-1)
+    # 2 * |w|, 2 * |x|, 2 * |y|, 2 * |z|
+    q_abs = torch.sqrt(
+        torch.stack(
+            [
+                1 + m00 + m11 + m22,
+                1 + m00 - m11 - m22,
+                1 - m00 + m11 - m22,
+                1 - m00 - m11 + m22,
+            ],
+            dim=-1,
+        ).clamp(min=0)
+    )
+    # one candidate per component, each accurate when its component is large
+    candidates = torch.stack(
+        [
+            torch.stack([q_abs[..., 0] ** 2, m21 - m12, m02 - m20, m10 - m01], -1),
+            torch.stack([m21 - m12, q_abs[..., 1] ** 2, m10 + m01, m02 + m20], -1),
+            torch.stack([m02 - m20, m10 + m01, q_abs[..., 2] ** 2, m12 + m21], -1),
+            torch.stack([m10 - m01, m20 + m02, m21 + m12, q_abs[..., 3] ** 2], -1),
+        ],
+        dim=-2,
+    ) / (2 * q_abs[..., None].clamp(min=0.1))
+    best = q_abs.argmax(dim=-1)[..., None, None].expand(q_abs.shape[:-1] + (1, 4))
+    return F.normalize(candidates.gather(-2, best).squeeze(-2), dim=-1)
+
+
 def scale_rot_to_cov3d(scale: Tensor, glob_scale: float, quat: Tensor) -> Tensor:
     assert scale.shape[-1] == 3, scale.shape
     assert quat.shape[-1] == 4, quat.shape
@@ -345,8 +378,10 @@ def get_tile_bbox(pix_center, pix_radius, tile_bounds, block_width):
     tile_center = pix_center / tile_size
     tile_radius = pix_radius[..., None] / tile_size
 
+    # rounded like get_bbox of the cuda kernels: truncating c + r + 1 rather than
+    # c + r differs for boxes ending within a tile left or above the image
     top_left = (tile_center - tile_radius).to(torch.int32)
-    bottom_right = (tile_center + tile_radius).to(torch.int32) + 1
+    bottom_right = (tile_center + tile_radius + 1).to(torch.int32)
     tile_min = torch.stack(
         [
             torch.clamp(top_left[..., 0], 0, tile_bounds[0]),
@@ -426,64 +461,128 @@ def project_gaussians_forward(
     )
 
 
-def map_gaussian_to_intersects(
-    num_points, xys, depths, radii, cum_tiles_hit, tile_bounds, block_width
-):
-    num_intersects = cum_tiles_hit[-1]
-    isect_ids = torch.zeros(num_intersects, dtype=torch.int64, device=xys.device)
-    gaussian_ids = torch.zeros(num_intersects, dtype=torch.int32, device=xys.device)
+# largest 2 * sigma of a pixel the rasterizer blends, where an opacity of 1
+# falls below the alpha threshold of 1 / 255, with some slack for rounding
+ELLIPSE_LEVEL = 2 * math.log(255) + 1e-3
 
-    for idx in range(num_points):
-        if radii[idx] <= 0:
-            break
-
-        tile_min, tile_max = get_tile_bbox(
-            xys[idx], radii[idx], tile_bounds, block_width
-        )
 
-        cur_idx = 0 if idx == 0 else cum_tiles_hit[idx - 1].item()
+def compute_opacity_radius(conic, opacity):
+    """
+    :param conic (*, 3) conics of the 2D gaussians
+    :param opacity (*) opacities of the gaussians
+    return (*) radius past which alpha = opacity * exp(-sigma) is below 1 / 255,
+    0 when it is everywhere
+    """
+    a, b, c = conic[..., 0], conic[..., 1], conic[..., 2]
+    # the smallest eigenvalue of the conic is the inverse of the largest variance
+    lambda_min = 0.5 * (a + c) - torch.sqrt(0.25 * (a - c) ** 2 + b**2)
+    level = 2 * torch.log(255 * opacity) + 1e-3
+    radius = torch.ceil(torch.sqrt(level.clamp(min=0) / lambda_min.clamp(min=1e-12)))
+    return torch.where(255 * opacity > 1, radius, 0)
 
-        # Get raw byte representation of the float value at the given index
-        raw_bytes = struct.pack("f", depths[idx])
 
-        # Interpret those bytes as an int32_t
-        depth_id_n = struct.unpack("i", raw_bytes)[0]
+def ellipse_tile_overlap(xys, conics, tile_x, tile_y, block_width):
+    """
+    :param xys (*, 2) centers of the 2D gaussians
+    :param conics (*, 3) conics of the 2D gaussians
+    :param tile_x, tile_y (*) tile coordinates
+    return (*) whether a pixel of the tile is within ELLIPSE_LEVEL of the gaussian
+    """
+    # offsets from the gaussian center to the extreme pixel centers of the tile
+    x0 = tile_x * block_width + 0.5 - xys[..., 0]
+    y0 = tile_y * block_width + 0.5 - xys[..., 1]
+    x1 = x0 + block_width - 1
+    y1 = y0 + block_width - 1
+    a, b, c = conics[..., 0], conics[..., 1], conics[..., 2]
+
+    def quad(dx, dy):
+        return a * dx * dx + 2 * b * dx * dy + c * dy * dy
+
+    # the form is convex, so outside of the box its minimum lies on an edge,
+    # where it is the minimum along the edge line clamped to the edge
+    inside = (x0 <= 0) & (x1 >= 0) & (y0 <= 0) & (y1 >= 0)
+    q_min = torch.full_like(x0, math.inf)
+    for dx in (x0, x1):
+        dy = torch.minimum(torch.maximum(-b * dx / c, y0), y1)
+        q_min = torch.minimum(q_min, quad(dx, dy))
+    for dy in (y0, y1):
+        dx = torch.minimum(torch.maximum(-b * dy / a, x0), x1)
+        q_min = torch.minimum(q_min, quad(dx, dy))
+    return inside | (q_min <= ELLIPSE_LEVEL)
+
+
+def get_tile_intersects(xys, radii, tile_bounds, block_width, conics=None):
+    """
+    return the (gaussian_ids, tile_x, tile_y) of the tiles hit by each gaussian,
+    in the row-major order of the cuda kernel. Tiles are taken from the bounding
+    square of the radius, and with conics only the ones overlapping the ellipse
+    """
+    device = xys.device
+    tile_min, tile_max = get_tile_bbox(xys, radii, tile_bounds, block_width)
+    tile_min = tile_min.to(torch.int64)
+    tile_width = (tile_max[..., 0] - tile_min[..., 0]).to(torch.int64)
+    tile_height = (tile_max[..., 1] - tile_min[..., 1]).to(torch.int64)
+    num_tiles = torch.where(radii > 0, tile_width * tile_height, 0)
+
+    # expand each gaussian into its tile rectangle
+    gaussian_ids = torch.repeat_interleave(
+        torch.arange(len(xys), device=device), num_tiles
+    )
+    offsets = torch.cumsum(num_tiles, dim=0) - num_tiles
+    local_ids = (
+        torch.arange(gaussian_ids.numel(), device=device) - offsets[gaussian_ids]
+    )
+    width = tile_width[gaussian_ids]
+    tile_x = tile_min[gaussian_ids, 0] + local_ids % width
+    tile_y = tile_min[gaussian_ids, 1] + torch.div(
+        local_ids, width, rounding_mode="floor"
+    )
+    if conics is not None:
+        hit = ellipse_tile_overlap(
+            xys[gaussian_ids], conics[gaussian_ids], tile_x, tile_y, block_width
+        )
+        gaussian_ids, tile_x, tile_y = gaussian_ids[hit], tile_x[hit], tile_y[hit]
+    return gaussian_ids, tile_x, tile_y
 
-        for i in range(tile_min[1], tile_max[1]):
-            for j in range(tile_min[0], tile_max[0]):
-                tile_id = i * tile_bounds[0] + j
-                isect_ids[cur_idx] = (tile_id << 32) | depth_id_n
-                gaussian_ids[cur_idx] = idx
-                cur_idx += 1
 
-    return isect_ids, gaussian_ids
+def count_tiles_hit(xys, radii, tile_bounds, block_width, conics=None):
+    gaussian_ids, _, _ = get_tile_intersects(
+        xys, radii, tile_bounds, block_width, conics
+    )
+    return torch.bincount(gaussian_ids, minlength=len(xys)).to(torch.int32)
 
 
-def get_tile_bin_edges(num_intersects, isect_ids_sorted, tile_bounds):
-    tile_bins = torch.zeros(
-        (tile_bounds[0] * tile_bounds[1], 2),
-        dtype=torch.int32,
-        device=isect_ids_sorted.device,
+def map_gaussian_to_intersects(
+    num_points, xys, depths, radii, cum_tiles_hit, tile_bounds, block_width, conics=None
+):
+    xys = xys[:num_points]
+    radii = radii[:num_points]
+    if conics is not None:
+        conics = conics[:num_points]
+    # this assumes the number of tiles of each gaussian matches cum_tiles_hit
+    gaussian_ids, tile_x, tile_y = get_tile_intersects(
+        xys, radii, tile_bounds, block_width, conics
     )
+    tile_ids = tile_y * tile_bounds[0] + tile_x
 
-    for idx in range(num_intersects):
-        cur_tile_idx = isect_ids_sorted[idx] >> 32
-
-        if idx == 0:
-            tile_bins[cur_tile_idx, 0] = 0
-            continue
+    # reinterpret the float depth bits as int32, sign extended like the kernel
+    depth_ids = depths[:num_points].contiguous().view(torch.int32).to(torch.int64)
+    isect_ids = (tile_ids << 32) | depth_ids[gaussian_ids]
 
-        if idx == num_intersects - 1:
-            tile_bins[cur_tile_idx, 1] = num_intersects
-            break
+    return isect_ids, gaussian_ids.to(torch.int32)
 
-        prev_tile_idx = isect_ids_sorted[idx - 1] >> 32
 
-        if cur_tile_idx != prev_tile_idx:
-            tile_bins[prev_tile_idx, 1] = idx
-            tile_bins[cur_tile_idx, 0] = idx
+def get_tile_bin_edges(num_intersects, isect_ids_sorted, tile_bounds):
+    num_tiles = tile_bounds[0] * tile_bounds[1]
+    tile_ids = isect_ids_sorted[:num_intersects] >> 32
+    counts = torch.bincount(tile_ids, minlength=num_tiles)[:num_tiles]
+    ends = torch.cumsum(counts, dim=0)
+    starts = ends - counts
 
-    return tile_bins
+    # empty tiles keep the (0, 0) range written by the cuda kernel
+    tile_bins = torch.stack([starts, ends], dim=-1)
+    tile_bins = torch.where(counts[..., None] > 0, tile_bins, 0)
+    return tile_bins.to(torch.int32)
 
 
 def rasterize_forward(
@@ -497,60 +596,377 @@ def rasterize_forward(
     colors,
     opacities,
     background,
+    batch_size=256,
+    num_threads=1,
 ):
     channels = colors.shape[1]
-    out_img = torch.zeros(
-        (img_size[1], img_size[0], channels), dtype=torch.float32, device=xys.device
-    )
-    final_Ts = torch.zeros(
+    out_img = background.to(torch.float32).expand(img_size[1], img_size[0], channels)
+    out_img = out_img.clone()
+    final_Ts = torch.ones(
         (img_size[1], img_size[0]), dtype=torch.float32, device=xys.device
     )
     final_idx = torch.zeros(
         (img_size[1], img_size[0]), dtype=torch.int32, device=xys.device
     )
-    for i in range(img_size[1]):
-        for j in range(img_size[0]):
-            tile_id = (i // block[0]) * tile_bounds[0] + (j // block[1])
-            tile_bin_start = tile_bins[tile_id, 0]
-            tile_bin_end = tile_bins[tile_id, 1]
-            T = 1.0
 
-            for idx in range(tile_bin_start, tile_bin_end):
-                gaussian_id = gaussian_ids_sorted[idx]
-                conic = conics[gaussian_id]
-                center = xys[gaussian_id]
-                delta = center - torch.tensor(
-                    [j, i], dtype=torch.float32, device=xys.device
-                )
+    # tiles without any gaussian keep the background, T = 1 and index 0
+    def rasterize(tile_id, tile_bin_start, tile_bin_end):
+        rasterize_tile(
+            tile_id,
+            tile_bin_start,
+            tile_bin_end,
+            tile_bounds,
+            block,
+            img_size,
+            gaussian_ids_sorted,
+            xys,
+            conics,
+            colors,
+            opacities,
+            background,
+            out_img,
+            final_Ts,
+            final_idx,
+            batch_size,
+        )
 
-                sigma = (
-                    0.5
-                    * (conic[0] * delta[0] * delta[0] + conic[2] * delta[1] * delta[1])
-                    + conic[1] * delta[0] * delta[1]
-                )
+    # tiles write disjoint pixels, so they can run in any order
+    run_tiles(rasterize, get_tile_work_list(tile_bins), num_threads)
 
-                if sigma < 0:
-                    continue
+    return out_img, final_Ts, final_idx
 
-                opac = opacities[gaussian_id]
-                alpha = min(0.999, opac * torch.exp(-sigma))
 
-                if alpha < 1 / 255:
-                    continue
+def get_tile_work_list(tile_bins):
+    """
+    returns the (tile_id, tile_bin_start, tile_bin_end) of every non empty tile
+    """
+    return [
+        (tile_id, start, end)
+        for tile_id, (start, end) in enumerate(tile_bins.tolist())
+        if end > start
+    ]
 
-                next_T = T * (1 - alpha)
 
-                if next_T <= 1e-4:
-                    idx -= 1
-                    break
+_thread_pool = None
+_thread_pool_size = 0
+_thread_pool_lock = threading.Lock()
 
-                vis = alpha * T
 
-                out_img[i, j] += vis * colors[gaussian_id]
-                T = next_T
+def get_thread_pool(num_threads):
+    """
+    returns the pool running the tiles, a single pool is kept and it is
+    replaced when the number of threads changes. Tiles already submitted to the
+    previous pool still run to completion
+    """
+    global _thread_pool, _thread_pool_size
+    with _thread_pool_lock:
+        if _thread_pool is None or _thread_pool_size != num_threads:
+            if _thread_pool is not None:
+                _thread_pool.shutdown(wait=False)
+            _thread_pool = ThreadPoolExecutor(
+                max_workers=num_threads, thread_name_prefix="gsplat"
+            )
+            _thread_pool_size = num_threads
+        return _thread_pool
 
-            final_Ts[i, j] = T
-            final_idx[i, j] = idx
-            out_img[i, j] += T * background
 
-    return out_img, final_Ts, final_idx
+def _discard(result):
+    pass
+
+
+def run_tiles(fn, tiles, num_threads=1, consume=None, lookahead=2):
+    """
+    Calls fn(tile_id, tile_bin_start, tile_bin_end) for every tile of the work
+    list, the tiles with the most intersections first so that heavy tiles do not
+    end up last. torch ops release the GIL, so with several threads the tiles
+    run concurrently.
+    consume, when given, is called on the result of every tile in that order,
+    which does not depend on the number of threads, and the result is dropped
+    after it. At most lookahead * num_threads tiles are submitted ahead of the
+    next one consumed, so only as many results are alive at a time.
+    """
+    if consume is None:
+        consume = _discard
+    # sorted is stable, ties keep the order of the work list
+    tiles = sorted(tiles, key=lambda tile: tile[1] - tile[2])
+    if num_threads <= 1 or len(tiles) <= 1:
+        for tile in tiles:
+            consume(fn(*tile))
+        return
+    pool = get_thread_pool(num_threads)
+    pending = collections.deque()
+    for tile in tiles:
+        if len(pending) >= lookahead * num_threads:
+            consume(pending.popleft().result())
+        pending.append(pool.submit(fn, *tile))
+    while pending:
+        consume(pending.popleft().result())
+
+
+def get_tile_pixels(tile_id, tile_bounds, block, img_size, device):
+    tile_y, tile_x = divmod(tile_id, tile_bounds[0])
+    i_min, j_min = tile_y * block[1], tile_x * block[0]
+    i_max = min(i_min + block[1], img_size[1])
+    j_max = min(j_min + block[0], img_size[0])
+    i, j = torch.meshgrid(
+        torch.arange(i_min, i_max, device=device),
+        torch.arange(j_min, j_max, device=device),
+        indexing="ij",
+    )
+    # pixel centers, as in the cuda kernels
+    px = j.reshape(-1).to(torch.float32) + 0.5
+    py = i.reshape(-1).to(torch.float32) + 0.5
+    return (slice(i_min, i_max), slice(j_min, j_max)), px, py
+
+
+def compute_tile_alphas(px, py, xy, conic, opac):
+    """
+    Evaluates a chunk of K gaussians at P pixel centers.
+    returns the pixel to center offsets, sigma (P, K), the masked alpha (P, K)
+    and the validity mask (P, K) of the sigma and alpha thresholds
+    """
+    dx = xy[None, :, 0] - px[:, None]
+    dy = xy[None, :, 1] - py[:, None]
+    sigma = (
+        0.5 * (conic[None, :, 0] * dx * dx + conic[None, :, 2] * dy * dy)
+        + conic[None, :, 1] * dx * dy
+    )
+    alpha = torch.clamp_max(opac[None, :] * torch.exp(-sigma), 0.999)
+    valid = (sigma >= 0) & (alpha >= 1 / 255)
+    return (dx, dy), sigma, torch.where(valid, alpha, 0), valid
+
+
+def rasterize_tile(
+    tile_id,
+    tile_bin_start,
+    tile_bin_end,
+    tile_bounds,
+    block,
+    img_size,
+    gaussian_ids_sorted,
+    xys,
+    conics,
+    colors,
+    opacities,
+    background,
+    out_img,
+    final_Ts,
+    final_idx,
+    batch_size=256,
+):
+    """
+    Composites the depth sorted gaussians of one tile in chunks of batch_size,
+    writing the tile's pixels of out_img, final_Ts and final_idx in place.
+    """
+    device = xys.device
+    pix_slice, px, py = get_tile_pixels(tile_id, tile_bounds, block, img_size, device)
+    num_pixels = px.shape[0]
+
+    T = torch.ones(num_pixels, dtype=torch.float32, device=device)
+    pix_out = torch.zeros(
+        (num_pixels, colors.shape[-1]), dtype=torch.float32, device=device
+    )
+    cur_idx = torch.zeros(num_pixels, dtype=torch.int64, device=device)
+    done = torch.zeros(num_pixels, dtype=torch.bool, device=device)
+
+    for batch_start in range(tile_bin_start, tile_bin_end, batch_size):
+        batch_end = min(batch_start + batch_size, tile_bin_end)
+        g = gaussian_ids_sorted[batch_start:batch_end].to(torch.int64)
+        _, _, alpha, valid = compute_tile_alphas(
+            px, py, xys[g], conics[g], opacities[g].reshape(-1)
+        )
+        valid = valid & ~done[:, None]
+        alpha = torch.where(valid, alpha, 0)
+
+        # transmittance before and after each gaussian, accumulated in order
+        Ts = torch.cumprod(torch.cat([T[:, None], 1 - alpha], dim=-1), dim=-1)
+        next_T = Ts[:, 1:]
+        # the first gaussian that would push T to 1e-4 or below ends the pixel
+        # and does not contribute, neither does anything behind it
+        contrib = valid & (next_T > 1e-4)
+        vis = torch.where(contrib, alpha * Ts[:, :-1], 0)
+        pix_out = pix_out + vis @ colors[g].to(torch.float32)
+
+        T = torch.where(contrib, next_T, T[:, None]).amin(dim=-1)
+        idxs = torch.arange(batch_start, batch_end, device=device)
+        last_idx = torch.where(contrib, idxs[None, :], -1).amax(dim=-1)
+        cur_idx = torch.where(last_idx >= 0, last_idx, cur_idx)
+        done = done | (valid & ~contrib).any(dim=-1)
+        if done.all():
+            break
+
+    tile_shape = (pix_slice[0].stop - pix_slice[0].start, -1)
+    out_img[pix_slice] = (pix_out + T[:, None] * background).reshape(
+        *tile_shape, colors.shape[-1]
+    )
+    final_Ts[pix_slice] = T.reshape(tile_shape)
+    final_idx[pix_slice] = cur_idx.to(torch.int32).reshape(tile_shape)
+
+
+def rasterize_backward(
+    tile_bounds,
+    block,
+    img_size,
+    gaussian_ids_sorted,
+    tile_bins,
+    xys,
+    conics,
+    colors,
+    opacities,
+    background,
+    final_Ts,
+    final_idx,
+    v_output,
+    v_output_alpha,
+    batch_size=256,
+    num_threads=1,
+):
+    num_points = xys.shape[0]
+    v_xy = torch.zeros_like(xys)
+    v_xy_abs = torch.zeros_like(xys)
+    v_conic = torch.zeros_like(conics)
+    v_colors = torch.zeros((num_points, colors.shape[-1]), device=xys.device)
+    v_opacity = torch.zeros(num_points, device=xys.device)
+
+    def rasterize_tile_grads(tile_id, tile_bin_start, tile_bin_end):
+        return rasterize_tile_backward(
+            tile_id,
+            tile_bin_start,
+            tile_bin_end,
+            tile_bounds,
+            block,
+            img_size,
+            gaussian_ids_sorted,
+            xys,
+            conics,
+            colors,
+            opacities,
+            background,
+            final_Ts,
+            final_idx,
+            v_output,
+            v_output_alpha,
+            batch_size,
+        )
+
+    def accumulate(batch_grads):
+        for g, *grads in batch_grads:
+            for v_param, v_local in zip(
+                (v_xy, v_xy_abs, v_conic, v_colors, v_opacity), grads
+            ):
+                v_param.index_add_(0, g, v_local.to(v_param.dtype))
+
+    # gaussians are shared between tiles, run_tiles accumulates their gradients
+    # in an order that does not depend on the number of threads, and only keeps
+    # the gradients of a bounded number of tiles alive
+    run_tiles(
+        rasterize_tile_grads,
+        get_tile_work_list(tile_bins),
+        num_threads,
+        consume=accumulate,
+    )
+
+    return v_xy, v_xy_abs, v_conic, v_colors, v_opacity.reshape(opacities.shape)
+
+
+def rasterize_tile_backward(
+    tile_id,
+    tile_bin_start,
+    tile_bin_end,
+    tile_bounds,
+    block,
+    img_size,
+    gaussian_ids_sorted,
+    xys,
+    conics,
+    colors,
+    opacities,
+    background,
+    final_Ts,
+    final_idx,
+    v_output,
+    v_output_alpha,
+    batch_size=256,
+):
+    """
+    Walks the gaussians of one tile back to front from final_idx, recovering
+    the transmittance of each gaussian from final_Ts like the cuda kernel.
+    Only (pixels, batch_size) sized buffers are live at any time.
+    returns a list of (gaussian_ids, v_xy, v_xy_abs, v_conic, v_colors,
+    v_opacity) with the gradients of each batch, summed over the tile pixels
+    """
+    device = xys.device
+    pix_slice, px, py = get_tile_pixels(tile_id, tile_bounds, block, img_size, device)
+
+    T_final = final_Ts[pix_slice].reshape(-1)
+    bin_final = final_idx[pix_slice].reshape(-1).to(torch.int64)
+    v_out = v_output[pix_slice].reshape(T_final.shape[0], -1).to(torch.float32)
+    v_out_alpha = v_output_alpha[pix_slice].reshape(-1)
+    # the background and the alpha output both depend on T_final, they act
+    # like one more layer behind every gaussian
+    v_T_final = v_out @ background.to(torch.float32) - v_out_alpha
+
+    # transmittance before the current batch and color accumulated behind it
+    T = T_final
+    buffer = torch.zeros_like(T_final)
+    grads = []
+    batch_end = min(tile_bin_end, int(bin_final.max()) + 1)
+    for batch_start in reversed(range(tile_bin_start, batch_end, batch_size)):
+        end = min(batch_start + batch_size, batch_end)
+        g = gaussian_ids_sorted[batch_start:end].to(torch.int64)
+        conic = conics[g]
+        opac = opacities[g].reshape(-1)
+        (dx, dy), sigma, alpha, valid = compute_tile_alphas(
+            px, py, xys[g], conic, opac
+        )
+        idxs = torch.arange(batch_start, end, device=device)
+        contrib = valid & (idxs[None, :] <= bin_final[:, None])
+        alpha = torch.where(contrib, alpha, 0)
+
+        # undo the compositing from the back: T before each gaussian is the T
+        # behind the batch divided by (1 - alpha) of itself and its successors
+        ra = 1 / (1 - alpha)
+        Ts = T[:, None] * torch.cumprod(ra.flip(-1), dim=-1).flip(-1)
+        fac = alpha * Ts
+        rgb_dot = v_out @ colors[g].to(torch.float32).T
+        contribution = fac * rgb_dot
+        behind = (
+            buffer[:, None]
+            + torch.cumsum(contribution.flip(-1), dim=-1).flip(-1)
+            - contribution
+        )
+        behind = behind + (T_final * v_T_final)[:, None]
+        v_alpha = rgb_dot * Ts - behind * ra
+        v_alpha = torch.where(contrib, v_alpha, 0)
+
+        vis = torch.exp(-sigma)
+        v_sigma = -opac[None, :] * vis * v_alpha
+        v_xy_local = torch.stack(
+            [
+                v_sigma * (conic[None, :, 0] * dx + conic[None, :, 1] * dy),
+                v_sigma * (conic[None, :, 1] * dx + conic[None, :, 2] * dy),
+            ],
+            dim=-1,
+        )
+        v_conic_local = torch.stack(
+            [
+                0.5 * (v_sigma * dx * dx).sum(0),
+                (v_sigma * dx * dy).sum(0),
+                0.5 * (v_sigma * dy * dy).sum(0),
+            ],
+            dim=-1,
+        )
+        grads.append(
+            (
+                g,
+                v_xy_local.sum(0),
+                v_xy_local.abs().sum(0),
+                v_conic_local,
+                fac.T @ v_out,
+                (vis * v_alpha).sum(0),
+            )
+        )
+
+        T = Ts[:, 0]
+        buffer = buffer + contribution.sum(-1)
+    return grads
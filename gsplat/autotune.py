@@ -0,0 +1,190 @@
+"""Benchmark driven selection of the tile width"""
+
+import json
+import math
+import os
+import time
+from typing import Dict, Optional, Sequence
+
+import torch
+from jaxtyping import Float
+from torch import Tensor
+
+import gsplat.backend as _C
+
+from . import cpu as _cpu
+from .project_gaussians import project_gaussians
+from .rasterize import rasterize_gaussians
+
+_CANDIDATES = (4, 8, 12, 16, 24, 32, 48, 64)
+
+
+def get_autotune_cache_path() -> str:
+    """Returns the file caching the tuned tile widths.
+
+    It lives in ``$GSPLAT_CACHE_DIR``, or ``~/.cache/gsplat`` by default.
+    """
+    cache_dir = os.environ.get(
+        "GSPLAT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "gsplat")
+    )
+    return os.path.join(cache_dir, "block_width.json")
+
+
+def _load_cache(path: str) -> Dict[str, int]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path: str, cache: Dict[str, int]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # write to a temporary file first, so concurrent readers see a whole file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _device_name(device: torch.device) -> str:
+    if device.type == "cuda":
+        return torch.cuda.get_device_name(device)
+    if device.type == "cpu":
+        # the tiles run on a pool of their own, sized apart from torch
+        return f"cpu-{torch.get_num_threads()}-{_cpu.get_num_threads()}"
+    return f"{device.type}-{torch.get_num_threads()}"
+
+
+def _synchronize(device: torch.device) -> None:
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+
+
+def autotune_block_width(
+    means3d: Float[Tensor, "*batch 3"],
+    scales: Float[Tensor, "*batch 3"],
+    glob_scale: float,
+    quats: Float[Tensor, "*batch 4"],
+    viewmat: Float[Tensor, "4 4"],
+    fx: float,
+    fy: float,
+    cx: float,
+    cy: float,
+    img_height: int,
+    img_width: int,
+    colors: Float[Tensor, "*batch channels"],
+    opacity: Float[Tensor, "*batch 1"],
+    candidates: Optional[Sequence[int]] = None,
+    num_iters: int = 5,
+    backward: bool = True,
+    use_cache: bool = True,
+) -> int:
+    """Finds the fastest tile width to render a scene on the active backend.
+
+    Every candidate width supported by the backend is timed on
+    :func:`gsplat.project_gaussians` and :func:`gsplat.rasterize_gaussians`, and
+    optionally their backward pass. The winner is cached on disk for the backend,
+    device, resolution, channel count and order of magnitude of the number of
+    gaussians, see :func:`gsplat.get_autotune_cache_path`, so later calls with the
+    same configuration return without benchmarking.
+
+    Args:
+        means3d (Tensor): xyzs of gaussians.
+        scales (Tensor): scales of the gaussians.
+        glob_scale (float): A global scaling factor applied to the scene.
+        quats (Tensor): rotations in normalized quaternion [w,x,y,z] format.
+        viewmat (Tensor): view matrix for rendering.
+        fx (float): focal length x.
+        fy (float): focal length y.
+        cx (float): principal point x.
+        cy (float): principal point y.
+        img_height (int): height of the rendered image.
+        img_width (int): width of the rendered image.
+        colors (Tensor): N-dimensional features associated with the gaussians.
+        opacity (Tensor): opacity associated with the gaussians.
+        candidates (Optional[Sequence[int]]): tile widths to try, by default the
+            ones of 4 to 64 pixels supported by the backend.
+        num_iters (int): number of timed renders per candidate.
+        backward (bool): whether to include the backward pass in the timings.
+        use_cache (bool): whether to read and write the cached winners.
+
+    Returns:
+        The fastest tile width.
+    """
+    device = means3d.device
+    num_points = means3d.shape[0]
+    key = "|".join(
+        [
+            _C.get_backend(device),
+            _device_name(device),
+            f"{img_width}x{img_height}",
+            f"channels={colors.shape[-1]}",
+            f"points=2^{round(math.log2(max(num_points, 1)))}",
+            f"backward={backward}",
+        ]
+    )
+    path = get_autotune_cache_path()
+    if use_cache:
+        cached = _load_cache(path).get(key)
+        if cached is not None:
+            return cached
+
+    max_width = _C.get_max_block_width(device)
+    if candidates is None:
+        candidates = _CANDIDATES
+    candidates = [x for x in candidates if max_width is None or x <= max_width]
+    if not candidates:
+        raise ValueError(f"No candidate block width is supported by {key}")
+
+    params = [x.detach().requires_grad_(backward) for x in (means3d, colors, opacity)]
+
+    def render(block_width: int) -> None:
+        xys, depths, radii, conics, _, num_tiles_hit, _ = project_gaussians(
+            params[0],
+            scales,
+            glob_scale,
+            quats,
+            viewmat,
+            fx,
+            fy,
+            cx,
+            cy,
+            img_height,
+            img_width,
+            block_width,
+        )
+        out_img = rasterize_gaussians(
+            xys,
+            depths,
+            radii,
+            conics,
+            num_tiles_hit,
+            params[1],
+            params[2],
+            img_height,
+            img_width,
+            block_width,
+        )
+        if backward:
+            out_img.sum().backward()
+
+    timings = {}
+    with torch.enable_grad():
+        for block_width in candidates:
+            # the first render warms up the kernels and the allocator
+            render(block_width)
+            _synchronize(device)
+            start = time.perf_counter()
+            for _ in range(num_iters):
+                render(block_width)
+            _synchronize(device)
+            timings[block_width] = time.perf_counter() - start
+    best = min(timings, key=timings.get)
+
+    if use_cache:
+        # merge with the winners cached by other processes in the meantime
+        cache = _load_cache(path)
+        cache[key] = best
+        _save_cache(path, cache)
+    return best
@@ -0,0 +1,175 @@
+"""Registry of the kernel backends used by the python bindings"""
+
+import importlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import torch
+from torch import Tensor
+
+
+@dataclass
+class _Backend:
+    module: str
+    device_types: Tuple[str, ...]
+    is_available: Callable[[], bool]
+    max_block_width: Optional[int]
+
+
+_BACKENDS: Dict[str, _Backend] = {}
+_FORCED_BACKEND: Optional[str] = None
+
+
+def _cuda_available() -> bool:
+    # pylint: disable=import-outside-toplevel
+    from .cuda._backend import _C
+
+    return _C is not None
+
+
+def register_backend(
+    name: str,
+    module: str,
+    device_types: Tuple[str, ...],
+    is_available: Optional[Callable[[], bool]] = None,
+    max_block_width: Optional[int] = None,
+) -> None:
+    """Registers a backend implementing the gsplat kernels.
+
+    The backend module must expose the functions of :mod:`gsplat.cuda`
+    (``project_gaussians_forward``, ``rasterize_forward``, ...) with the same
+    signatures.
+    Backends registered later take precedence for the device types they declare.
+
+    Args:
+        name (str): name of the backend.
+        module (str): import path of the module implementing the kernels.
+        device_types (Tuple): torch device types handled by the backend, e.g. ("cpu",).
+        is_available (Callable): optional check run before the backend is selected.
+        max_block_width (Optional[int]): largest tile width supported by the kernels.
+    """
+    _BACKENDS[name] = _Backend(
+        module=module,
+        device_types=tuple(device_types),
+        is_available=is_available or (lambda: True),
+        max_block_width=max_block_width,
+    )
+
+
+def available_backends() -> List[str]:
+    """Returns the names of the registered backends usable on this machine."""
+    return [name for name, backend in _BACKENDS.items() if backend.is_available()]
+
+
+def set_backend(name: Optional[str]) -> None:
+    """Forces every kernel call to go through the given backend.
+
+    Passing None restores the default dispatch on the device of the input tensors.
+    The cpu backend is written with plain torch ops, so forcing it also works on
+    cuda tensors, e.g. for debugging.
+
+    Args:
+        name (Optional[str]): name of a registered backend, or None.
+    """
+    global _FORCED_BACKEND
+    if name is not None:
+        if name not in _BACKENDS:
+            raise ValueError(
+                f"Unknown backend {name}, expected one of {list(_BACKENDS)}"
+            )
+        if not _BACKENDS[name].is_available():
+            raise RuntimeError(f"gsplat backend {name} is not available")
+    _FORCED_BACKEND = name
+
+
+@contextmanager
+def use_backend(name: Optional[str]) -> Iterator[None]:
+    """Context manager version of :func:`set_backend`."""
+    previous = _FORCED_BACKEND
+    set_backend(name)
+    try:
+        yield
+    finally:
+        set_backend(previous)
+
+
+def get_backend(device: Union[str, torch.device] = "cpu") -> str:
+    """Returns the name of the backend used for tensors on the given device.
+
+    Args:
+        device (Union[str, torch.device]): device of the input tensors.
+
+    Returns:
+        The name of the active backend.
+    """
+    if _FORCED_BACKEND is not None:
+        return _FORCED_BACKEND
+    device_type = torch.device(device).type
+    for name in reversed(list(_BACKENDS)):
+        backend = _BACKENDS[name]
+        if device_type in backend.device_types and backend.is_available():
+            return name
+    raise RuntimeError(
+        f"No gsplat backend available for {device_type} tensors, "
+        f"registered backends: {list(_BACKENDS)}"
+    )
+
+
+def get_max_block_width(device: Union[str, torch.device] = "cpu") -> Optional[int]:
+    """Returns the largest tile width supported on the given device, if any.
+
+    The cuda kernels run one thread per pixel of a tile and support widths up to
+    16, while the cpu backend accepts any width.
+
+    Args:
+        device (Union[str, torch.device]): device of the input tensors.
+    """
+    return _BACKENDS[get_backend(device)].max_block_width
+
+
+def check_block_width(
+    block_width: int, device: Union[str, torch.device] = "cpu"
+) -> None:
+    """Checks that the backend used on the given device supports a tile width.
+
+    Args:
+        block_width (int): side length of the tiles in pixels.
+        device (Union[str, torch.device]): device of the input tensors.
+    """
+    max_width = get_max_block_width(device)
+    if max_width is None:
+        assert block_width > 1, "block_width must be larger than 1"
+    else:
+        assert (
+            block_width > 1 and block_width <= max_width
+        ), f"block_width must be between 2 and {max_width}"
+
+
+def _make_dispatch_func(name: str) -> Callable:
+    def dispatch(*args, **kwargs):
+        device = next(
+            (x.device for x in (*args, *kwargs.values()) if isinstance(x, Tensor)),
+            torch.device("cpu"),
+        )
+        module = importlib.import_module(_BACKENDS[get_backend(device)].module)
+        return getattr(module, name)(*args, **kwargs)
+
+    return dispatch
+
+
+register_backend("cpu", "gsplat.cpu", ("cpu",))
+register_backend("cuda", "gsplat.cuda", ("cuda",), _cuda_available, 16)
+
+
+nd_rasterize_forward = _make_dispatch_func("nd_rasterize_forward")
+nd_rasterize_backward = _make_dispatch_func("nd_rasterize_backward")
+rasterize_forward = _make_dispatch_func("rasterize_forward")
+rasterize_backward = _make_dispatch_func("rasterize_backward")
+compute_cov2d_bounds = _make_dispatch_func("compute_cov2d_bounds")
+project_gaussians_forward = _make_dispatch_func("project_gaussians_forward")
+project_gaussians_backward = _make_dispatch_func("project_gaussians_backward")
+compute_sh_forward = _make_dispatch_func("compute_sh_forward")
+compute_sh_backward = _make_dispatch_func("compute_sh_backward")
+map_gaussian_to_intersects = _make_dispatch_func("map_gaussian_to_intersects")
+get_tile_bin_edges = _make_dispatch_func("get_tile_bin_edges")
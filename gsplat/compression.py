@@ -0,0 +1,290 @@
+"""Vector quantized storage of 3D gaussians"""
+
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+import torch
+import torch.nn.functional as F
+from jaxtyping import Float
+from torch import Tensor
+
+from .utils import to_float32
+
+_FORMAT_VERSION = 1
+
+ATTRIBUTES = ("means3d", "scales", "quats", "opacities", "sh_coeffs")
+
+
+def _index_dtype(num_codes: int) -> torch.dtype:
+    if num_codes <= 256:
+        return torch.uint8
+    if num_codes <= 32768:
+        return torch.int16
+    return torch.int32
+
+
+def _assign(x: Tensor, codebook: Tensor, batch_size: int) -> Tensor:
+    # chunked so the distance matrix stays small for millions of points
+    return torch.cat(
+        [
+            torch.cdist(chunk, codebook).argmin(dim=-1)
+            for chunk in torch.split(x, batch_size)
+        ]
+    )
+
+
+def _kmeans(
+    x: Tensor, num_codes: int, num_iters: int, batch_size: int, seed: int
+) -> Tuple[Tensor, Tensor]:
+    generator = torch.Generator(device=x.device).manual_seed(seed)
+    num_codes = min(num_codes, len(x))
+    init = torch.randperm(len(x), generator=generator, device=x.device)[:num_codes]
+    codebook = x[init].clone()
+    for _ in range(num_iters):
+        labels = _assign(x, codebook, batch_size)
+        sums = torch.zeros_like(codebook).index_add_(0, labels, x)
+        counts = torch.bincount(labels, minlength=num_codes)
+        # empty clusters keep their previous center
+        filled = counts > 0
+        codebook[filled] = sums[filled] / counts[filled, None]
+    return codebook, _assign(x, codebook, batch_size)
+
+
+def _num_bytes(x: Tensor) -> int:
+    return x.numel() * x.element_size()
+
+
+def _synchronize(device: torch.device) -> None:
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+
+
+class CompressedGaussians:
+    """Vector quantized 3D gaussians.
+
+    The scales, rotations and view dependent SH bands of the gaussians are
+    replaced by indices into codebooks built with k-means, the positions and the
+    SH DC terms are stored in float16 and the opacities in uint8. Build it with
+    :func:`gsplat.compress_gaussians` or :meth:`load`.
+
+    The decoded attributes are float32 tensors that are passed as is to
+    :func:`gsplat.project_gaussians` and :func:`gsplat.spherical_harmonics`, and
+    :meth:`batches` decodes a large scene a range of gaussians at a time.
+
+    Example:
+        >>> scene = gsplat.compress_gaussians(means3d, scales, quats, opacities, coeffs)
+        >>> scene.save("scene.pt")
+        >>> scene = gsplat.CompressedGaussians.load("scene.pt", device="cuda")
+        >>> means3d, scales, quats, opacities, sh_coeffs = scene.decode()
+        >>> print(scene.stats())
+
+    Args:
+        tensors (Dict[str, Tensor]): the encoded tensors, as built by
+            :func:`gsplat.compress_gaussians`.
+    """
+
+    def __init__(self, tensors: Dict[str, Tensor]):
+        self.tensors = tensors
+        self.num_points = tensors["means3d"].shape[0]
+
+    def __len__(self) -> int:
+        return self.num_points
+
+    @property
+    def device(self) -> torch.device:
+        return self.tensors["means3d"].device
+
+    def to(self, device) -> "CompressedGaussians":
+        """Returns the compressed gaussians on another device."""
+        return CompressedGaussians({k: v.to(device) for k, v in self.tensors.items()})
+
+    def decode_attribute(
+        self, name: str, start: int = 0, end: Optional[int] = None
+    ) -> Tensor:
+        """Decodes one attribute of a range of gaussians to float32.
+
+        Args:
+            name (str): one of "means3d", "scales", "quats", "opacities" and
+                "sh_coeffs".
+            start (int): first gaussian to decode.
+            end (Optional[int]): end of the range, the last gaussian by default.
+
+        Returns:
+            The decoded attribute.
+        """
+        t = self.tensors
+        if name == "means3d":
+            return to_float32(t["means3d"][start:end], name)
+        if name == "opacities":
+            return to_float32(t["opacities"][start:end], name, allow_uint8=True)
+        if name in ("scales", "quats"):
+            indices = t[f"{name}_indices"][start:end].long()
+            return t[f"{name}_codebook"][indices]
+        if name == "sh_coeffs":
+            sh_dc = to_float32(t["sh_dc"][start:end], name)
+            if "sh_codebook" not in t:
+                return sh_dc
+            indices = t["sh_indices"][start:end].long()
+            return torch.cat([sh_dc, t["sh_codebook"][indices]], dim=1)
+        raise ValueError(f"Unknown attribute {name}, expected one of {ATTRIBUTES}")
+
+    def decode(
+        self, start: int = 0, end: Optional[int] = None
+    ) -> Tuple[Tensor, Tensor, Tensor, Tensor, Tensor]:
+        """Decodes a range of gaussians to float32.
+
+        Args:
+            start (int): first gaussian to decode.
+            end (Optional[int]): end of the range, the last gaussian by default.
+
+        Returns:
+            A tuple of {Tensor, Tensor, Tensor, Tensor, Tensor}:
+
+            - **means3d** (Tensor): xyzs of gaussians.
+            - **scales** (Tensor): scales of the gaussians.
+            - **quats** (Tensor): rotations in normalized quaternion [w,x,y,z] format.
+            - **opacities** (Tensor): opacities of the gaussians, of shape (N, 1).
+            - **sh_coeffs** (Tensor): harmonic coefficients, of shape (N, D, C).
+        """
+        return tuple(self.decode_attribute(name, start, end) for name in ATTRIBUTES)
+
+    def batches(
+        self, batch_size: int
+    ) -> Iterator[Tuple[Tensor, Tensor, Tensor, Tensor, Tensor]]:
+        """Decodes the gaussians batch_size at a time, see :meth:`decode`."""
+        for start in range(0, self.num_points, batch_size):
+            yield self.decode(start, start + batch_size)
+
+    def save(self, path: str) -> None:
+        """Writes the compressed gaussians to a file."""
+        torch.save({"version": _FORMAT_VERSION, **self.tensors}, path)
+
+    @classmethod
+    def load(cls, path: str, device=None) -> "CompressedGaussians":
+        """Reads compressed gaussians written by :meth:`save`.
+
+        Args:
+            path (str): file to read.
+            device: device to load the tensors on, the saved one by default.
+        """
+        data = torch.load(path, map_location=device)
+        version = data.pop("version", None)
+        if version != _FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported compressed gaussians version {version} in {path}"
+            )
+        return cls(data)
+
+    def stats(self, num_iters: int = 10) -> Dict[str, Dict[str, float]]:
+        """Reports the compression ratio and the decode time of every attribute.
+
+        Args:
+            num_iters (int): number of timed decodes per attribute.
+
+        Returns:
+            A dict mapping each attribute and "total" to its raw float32 size
+            "raw_bytes", its compressed size "bytes", their ratio "ratio" and the
+            time to decode all the gaussians "decode_ms".
+        """
+        names = {
+            "means3d": ["means3d"],
+            "scales": ["scales_codebook", "scales_indices"],
+            "quats": ["quats_codebook", "quats_indices"],
+            "opacities": ["opacities"],
+            "sh_coeffs": ["sh_dc", "sh_codebook", "sh_indices"],
+        }
+        stats = {}
+        for name in ATTRIBUTES:
+            num_bytes = sum(
+                _num_bytes(self.tensors[k]) for k in names[name] if k in self.tensors
+            )
+            decoded = self.decode_attribute(name)
+            _synchronize(self.device)
+            start = time.perf_counter()
+            for _ in range(num_iters):
+                self.decode_attribute(name)
+            _synchronize(self.device)
+            stats[name] = {
+                "raw_bytes": decoded.numel() * 4,
+                "bytes": num_bytes,
+                "decode_ms": 1000 * (time.perf_counter() - start) / num_iters,
+            }
+        stats["total"] = {
+            k: sum(s[k] for s in stats.values())
+            for k in ("raw_bytes", "bytes", "decode_ms")
+        }
+        for s in stats.values():
+            s["ratio"] = s["raw_bytes"] / max(s["bytes"], 1)
+        return stats
+
+
+def compress_gaussians(
+    means3d: Float[Tensor, "*batch 3"],
+    scales: Float[Tensor, "*batch 3"],
+    quats: Float[Tensor, "*batch 4"],
+    opacities: Float[Tensor, "*batch 1"],
+    sh_coeffs: Float[Tensor, "*batch D C"],
+    num_scale_codes: int = 4096,
+    num_quat_codes: int = 4096,
+    num_sh_codes: int = 4096,
+    num_iters: int = 10,
+    batch_size: int = 65536,
+    seed: int = 0,
+) -> CompressedGaussians:
+    """Compresses 3D gaussians with vector quantization.
+
+    Codebooks are built with k-means over the log scales, the rotations and the
+    SH bands above the DC term. Rotations are clustered with a non negative real
+    part, as q and -q are the same rotation.
+
+    Args:
+        means3d (Tensor): xyzs of gaussians.
+        scales (Tensor): scales of the gaussians.
+        quats (Tensor): rotations in quaternion [w,x,y,z] format.
+        opacities (Tensor): opacities of the gaussians in [0, 1], of shape (N, 1).
+        sh_coeffs (Tensor): harmonic coefficients, of shape (N, D, C).
+        num_scale_codes (int): size of the scale codebook.
+        num_quat_codes (int): size of the rotation codebook.
+        num_sh_codes (int): size of the SH codebook.
+        num_iters (int): number of k-means iterations.
+        batch_size (int): number of gaussians assigned to the codes at a time.
+        seed (int): seed of the k-means initialization.
+
+    Returns:
+        The compressed gaussians.
+    """
+    if means3d.ndimension() != 2 or means3d.shape[-1] != 3:
+        raise ValueError(f"Invalid shape for means3d: {means3d.shape}")
+    if sh_coeffs.ndimension() != 3:
+        raise ValueError(f"Invalid shape for sh_coeffs: {sh_coeffs.shape}")
+    num_points = means3d.shape[0]
+
+    tensors = {}
+    with torch.no_grad():
+        tensors["means3d"] = means3d.detach().half()
+        opacities = opacities.detach().float().reshape(num_points, 1)
+        tensors["opacities"] = (255 * opacities.clamp(0, 1)).round().to(torch.uint8)
+
+        log_scales = torch.log(scales.detach().float().clamp(min=1e-12))
+        codebook, labels = _kmeans(
+            log_scales, num_scale_codes, num_iters, batch_size, seed
+        )
+        tensors["scales_codebook"] = torch.exp(codebook)
+        tensors["scales_indices"] = labels.to(_index_dtype(len(codebook)))
+
+        quats = F.normalize(quats.detach().float(), dim=-1)
+        quats = torch.where(quats[:, :1] < 0, -quats, quats)
+        codebook, labels = _kmeans(quats, num_quat_codes, num_iters, batch_size, seed)
+        tensors["quats_codebook"] = F.normalize(codebook, dim=-1)
+        tensors["quats_indices"] = labels.to(_index_dtype(len(codebook)))
+
+        sh_coeffs = sh_coeffs.detach().float()
+        tensors["sh_dc"] = sh_coeffs[:, :1].half()
+        if sh_coeffs.shape[1] > 1:
+            sh_rest = sh_coeffs[:, 1:]
+            codebook, labels = _kmeans(
+                sh_rest.flatten(1), num_sh_codes, num_iters, batch_size, seed
+            )
+            tensors["sh_codebook"] = codebook.view(-1, *sh_rest.shape[1:])
+            tensors["sh_indices"] = labels.to(_index_dtype(len(codebook)))
+    return CompressedGaussians(tensors)
@@ -0,0 +1,291 @@
+"""CPU backend built on the pure PyTorch implementations.
+
+Every function mirrors the signature and outputs of its counterpart in
+:mod:`gsplat.cuda`, so the python bindings can dispatch to either one.
+"""
+
+import torch
+import torch.nn.functional as F
+
+from .. import _torch_impl
+
+_NUM_THREADS = 1
+
+
+def set_num_threads(num_threads: int) -> None:
+    """Sets the number of threads rasterizing tiles in parallel.
+
+    Tiles are scheduled by descending number of intersections and the output
+    does not depend on the number of threads. Each tile still runs torch ops, so
+    lowering ``torch.set_num_threads`` avoids oversubscribing the cores.
+
+    Args:
+        num_threads (int): number of worker threads, 1 rasterizes on the caller.
+    """
+    global _NUM_THREADS
+    if num_threads < 1:
+        raise ValueError(f"num_threads must be positive, got {num_threads}")
+    _NUM_THREADS = int(num_threads)
+
+
+def get_num_threads() -> int:
+    """Returns the number of threads used to rasterize tiles."""
+    return _NUM_THREADS
+
+
+def _get_tile_config(img_height: int, img_width: int, block_width: int):
+    tile_bounds = (
+        (img_width + block_width - 1) // block_width,
+        (img_height + block_width - 1) // block_width,
+        1,
+    )
+    block = (block_width, block_width, 1)
+    img_size = (img_width, img_height, 1)
+    return tile_bounds, block, img_size
+
+
+def _triu_to_mat(triu: torch.Tensor, dim: int) -> torch.Tensor:
+    mat = torch.zeros(*triu.shape[:-1], dim, dim, dtype=triu.dtype, device=triu.device)
+    i, j = torch.triu_indices(dim, dim)
+    mat[..., i, j] = triu
+    mat[..., j, i] = triu
+    return mat
+
+
+def compute_cov2d_bounds(num_pts, covs2d):
+    conic, radius, _ = _torch_impl.compute_cov2d_bounds(_triu_to_mat(covs2d, 2))
+    return conic, radius[..., None]
+
+
+def project_gaussians_forward(
+    num_points,
+    means3d,
+    scales,
+    glob_scale,
+    quats,
+    viewmat,
+    fx,
+    fy,
+    cx,
+    cy,
+    img_height,
+    img_width,
+    block_width,
+    clip_thresh,
+):
+    (
+        cov3d,
+        _,
+        xys,
+        depths,
+        radii,
+        conics,
+        compensation,
+        num_tiles_hit,
+        _,
+    ) = _torch_impl.project_gaussians_forward(
+        means3d,
+        scales,
+        glob_scale,
+        quats,
+        viewmat,
+        (fx, fy, cx, cy),
+        (img_width, img_height),
+        block_width,
+        clip_thresh,
+    )
+    return cov3d, xys, depths, radii, conics, compensation, num_tiles_hit
+
+
+def project_gaussians_backward(
+    num_points,
+    means3d,
+    scales,
+    glob_scale,
+    quats,
+    viewmat,
+    fx,
+    fy,
+    cx,
+    cy,
+    img_height,
+    img_width,
+    cov3d,
+    radii,
+    conics,
+    compensation,
+    v_xy,
+    v_depth,
+    v_conic,
+    v_compensation,
+):
+    v_cov2d = torch.zeros((num_points, 3), device=means3d.device)
+    v_cov3d = torch.zeros((num_points, 6), device=means3d.device)
+    v_mean3d = torch.zeros((num_points, 3), device=means3d.device)
+    v_scale = torch.zeros((num_points, 3), device=means3d.device)
+    v_quat = torch.zeros((num_points, 4), device=means3d.device)
+
+    # like the cuda kernel, culled gaussians get no gradient
+    mask = radii > 0
+    if not mask.any():
+        return v_cov2d, v_cov3d, v_mean3d, v_scale, v_quat
+
+    tan_fovx = 0.5 * img_width / fx
+    tan_fovy = 0.5 * img_height / fy
+    i, j = torch.triu_indices(3, 3)
+    ii, jj = torch.triu_indices(2, 2)
+    with torch.enable_grad():
+        mean3d = means3d[mask].detach().requires_grad_(True)
+        scale = scales[mask].detach().requires_grad_(True)
+        quat = quats[mask].detach().requires_grad_(True)
+
+        # chain the vjps through the triangular covariances, which are also
+        # returned by the cuda kernel
+        cov3d_triu = _torch_impl.scale_rot_to_cov3d(scale, glob_scale, quat)[..., i, j]
+        cov3d_in = cov3d_triu.detach().requires_grad_(True)
+        cov2d, _ = _torch_impl.project_cov3d_ewa(
+            mean3d, _triu_to_mat(cov3d_in, 3), viewmat, fx, fy, tan_fovx, tan_fovy
+        )
+        cov2d_triu = cov2d[..., ii, jj]
+        cov2d_in = cov2d_triu.detach().requires_grad_(True)
+        cov2d_mat = _triu_to_mat(cov2d_in, 2)
+        conic, _, _ = _torch_impl.compute_cov2d_bounds(cov2d_mat)
+        comp = _torch_impl.compute_compensation(cov2d_mat)
+        p_view, _ = _torch_impl.clip_near_plane(mean3d, viewmat)
+        xy = _torch_impl.project_pix((fx, fy), p_view, (cx, cy))
+
+        (v_cov2d_m,) = torch.autograd.grad(
+            (conic, comp), cov2d_in, (v_conic[mask], v_compensation[mask])
+        )
+        v_mean3d_m, v_cov3d_m = torch.autograd.grad(
+            (cov2d_triu, xy, p_view[..., 2]),
+            (mean3d, cov3d_in),
+            (v_cov2d_m, v_xy[mask], v_depth[mask]),
+        )
+        v_scale_m, v_quat_m = torch.autograd.grad(cov3d_triu, (scale, quat), v_cov3d_m)
+
+    v_cov2d[mask] = v_cov2d_m
+    v_cov3d[mask] = v_cov3d_m
+    v_mean3d[mask] = v_mean3d_m
+    v_scale[mask] = v_scale_m
+    v_quat[mask] = v_quat_m
+    return v_cov2d, v_cov3d, v_mean3d, v_scale, v_quat
+
+
+def _eval_sh_bases(method, degrees_to_use, viewdirs):
+    num_bases = (degrees_to_use + 1) ** 2
+    viewdirs = F.normalize(viewdirs, dim=-1)
+    if method == "poly":
+        return _torch_impl.eval_sh_bases(num_bases, viewdirs)
+    elif method == "fast":
+        return _torch_impl.eval_sh_bases_fast(num_bases, viewdirs)
+    raise ValueError(f"Invalid method: {method}")
+
+
+def compute_sh_forward(method, num_points, degree, degrees_to_use, viewdirs, coeffs):
+    bases = _eval_sh_bases(method, degrees_to_use, viewdirs)
+    return (bases[..., None] * coeffs[:, : bases.shape[-1]]).sum(dim=-2)
+
+
+def compute_sh_backward(method, num_points, degree, degrees_to_use, viewdirs, v_colors):
+    bases = _eval_sh_bases(method, degrees_to_use, viewdirs)
+    v_coeffs = torch.zeros(
+        (num_points, (degree + 1) ** 2, v_colors.shape[-1]),
+        dtype=v_colors.dtype,
+        device=v_colors.device,
+    )
+    v_coeffs[:, : bases.shape[-1]] = bases[..., None] * v_colors[:, None, :]
+    return v_coeffs
+
+
+def map_gaussian_to_intersects(
+    num_points,
+    num_intersects,
+    xys,
+    depths,
+    radii,
+    cum_tiles_hit,
+    tile_bounds,
+    block_width,
+):
+    isect_ids, gaussian_ids = _torch_impl.map_gaussian_to_intersects(
+        num_points, xys, depths, radii, cum_tiles_hit, tile_bounds, block_width
+    )
+    # like the cuda kernel, fill buffers of num_intersects entries, which is a
+    # capacity when rendering with max_intersects
+    pad = num_intersects - isect_ids.shape[0]
+    if pad > 0:
+        isect_ids = F.pad(isect_ids, (0, pad))
+        gaussian_ids = F.pad(gaussian_ids, (0, pad))
+    return isect_ids, gaussian_ids
+
+
+def get_tile_bin_edges(num_intersects, isect_ids_sorted, tile_bounds):
+    return _torch_impl.get_tile_bin_edges(num_intersects, isect_ids_sorted, tile_bounds)
+
+
+def rasterize_forward(
+    tile_bounds,
+    block,
+    img_size,
+    gaussian_ids_sorted,
+    tile_bins,
+    xys,
+    conics,
+    colors,
+    opacities,
+    background,
+):
+    return _torch_impl.rasterize_forward(
+        tile_bounds,
+        block,
+        img_size,
+        gaussian_ids_sorted,
+        tile_bins,
+        xys,
+        conics,
+        colors,
+        opacities,
+        background,
+        num_threads=_NUM_THREADS,
+    )
+
+
+def rasterize_backward(
+    img_height,
+    img_width,
+    block_width,
+    gaussian_ids_sorted,
+    tile_bins,
+    xys,
+    conics,
+    colors,
+    opacity,
+    background,
+    final_Ts,
+    final_idx,
+    v_output,
+    v_output_alpha,
+):
+    tile_bounds, block, img_size = _get_tile_config(img_height, img_width, block_width)
+    return _torch_impl.rasterize_backward(
+        tile_bounds,
+        block,
+        img_size,
+        gaussian_ids_sorted,
+        tile_bins,
+        xys,
+        conics,
+        colors,
+        opacity,
+        background,
+        final_Ts,
+        final_idx,
+        v_output,
+        v_output_alpha,
+        num_threads=_NUM_THREADS,
+    )
+
+
+nd_rasterize_forward = rasterize_forward
+nd_rasterize_backward = rasterize_backward
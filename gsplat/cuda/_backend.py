@@ -94,7 +94,7 @@ except ImportError:
                 )
     else:
         Console().print(
-            "[yellow]gsplat: No CUDA toolkit found. gsplat will be disabled.[/yellow]"
+            "[yellow]gsplat: No CUDA toolkit found, falling back to the CPU backend.[/yellow]"
         )
 
 
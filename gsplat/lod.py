@@ -0,0 +1,237 @@
+"""Level of detail hierarchy of 3D gaussians"""
+
+import math
+from typing import List, Optional
+
+import torch
+import torch.nn.functional as F
+from jaxtyping import Float, Int
+from torch import Tensor
+
+from . import _torch_impl
+from .spatial_index import _group, _morton_codes
+
+
+def _cov3d_size(covs: Tensor) -> Tensor:
+    # geometric mean of the variances, proportional to the projected area
+    return torch.linalg.det(covs).clamp(min=0) ** (1 / 3)
+
+
+def _merge(means, covs, opacities, colors, fanout):
+    num_parents = math.ceil(len(means) / fanout)
+    pad = num_parents * fanout - len(means)
+    # children are weighted by their opacity times their area, padding by 0
+    weights = opacities * _cov3d_size(covs) + 1e-12
+    weights = F.pad(weights, (0, pad)).view(num_parents, fanout)
+    total = weights.sum(dim=-1)
+    w = weights / total[:, None]
+
+    children = _group(means, fanout)
+    mean = (w[..., None] * children).sum(dim=1)
+    d = children - mean[:, None]
+    spread = d[..., :, None] * d[..., None, :]
+    cov = (w[..., None, None] * (_group(covs, fanout) + spread)).sum(dim=1)
+    w_colors = w.view(w.shape + (1,) * (colors.ndimension() - 1))
+    color = (w_colors * _group(colors, fanout)).sum(dim=1)
+    # keep the opacity times area of the children
+    opacity = (total / _cov3d_size(cov).clamp(min=1e-12)).clamp(max=1)
+    return mean, cov, opacity, color
+
+
+class GaussianLOD:
+    """Level of detail hierarchy of 3D gaussians.
+
+    The gaussians are sorted along a Morton curve and every fanout consecutive
+    nodes are merged into a parent, up to a single root. Parents match the
+    weighted first and second moments of their children, with weights given by
+    the opacity times the area of each child, and average their colors, which may
+    also be spherical harmonics coefficients. The opacity of a parent keeps the
+    total opacity times area of its children.
+
+    :meth:`select` picks a cut of the hierarchy for a camera: nodes are refined
+    until they cover at most pixel_size pixels on screen, so distant regions are
+    rendered with a few merged gaussians. The returned node ids index the
+    attributes of the hierarchy, where the first N nodes are the input gaussians.
+
+    Note:
+        The merged gaussians are computed once from the inputs and are not
+        differentiable, the hierarchy is meant for rendering trained scenes.
+
+    Example:
+        >>> lod = gsplat.GaussianLOD(means3d, scales, quats, opacities, colors, 1.0)
+        >>> ids = lod.select(viewmat, fx, fy, cx, cy, H, W, max_gaussians=1_000_000)
+        >>> xys, depths, radii, conics, _, num_tiles_hit, _ = gsplat.project_gaussians(
+        >>>     lod.means3d[ids], lod.scales[ids], 1.0, lod.quats[ids], viewmat, ...
+        >>> )
+        >>> out_img = gsplat.rasterize_gaussians(
+        >>>     xys, depths, radii, conics, num_tiles_hit,
+        >>>     lod.colors[ids], lod.opacities[ids], ...
+        >>> )
+
+    Args:
+        means3d (Tensor): xyzs of gaussians.
+        scales (Tensor): scales of the gaussians.
+        quats (Tensor): rotations in normalized quaternion [w,x,y,z] format.
+        opacities (Tensor): opacities of the gaussians, of shape (N, 1).
+        colors (Tensor): colors or spherical harmonics coefficients of the gaussians.
+        glob_scale (float): A global scaling factor applied to the scene.
+        fanout (int): number of children per parent.
+    """
+
+    def __init__(
+        self,
+        means3d: Float[Tensor, "*batch 3"],
+        scales: Float[Tensor, "*batch 3"],
+        quats: Float[Tensor, "*batch 4"],
+        opacities: Float[Tensor, "*batch 1"],
+        colors: Float[Tensor, "*batch ..."],
+        glob_scale: float,
+        fanout: int = 8,
+    ):
+        if means3d.ndimension() != 2 or means3d.shape[-1] != 3:
+            raise ValueError(f"Invalid shape for means3d: {means3d.shape}")
+        assert fanout > 1, "fanout must be larger than 1"
+        self.num_points = means3d.shape[0]
+        self.fanout = fanout
+
+        with torch.no_grad():
+            means3d = means3d.detach()
+            scales = scales.detach()
+            quats = quats.detach()
+            opacities = opacities.detach().reshape(self.num_points)
+            colors = colors.detach()
+            covs = _torch_impl.scale_rot_to_cov3d(scales, glob_scale, quats)
+            extents = 3 * glob_scale * scales.amax(dim=-1)
+
+            nodes = {
+                "means3d": [means3d],
+                "scales": [scales],
+                "quats": [quats],
+                "opacities": [opacities],
+                "colors": [colors],
+                "extents": [extents],
+            }
+            # node ids of each level in Morton order, from the gaussians to the root
+            order = torch.argsort(_morton_codes(means3d.float()))
+            self.level_ids: List[Tensor] = [order]
+            mean, cov, opacity, color, extent = (
+                x[order] for x in (means3d, covs, opacities, colors, extents)
+            )
+            num_nodes = self.num_points
+            while len(mean) > 1:
+                children_mean, children_extent = mean, extent
+                mean, cov, opacity, color = _merge(mean, cov, opacity, color, fanout)
+                # bound the extents of the children, including their offset
+                offsets = (_group(children_mean, fanout) - mean[:, None]).norm(dim=-1)
+                extent = (offsets + _group(children_extent, fanout)).amax(dim=1)
+
+                variances, axes = torch.linalg.eigh(cov)
+                # make the eigenvectors a rotation
+                axes[..., 2] *= torch.linalg.det(axes).sign()[:, None]
+                nodes["means3d"].append(mean)
+                nodes["scales"].append(variances.clamp(min=1e-12).sqrt() / glob_scale)
+                nodes["quats"].append(_torch_impl.rotmat_to_quat(axes))
+                nodes["opacities"].append(opacity)
+                nodes["colors"].append(color)
+                nodes["extents"].append(extent)
+                self.level_ids.append(
+                    torch.arange(num_nodes, num_nodes + len(mean), device=mean.device)
+                )
+                num_nodes += len(mean)
+
+        self.means3d = torch.cat(nodes["means3d"])
+        self.scales = torch.cat(nodes["scales"])
+        self.quats = torch.cat(nodes["quats"])
+        self.opacities = torch.cat(nodes["opacities"])[:, None]
+        self.colors = torch.cat(nodes["colors"])
+        self.extents = torch.cat(nodes["extents"])
+
+    def select(
+        self,
+        viewmat: Float[Tensor, "4 4"],
+        fx: float,
+        fy: float,
+        cx: float,
+        cy: float,
+        img_height: int,
+        img_width: int,
+        pixel_size: float = 2.0,
+        max_gaussians: Optional[int] = None,
+        clip_thresh: float = 0.01,
+    ) -> Int[Tensor, "num_selected"]:
+        """Selects the nodes of the hierarchy rendered by a camera.
+
+        Starting from the root, every node in view whose screen space radius is
+        larger than pixel_size is replaced by its children. With max_gaussians,
+        the largest nodes are refined first and refinement stops before the
+        budget is exceeded.
+
+        Args:
+            viewmat (Tensor): view matrix for rendering.
+            fx (float): focal length x.
+            fy (float): focal length y.
+            cx (float): principal point x.
+            cy (float): principal point y.
+            img_height (int): height of the rendered image.
+            img_width (int): width of the rendered image.
+            pixel_size (float): largest screen space radius of a merged gaussian,
+                in pixels.
+            max_gaussians (Optional[int]): largest number of selected nodes.
+            clip_thresh (float): minimum z depth threshold.
+
+        Returns:
+            A Tensor:
+
+            - **ids** (Tensor): ids of the selected nodes.
+        """
+        device = self.means3d.device
+        R = viewmat[:3, :3].to(device)
+        t = viewmat[:3, 3].to(device)
+        focal = max(fx, fy)
+
+        selected = []
+        num_selected = 0
+        positions = torch.zeros(1, dtype=torch.int64, device=device)
+        for level in reversed(range(len(self.level_ids))):
+            ids = self.level_ids[level][positions]
+            p_view = self.means3d[ids] @ R.T + t
+            z = p_view[:, 2]
+            extent = self.extents[ids]
+            depth = z.clamp(min=clip_thresh)
+            x = fx * p_view[:, 0] / depth + cx
+            y = fy * p_view[:, 1] / depth + cy
+            size = focal * extent / depth
+            # nodes crossing the near plane have no screen size and are refined
+            crossing = z - extent <= clip_thresh
+            size = torch.where(crossing, math.inf, size)
+            on_screen = (
+                (x + size > 0)
+                & (x - size < img_width)
+                & (y + size > 0)
+                & (y - size < img_height)
+            )
+            visible = (z + extent > clip_thresh) & (crossing | on_screen)
+            positions, ids, size = positions[visible], ids[visible], size[visible]
+            if level == 0:
+                selected.append(ids)
+                break
+
+            refine = size > pixel_size
+            num_children = (
+                len(self.level_ids[level - 1]) - positions * self.fanout
+            ).clamp(max=self.fanout)
+            if max_gaussians is not None:
+                budget = max_gaussians - num_selected - len(ids)
+                order = torch.argsort(torch.where(refine, size, -1.0), descending=True)
+                extra = torch.where(refine, num_children - 1, 0)[order]
+                allowed = torch.zeros_like(refine)
+                allowed[order] = torch.cumsum(extra, dim=0) <= budget
+                refine = refine & allowed
+            selected.append(ids[~refine])
+            num_selected += len(selected[-1])
+
+            positions = positions[refine, None] * self.fanout + torch.arange(
+                self.fanout, device=device
+            )
+            positions = positions[positions < len(self.level_ids[level - 1])]
+        return torch.cat(selected)
@@ -0,0 +1,282 @@
+"""Memory mapped PLY files of 3D gaussians"""
+
+import mmap
+import os
+import sys
+from typing import Iterator, List, Optional, Tuple
+
+import torch
+import torch.nn.functional as F
+from jaxtyping import Float
+from torch import Tensor
+
+_HEADER_END = b"end_header\n"
+
+_FLOAT_TYPES = ("float", "float32")
+
+
+def _property_names(num_sh_bases: int) -> List[str]:
+    # layout of the reference 3D gaussian splatting implementation
+    return (
+        ["x", "y", "z", "nx", "ny", "nz"]
+        + [f"f_dc_{i}" for i in range(3)]
+        + [f"f_rest_{i}" for i in range(3 * (num_sh_bases - 1))]
+        + ["opacity"]
+        + [f"scale_{i}" for i in range(3)]
+        + [f"rot_{i}" for i in range(4)]
+    )
+
+
+def _read_header(f) -> Tuple[int, List[str], int]:
+    header = b""
+    while not header.endswith(_HEADER_END):
+        line = f.readline()
+        if not line:
+            raise ValueError("Invalid PLY file, end_header not found")
+        header += line
+    lines = header.decode("ascii").splitlines()
+    if lines[0] != "ply":
+        raise ValueError("Invalid PLY file, missing the ply magic number")
+
+    num_points = None
+    names = []
+    element = None
+    for line in lines[1:-1]:
+        words = line.split()
+        if not words or words[0] in ("comment", "obj_info"):
+            continue
+        if words[0] == "format":
+            if words[1] != "binary_little_endian":
+                raise ValueError(f"Unsupported PLY format {words[1]}")
+        elif words[0] == "element":
+            element = words[1]
+            if element == "vertex":
+                num_points = int(words[2])
+            elif num_points is None:
+                raise ValueError("The vertex element must be the first PLY element")
+        elif words[0] == "property" and element == "vertex":
+            if words[1] not in _FLOAT_TYPES:
+                raise ValueError(
+                    f"Unsupported type {words[1]} of property {words[-1]}, "
+                    "the properties of the gaussians must be float"
+                )
+            names.append(words[2])
+    if num_points is None:
+        raise ValueError("Invalid PLY file, missing the vertex element")
+    return num_points, names, len(header)
+
+
+def _columns(names: List[str], properties: List[str]) -> slice:
+    # the properties of an attribute must be consecutive for strided views
+    if not properties:
+        return slice(0, 0)
+    if properties[0] not in names:
+        raise ValueError(f"Missing property {properties[0]}")
+    start = names.index(properties[0])
+    if names[start : start + len(properties)] != properties:
+        raise ValueError(
+            f"The properties {properties[0]} to {properties[-1]} must be consecutive"
+        )
+    return slice(start, start + len(properties))
+
+
+class PlyGaussians:
+    """3D gaussians of a PLY file in the layout of the reference 3D gaussian
+    splatting implementation.
+
+    The body of the file is memory mapped, nothing is read until the tensors are
+    used, and the attributes are strided views into it without a copy:
+
+    - **means3d** (Tensor): xyzs of gaussians, of shape (N, 3).
+    - **sh_dc** (Tensor): DC SH coefficients, of shape (N, 1, 3).
+    - **sh_rest** (Tensor): higher band SH coefficients, of shape (N, D - 1, 3).
+    - **opacity_logits** (Tensor): opacities before the sigmoid, of shape (N, 1).
+    - **log_scales** (Tensor): scales before the exponential, of shape (N, 3).
+    - **quats** (Tensor): rotations in unnormalized quaternion [w,x,y,z] format.
+
+    :meth:`decode` activates a range of gaussians into the inputs of
+    :func:`gsplat.project_gaussians` and :func:`gsplat.spherical_harmonics`, and
+    :meth:`batches` goes through files larger than the memory a range at a time.
+    The views are copy on write, modifying them does not change the file.
+
+    Example:
+        >>> scene = gsplat.load_ply("point_cloud.ply")
+        >>> for means3d, scales, quats, opacities, sh_coeffs in scene.batches(
+        >>>     1_000_000, device="cuda"
+        >>> ):
+        >>>     ...
+
+    Args:
+        path (str): file to read.
+    """
+
+    def __init__(self, path: str):
+        if sys.byteorder != "little":
+            raise RuntimeError("Memory mapped PLY files need a little endian host")
+        self.path = path
+        with open(path, "rb") as f:
+            self.num_points, names, offset = _read_header(f)
+            num_bytes = 4 * self.num_points * len(names)
+            if os.fstat(f.fileno()).st_size < offset + num_bytes:
+                raise ValueError(f"Truncated PLY file {path}")
+            # the mapping stays valid after the file is closed
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        table = torch.frombuffer(
+            self._mmap,
+            dtype=torch.float32,
+            count=self.num_points * len(names),
+            offset=offset,
+        ).view(self.num_points, len(names))
+
+        num_rest = sum(name.startswith("f_rest_") for name in names)
+        if num_rest % 3 != 0:
+            raise ValueError(f"Invalid number of f_rest properties: {num_rest}")
+        self.num_sh_bases = num_rest // 3 + 1
+
+        def columns(prefix: str, count: int) -> slice:
+            return _columns(names, [f"{prefix}{i}" for i in range(count)])
+
+        self.means3d = table[:, _columns(names, ["x", "y", "z"])]
+        self.sh_dc = table[:, None, columns("f_dc_", 3)]
+        # f_rest is stored channel first
+        self.sh_rest = (
+            table[:, columns("f_rest_", num_rest)]
+            .view(self.num_points, 3, self.num_sh_bases - 1)
+            .transpose(1, 2)
+        )
+        self.opacity_logits = table[:, _columns(names, ["opacity"])]
+        self.log_scales = table[:, columns("scale_", 3)]
+        self.quats = table[:, columns("rot_", 4)]
+
+    def __len__(self) -> int:
+        return self.num_points
+
+    def decode(
+        self, start: int = 0, end: Optional[int] = None, device=None
+    ) -> Tuple[Tensor, Tensor, Tensor, Tensor, Tensor]:
+        """Reads and activates a range of gaussians.
+
+        Args:
+            start (int): first gaussian to read.
+            end (Optional[int]): end of the range, the last gaussian by default.
+            device: device of the returned tensors, the CPU by default.
+
+        Returns:
+            A tuple of {Tensor, Tensor, Tensor, Tensor, Tensor}:
+
+            - **means3d** (Tensor): xyzs of gaussians.
+            - **scales** (Tensor): scales of the gaussians.
+            - **quats** (Tensor): rotations in normalized quaternion [w,x,y,z] format.
+            - **opacities** (Tensor): opacities of the gaussians, of shape (N, 1).
+            - **sh_coeffs** (Tensor): harmonic coefficients, of shape (N, D, 3).
+        """
+        means3d, sh_dc, sh_rest, opacity_logits, log_scales, quats = (
+            x[start:end].to(device=device)
+            for x in (
+                self.means3d,
+                self.sh_dc,
+                self.sh_rest,
+                self.opacity_logits,
+                self.log_scales,
+                self.quats,
+            )
+        )
+        return (
+            means3d.contiguous(),
+            torch.exp(log_scales),
+            F.normalize(quats, dim=-1),
+            torch.sigmoid(opacity_logits),
+            torch.cat([sh_dc, sh_rest], dim=1),
+        )
+
+    def batches(
+        self, batch_size: int, device=None
+    ) -> Iterator[Tuple[Tensor, Tensor, Tensor, Tensor, Tensor]]:
+        """Reads the gaussians batch_size at a time, see :meth:`decode`."""
+        for start in range(0, self.num_points, batch_size):
+            yield self.decode(start, start + batch_size, device)
+
+
+def load_ply(path: str) -> PlyGaussians:
+    """Memory maps the 3D gaussians of a PLY file, see :class:`gsplat.PlyGaussians`.
+
+    Args:
+        path (str): file to read.
+
+    Returns:
+        The memory mapped gaussians.
+    """
+    return PlyGaussians(path)
+
+
+def save_ply(
+    path: str,
+    means3d: Float[Tensor, "*batch 3"],
+    scales: Float[Tensor, "*batch 3"],
+    quats: Float[Tensor, "*batch 4"],
+    opacities: Float[Tensor, "*batch 1"],
+    sh_coeffs: Float[Tensor, "*batch D 3"],
+    batch_size: int = 1_000_000,
+) -> None:
+    """Writes 3D gaussians to a PLY file in the layout of the reference 3D gaussian
+    splatting implementation.
+
+    The scales and opacities are stored before their activation, as logarithms and
+    logits. The body of the file is memory mapped and written batch_size gaussians
+    at a time, which also works for tensors that are themselves memory mapped.
+
+    Args:
+        path (str): file to write.
+        means3d (Tensor): xyzs of gaussians.
+        scales (Tensor): scales of the gaussians.
+        quats (Tensor): rotations in quaternion [w,x,y,z] format.
+        opacities (Tensor): opacities of the gaussians in [0, 1], of shape (N, 1).
+        sh_coeffs (Tensor): harmonic coefficients, of shape (N, D, 3).
+        batch_size (int): number of gaussians converted at a time.
+    """
+    if sys.byteorder != "little":
+        raise RuntimeError("Memory mapped PLY files need a little endian host")
+    if means3d.ndimension() != 2 or means3d.shape[-1] != 3:
+        raise ValueError(f"Invalid shape for means3d: {means3d.shape}")
+    if sh_coeffs.ndimension() != 3 or sh_coeffs.shape[-1] != 3:
+        raise ValueError(f"Invalid shape for sh_coeffs: {sh_coeffs.shape}")
+    num_points, num_sh_bases = sh_coeffs.shape[:2]
+    names = _property_names(num_sh_bases)
+    header = "\n".join(
+        ["ply", "format binary_little_endian 1.0", f"element vertex {num_points}"]
+        + [f"property float {name}" for name in names]
+        + ["end_header\n"]
+    ).encode("ascii")
+
+    with open(path, "wb+") as f:
+        f.write(header)
+        f.truncate(len(header) + 4 * num_points * len(names))
+        if num_points == 0:
+            return
+        with mmap.mmap(f.fileno(), 0) as mm:
+            table = torch.frombuffer(
+                mm,
+                dtype=torch.float32,
+                count=num_points * len(names),
+                offset=len(header),
+            ).view(num_points, len(names))
+            eps = torch.finfo(torch.float32).eps
+            for start in range(0, num_points, batch_size):
+                end = start + batch_size
+                sh = sh_coeffs[start:end].detach().float().cpu()
+                opacity = opacities[start:end].detach().float().cpu().reshape(-1, 1)
+                table[start:end] = torch.cat(
+                    [
+                        means3d[start:end].detach().float().cpu(),
+                        # the normals are unused
+                        torch.zeros(len(sh), 3),
+                        sh[:, 0],
+                        sh[:, 1:].transpose(1, 2).flatten(1),
+                        torch.logit(opacity.clamp(eps, 1 - eps)),
+                        torch.log(scales[start:end].detach().float().cpu()),
+                        quats[start:end].detach().float().cpu(),
+                    ],
+                    dim=-1,
+                )
+            del table
+            mm.flush()
@@ -1,13 +1,16 @@
 """Python bindings for 3D gaussian projection"""
 
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
 
 import torch
+import torch.nn.functional as F
 from jaxtyping import Float
 from torch import Tensor
 from torch.autograd import Function
 
-import gsplat.cuda as _C
+import gsplat.backend as _C
+
+from .utils import compute_num_tiles_hit, shrink_radii, to_float32
 
 
 def project_gaussians(
@@ -24,11 +27,16 @@ def project_gaussians(
     img_width: int,
     block_width: int,
     clip_thresh: float = 0.01,
-) -> Tuple[Tensor, Tensor, Tensor, Tensor, Tensor, Tensor, Tensor]:
+    validate: bool = True,
+    exact_tiles: bool = False,
+    opacity: Optional[Float[Tensor, "*batch 1"]] = None,
+    packed: bool = False,
+) -> Tuple[Tensor, ...]:
     """This function projects 3D gaussians to 2D using the EWA splatting method for gaussian splatting.
 
     Note:
         This function is differentiable w.r.t the means3d, scales and quats inputs.
+        They may be stored in float16 or bfloat16, and are projected in float32, see :func:`gsplat.to_float32`.
 
     Args:
        means3d (Tensor): xyzs of gaussians.
@@ -42,11 +50,15 @@ def project_gaussians(
        cy (float): principal point y.
        img_height (int): height of the rendered image.
        img_width (int): width of the rendered image.
-       block_width (int): side length of tiles inside projection/rasterization in pixels (always square). 16 is a good default value, must be between 2 and 16 inclusive.
+       block_width (int): side length of tiles inside projection/rasterization in pixels (always square). 16 is a good default value, must be between 2 and 16 inclusive on the CUDA backend, see :func:`gsplat.autotune_block_width`.
        clip_thresh (float): minimum z depth threshold.
+       validate (bool): check that the quats are normalized. The check synchronizes with the device, disable it to queue frames without stalling.
+       exact_tiles (bool): only count the tiles overlapping the ellipse of each gaussian rather than its bounding square, see :func:`gsplat.compute_num_tiles_hit`. Rasterize with exact_tiles as well.
+       opacity (Optional[Tensor]): opacities the gaussians are rasterized with. When given, radii are cut off where the alpha of each gaussian falls below the 1/255 threshold of the rasterizer, see :func:`gsplat.shrink_radii`, which shrinks radii and num_tiles_hit of low opacity gaussians without changing the rendered images.
+       packed (bool): only return the outputs of the gaussians hitting at least one tile, followed by their indices in the inputs. Pass the indices to :func:`gsplat.rasterize_gaussians` along with the colors and opacities of all the gaussians. Compacting the outputs synchronizes with the device.
 
     Returns:
-        A tuple of {Tensor, Tensor, Tensor, Tensor, Tensor, Tensor, Tensor}:
+        A tuple of {Tensor, Tensor, Tensor, Tensor, Tensor, Tensor, Tensor}, and the indices when packed:
 
         - **xys** (Tensor): x,y locations of 2D gaussian projections.
         - **depths** (Tensor): z depth of gaussians.
@@ -55,15 +67,18 @@ def project_gaussians(
         - **compensation** (Tensor): the density compensation for blurring 2D kernel
         - **num_tiles_hit** (Tensor): number of tiles hit per gaussian.
         - **cov3d** (Tensor): 3D covariances.
+        - **indices** (Tensor): indices of the visible gaussians, with packed.
     """
-    assert block_width > 1 and block_width <= 16, "block_width must be between 2 and 16"
-    assert (quats.norm(dim=-1) - 1 < 1e-6).all(), "quats must be normalized"
-    return _ProjectGaussians.apply(
+    _C.check_block_width(block_width, means3d.device)
+    means3d, scales, quats = _inputs_to_float32(means3d, scales, quats)
+    if validate:
+        assert (quats.norm(dim=-1) - 1 < 1e-6).all(), "quats must be normalized"
+    outputs = _ProjectGaussians.apply(
         means3d.contiguous(),
         scales.contiguous(),
         glob_scale,
         quats.contiguous(),
-        viewmat.contiguous(),
+        to_float32(viewmat, "viewmat").contiguous(),
         fx,
         fy,
         cx,
@@ -73,6 +88,142 @@ def project_gaussians(
         block_width,
         clip_thresh,
     )
+    if exact_tiles or opacity is not None:
+        outputs = _recount_tiles(
+            outputs, img_height, img_width, block_width, exact_tiles, opacity
+        )
+    if packed:
+        # culled and off screen gaussians hit no tile
+        indices = (outputs[5] > 0).nonzero().squeeze(-1)
+        outputs = tuple(x[indices] for x in outputs) + (indices,)
+    return outputs
+
+
+def _recount_tiles(
+    outputs,
+    img_height: int,
+    img_width: int,
+    block_width: int,
+    exact_tiles: bool,
+    opacity: Optional[Tensor],
+):
+    xys, depths, radii, conics, compensation, num_tiles_hit, cov3d = outputs
+    if opacity is not None:
+        radii = shrink_radii(
+            radii, conics, opacity.expand(*radii.shape, 1).reshape(radii.shape)
+        )
+    tile_bounds = (
+        (img_width + block_width - 1) // block_width,
+        (img_height + block_width - 1) // block_width,
+        1,
+    )
+    num_tiles_hit = compute_num_tiles_hit(
+        xys.reshape(-1, 2),
+        radii.reshape(-1),
+        conics.reshape(-1, 3),
+        tile_bounds,
+        block_width,
+        exact_tiles,
+    ).view(num_tiles_hit.shape)
+    return xys, depths, radii, conics, compensation, num_tiles_hit, cov3d
+
+
+def _inputs_to_float32(means3d: Tensor, scales: Tensor, quats: Tensor):
+    # the kernels project in float32, reduced precision quats are normalized again
+    # as they lose their unit norm in storage
+    if quats.dtype != torch.float32:
+        quats = F.normalize(to_float32(quats, "quats"), dim=-1)
+    return to_float32(means3d, "means3d"), to_float32(scales, "scales"), quats
+
+
+def project_gaussians_batch(
+    means3d: Float[Tensor, "*batch 3"],
+    scales: Float[Tensor, "*batch 3"],
+    glob_scale: float,
+    quats: Float[Tensor, "*batch 4"],
+    viewmats: Float[Tensor, "cameras 4 4"],
+    fx: Union[float, Float[Tensor, "cameras"]],
+    fy: Union[float, Float[Tensor, "cameras"]],
+    cx: Union[float, Float[Tensor, "cameras"]],
+    cy: Union[float, Float[Tensor, "cameras"]],
+    img_height: int,
+    img_width: int,
+    block_width: int,
+    clip_thresh: float = 0.01,
+    validate: bool = True,
+    exact_tiles: bool = False,
+    opacity: Optional[Float[Tensor, "*batch 1"]] = None,
+) -> Tuple[Tensor, Tensor, Tensor, Tensor, Tensor, Tensor, Tensor]:
+    """Projects 3D gaussians to 2D for several cameras, see :func:`gsplat.project_gaussians`.
+
+    The outputs are stacked along a leading camera dimension and can be rendered in one call with :func:`gsplat.rasterize_gaussians_batch`.
+
+    This is a convenience wrapper with no performance benefit over a loop: the projection kernel takes a single camera, so every camera is
+    projected by its own kernel launch and autograd node, and the outputs are then stacked. Only the rasterization of the cameras is batched.
+
+    Note:
+        This function is differentiable w.r.t the means3d, scales, quats and viewmats inputs,
+        the gradients of the gaussians are accumulated over the cameras.
+
+    Args:
+       means3d (Tensor): xyzs of gaussians.
+       scales (Tensor): scales of the gaussians.
+       glob_scale (float): A global scaling factor applied to the scene.
+       quats (Tensor): rotations in normalized quaternion [w,x,y,z] format.
+       viewmats (Tensor): view matrices of the cameras, of shape (cameras, 4, 4).
+       fx (Union[float, Tensor]): focal length x, shared or per camera.
+       fy (Union[float, Tensor]): focal length y, shared or per camera.
+       cx (Union[float, Tensor]): principal point x, shared or per camera.
+       cy (Union[float, Tensor]): principal point y, shared or per camera.
+       img_height (int): height of the rendered images.
+       img_width (int): width of the rendered images.
+       block_width (int): side length of tiles inside projection/rasterization in pixels (always square). 16 is a good default value, must be between 2 and 16 inclusive on the CUDA backend, see :func:`gsplat.autotune_block_width`.
+       clip_thresh (float): minimum z depth threshold.
+       validate (bool): check that the quats are normalized, see :func:`gsplat.project_gaussians`. Intrinsics given as tensors are read back on the host regardless, which synchronizes with their device, pass floats to avoid it.
+       exact_tiles (bool): only count the tiles overlapping the ellipse of each gaussian, see :func:`gsplat.project_gaussians`.
+       opacity (Optional[Tensor]): opacities the gaussians are rasterized with, shared or per camera, to cut the radii off, see :func:`gsplat.project_gaussians`.
+
+    Returns:
+        A tuple of {Tensor, Tensor, Tensor, Tensor, Tensor, Tensor, Tensor}, with the outputs of :func:`gsplat.project_gaussians` for each camera.
+    """
+    _C.check_block_width(block_width, means3d.device)
+    means3d, scales, quats = _inputs_to_float32(means3d, scales, quats)
+    if validate:
+        assert (quats.norm(dim=-1) - 1 < 1e-6).all(), "quats must be normalized"
+    if viewmats.ndimension() != 3 or viewmats.shape[1:] != (4, 4):
+        raise ValueError(f"Invalid shape for viewmats: {viewmats.shape}")
+    num_cameras = viewmats.shape[0]
+    # the intrinsics are passed to the kernels as floats
+    intrins = [
+        torch.as_tensor(x, dtype=torch.float64).expand(num_cameras).tolist()
+        for x in (fx, fy, cx, cy)
+    ]
+
+    means3d = means3d.contiguous()
+    scales = scales.contiguous()
+    quats = quats.contiguous()
+    viewmats = to_float32(viewmats, "viewmats").contiguous()
+    outputs = [
+        _ProjectGaussians.apply(
+            means3d,
+            scales,
+            glob_scale,
+            quats,
+            viewmats[i],
+            *(x[i] for x in intrins),
+            img_height,
+            img_width,
+            block_width,
+            clip_thresh,
+        )
+        for i in range(num_cameras)
+    ]
+    outputs = tuple(torch.stack(x) for x in zip(*outputs))
+    if exact_tiles or opacity is not None:
+        outputs = _recount_tiles(
+            outputs, img_height, img_width, block_width, exact_tiles, opacity
+        )
+    return outputs
 
 
 class _ProjectGaussians(Function):
@@ -1,15 +1,17 @@
 """Python bindings for custom Cuda functions"""
 
-from typing import Optional
+from typing import Optional, Tuple
 
 import torch
+import torch.nn.functional as F
 from jaxtyping import Float, Int
 from torch import Tensor
 from torch.autograd import Function
 
-import gsplat.cuda as _C
+import gsplat.backend as _C
 
-from .utils import bin_and_sort_gaussians, compute_cumulative_intersects
+from .utils import bin_and_sort_gaussians, compute_cumulative_intersects, to_float32
+from .workspace import Workspace
 
 
 def rasterize_gaussians(
@@ -25,11 +27,19 @@ def rasterize_gaussians(
     block_width: int,
     background: Optional[Float[Tensor, "channels"]] = None,
     return_alpha: Optional[bool] = False,
+    max_intersects: Optional[int] = None,
+    workspace: Optional[Workspace] = None,
+    sort_mode: str = "global",
+    exact_tiles: bool = False,
+    indices: Optional[Int[Tensor, "num_visible"]] = None,
+    recompute_bins: bool = False,
 ) -> Tensor:
     """Rasterizes 2D gaussians by sorting and binning gaussian intersections for each tile and returns an N-dimensional output using alpha-compositing.
 
     Note:
         This function is differentiable w.r.t the xys, conics, colors, and opacity inputs.
+        Inputs stored in float16 or bfloat16 are converted to float32, which the image is composited and the gradients are accumulated in,
+        and their gradients are returned in the storage dtype, see :func:`gsplat.to_float32`.
 
     Args:
         xys (Tensor): xy coords of 2D gaussians.
@@ -37,24 +47,41 @@ def rasterize_gaussians(
         radii (Tensor): radii of 2D gaussians
         conics (Tensor): conics (inverse of covariance) of 2D gaussians in upper triangular format
         num_tiles_hit (Tensor): number of tiles hit per gaussian
-        colors (Tensor): N-dimensional features associated with the gaussians.
-        opacity (Tensor): opacity associated with the gaussians.
+        colors (Tensor): N-dimensional features associated with the gaussians, in float32, float16, bfloat16 or uint8 mapped to [0, 1].
+        opacity (Tensor): opacity associated with the gaussians, in the same dtypes as colors.
         img_height (int): height of the rendered image.
         img_width (int): width of the rendered image.
-        block_width (int): MUST match whatever block width was used in the project_gaussians call. integer number of pixels between 2 and 16 inclusive
+        block_width (int): MUST match whatever block width was used in the project_gaussians call. integer number of pixels, between 2 and 16 inclusive on the CUDA backend
         background (Tensor): background color
         return_alpha (bool): whether to return alpha channel
+        max_intersects (Optional[int]): capacity of the intersection buffers. When set, the number of intersections stays on the device so that rendering does not synchronize with the host, and the gaussians whose intersections do not fit are dropped.
+        workspace (Optional[Workspace]): workspace reusing the buffers of the binning stage across calls, see :class:`gsplat.Workspace`.
+        sort_mode (str): strategy used to sort the intersections by tile and depth, one of "global", "compact" or "depth", see :func:`gsplat.bin_and_sort_gaussians`.
+        exact_tiles (bool): only intersect the tiles overlapping the ellipse of each gaussian. num_tiles_hit must come from :func:`gsplat.project_gaussians` with exact_tiles as well.
+        indices (Optional[Tensor]): indices returned by :func:`gsplat.project_gaussians` with packed. The projected inputs are then packed, while colors and opacity hold all the gaussians and receive their gradients at these indices.
+        recompute_bins (bool): free the sorted intersections after the forward pass and bin the gaussians again in the backward pass, which lowers the memory kept between the passes at the cost of a second binning and sort.
 
     Returns:
         A Tensor:
 
         - **out_img** (Tensor): N-dimensional rendered output image.
         - **out_alpha** (Optional[Tensor]): Alpha channel of the rendered output image.
+        - **num_intersects** (Optional[Tensor]): number of intersections needed to render every gaussian, returned on the device when max_intersects is set. The output is incomplete when it exceeds max_intersects.
     """
-    assert block_width > 1 and block_width <= 16, "block_width must be between 2 and 16"
-    if colors.dtype == torch.uint8:
-        # make sure colors are float [0,1]
-        colors = colors.float() / 255
+    _C.check_block_width(block_width, xys.device)
+    assert (
+        max_intersects is None or max_intersects > 0
+    ), "max_intersects must be positive"
+    if indices is not None:
+        # autograd scatters the gradients back to all the gaussians
+        colors = colors[indices]
+        opacity = opacity[indices]
+    # the kernels composite in float32
+    colors = to_float32(colors, "colors", allow_uint8=True)
+    opacity = to_float32(opacity, "opacity", allow_uint8=True)
+    xys = to_float32(xys, "xys")
+    conics = to_float32(conics, "conics")
+    depths = to_float32(depths, "depths")
 
     if background is not None:
         assert (
@@ -84,9 +111,174 @@ def rasterize_gaussians(
         block_width,
         background.contiguous(),
         return_alpha,
+        max_intersects,
+        workspace,
+        sort_mode,
+        exact_tiles,
+        1,
+        recompute_bins,
     )
 
 
+def rasterize_gaussians_batch(
+    xys: Float[Tensor, "cameras batch 2"],
+    depths: Float[Tensor, "cameras batch"],
+    radii: Float[Tensor, "cameras batch"],
+    conics: Float[Tensor, "cameras batch 3"],
+    num_tiles_hit: Int[Tensor, "cameras batch"],
+    colors: Float[Tensor, "*cameras batch channels"],
+    opacity: Float[Tensor, "*cameras batch 1"],
+    img_height: int,
+    img_width: int,
+    block_width: int,
+    background: Optional[Float[Tensor, "channels"]] = None,
+    return_alpha: Optional[bool] = False,
+    max_intersects: Optional[int] = None,
+    workspace: Optional[Workspace] = None,
+    sort_mode: str = "global",
+    exact_tiles: bool = False,
+    recompute_bins: bool = False,
+) -> Tensor:
+    """Rasterizes the 2D gaussians of several cameras in a single call.
+
+    The intersections of all the cameras are binned and sorted together, with the camera index folded into the tile id of the sort key,
+    and rasterized as one image where the cameras are stacked vertically.
+
+    Note:
+        This function is differentiable w.r.t the xys, conics, colors, and opacity inputs.
+
+    Args:
+        xys (Tensor): xy coords of 2D gaussians for each camera, as returned by :func:`gsplat.project_gaussians_batch`.
+        depths (Tensor): depths of 2D gaussians for each camera.
+        radii (Tensor): radii of 2D gaussians for each camera.
+        conics (Tensor): conics (inverse of covariance) of 2D gaussians for each camera in upper triangular format
+        num_tiles_hit (Tensor): number of tiles hit per gaussian for each camera
+        colors (Tensor): N-dimensional features associated with the gaussians, either shared by all cameras or given per camera.
+        opacity (Tensor): opacity associated with the gaussians, either shared by all cameras or given per camera.
+        img_height (int): height of the rendered images.
+        img_width (int): width of the rendered images.
+        block_width (int): MUST match whatever block width was used in the project_gaussians_batch call. integer number of pixels, between 2 and 16 inclusive on the CUDA backend
+        background (Tensor): background color
+        return_alpha (bool): whether to return alpha channel
+        max_intersects (Optional[int]): capacity of the intersection buffers shared by all the cameras, see :func:`gsplat.rasterize_gaussians`.
+        workspace (Optional[Workspace]): workspace reusing the buffers of the binning stage across calls.
+        sort_mode (str): strategy used to sort the intersections, see :func:`gsplat.bin_and_sort_gaussians`.
+        exact_tiles (bool): only intersect the tiles overlapping the ellipse of each gaussian, see :func:`gsplat.rasterize_gaussians`.
+        recompute_bins (bool): bin the gaussians again in the backward pass instead of keeping the sorted intersections, see :func:`gsplat.rasterize_gaussians`.
+
+    Returns:
+        A Tensor:
+
+        - **out_img** (Tensor): N-dimensional rendered output images of shape (cameras, height, width, channels).
+        - **out_alpha** (Optional[Tensor]): Alpha channel of the rendered output images.
+        - **num_intersects** (Optional[Tensor]): number of intersections needed to render every gaussian, returned when max_intersects is set.
+    """
+    _C.check_block_width(block_width, xys.device)
+    assert (
+        max_intersects is None or max_intersects > 0
+    ), "max_intersects must be positive"
+    if xys.ndimension() != 3 or xys.size(2) != 2:
+        raise ValueError("xys must have dimensions (C, N, 2)")
+    num_cameras, num_points = xys.shape[:2]
+    # the kernels composite in float32
+    colors = to_float32(colors, "colors", allow_uint8=True)
+    opacity = to_float32(opacity, "opacity", allow_uint8=True)
+    xys = to_float32(xys, "xys")
+    conics = to_float32(conics, "conics")
+    depths = to_float32(depths, "depths")
+    if colors.ndimension() == 2:
+        colors = colors.expand(num_cameras, -1, -1)
+    if opacity.ndimension() == 2:
+        opacity = opacity.expand(num_cameras, -1, -1)
+    if colors.shape[:2] != (num_cameras, num_points):
+        raise ValueError("colors must have dimensions (N, D) or (C, N, D)")
+    if opacity.shape[:2] != (num_cameras, num_points):
+        raise ValueError("opacity must have dimensions (N, 1) or (C, N, 1)")
+
+    if background is not None:
+        assert (
+            background.shape[0] == colors.shape[-1]
+        ), f"incorrect shape of background color tensor, expected shape {colors.shape[-1]}"
+    else:
+        background = torch.ones(
+            colors.shape[-1], dtype=torch.float32, device=colors.device
+        )
+
+    out = _RasterizeGaussians.apply(
+        xys.reshape(-1, 2),
+        depths.reshape(-1),
+        radii.reshape(-1),
+        conics.reshape(-1, 3),
+        num_tiles_hit.reshape(-1),
+        colors.reshape(num_cameras * num_points, -1),
+        opacity.reshape(num_cameras * num_points, -1),
+        img_height,
+        img_width,
+        block_width,
+        background.contiguous(),
+        return_alpha,
+        max_intersects,
+        workspace,
+        sort_mode,
+        exact_tiles,
+        num_cameras,
+        recompute_bins,
+    )
+    if num_cameras > 1:
+        return out
+    # a single camera renders without padding, add the camera dimension back
+    if not isinstance(out, tuple):
+        return out[None]
+    if return_alpha:
+        return (out[0][None], out[1][None], *out[2:])
+    return (out[0][None], *out[1:])
+
+
+def _bin_gaussians(
+    xys: Tensor,
+    depths: Tensor,
+    radii: Tensor,
+    conics: Optional[Tensor],
+    cum_tiles_hit: Tensor,
+    num_intersects: int,
+    tile_bounds: Tuple[int, int, int],
+    block_width: int,
+    num_cameras: int,
+    static_capacity: bool,
+    workspace: Optional[Workspace],
+    sort_mode: str,
+) -> Tuple[Tensor, Tensor]:
+    outputs = bin_and_sort_gaussians(
+        xys.size(0),
+        num_intersects,
+        xys,
+        depths,
+        radii,
+        cum_tiles_hit,
+        tile_bounds,
+        block_width,
+        num_cameras,
+        static_capacity=static_capacity,
+        workspace=workspace,
+        sort_mode=sort_mode,
+        conics=conics,
+    )
+    # gaussian_ids_sorted, tile_bins
+    return outputs[3], outputs[4]
+
+
+def _offset_cameras(xys: Tensor, num_cameras: int, render_height: int) -> Tensor:
+    if num_cameras == 1:
+        return xys
+    # move the gaussians of each camera to its rows of the image
+    xys = xys.clone()
+    xys.view(num_cameras, -1, 2)[..., 1] += (
+        torch.arange(num_cameras, device=xys.device)[:, None]
+        * (render_height // num_cameras)
+    )
+    return xys
+
+
 class _RasterizeGaussians(Function):
     """Rasterizes 2D gaussians"""
 
@@ -105,56 +297,76 @@ class _RasterizeGaussians(Function):
         block_width: int,
         background: Float[Tensor, "channels"],
         return_alpha: Optional[bool] = False,
+        max_intersects: Optional[int] = None,
+        workspace: Optional[Workspace] = None,
+        sort_mode: str = "global",
+        exact_tiles: bool = False,
+        num_cameras: int = 1,
+        recompute_bins: bool = False,
     ) -> Tensor:
-        num_points = xys.size(0)
         tile_bounds = (
             (img_width + block_width - 1) // block_width,
             (img_height + block_width - 1) // block_width,
             1,
         )
         block = (block_width, block_width, 1)
-        img_size = (img_width, img_height, 1)
 
-        num_intersects, cum_tiles_hit = compute_cumulative_intersects(num_tiles_hit)
+        # several cameras are rendered as a single image, stacked vertically
+        # and padded to whole tiles so that every tile belongs to one camera
+        render_height = img_height
+        if num_cameras > 1:
+            render_height = num_cameras * tile_bounds[1] * block_width
+        img_size = (img_width, render_height, 1)
 
+        if max_intersects is None:
+            num_intersects, cum_tiles_hit = compute_cumulative_intersects(
+                num_tiles_hit, workspace
+            )
+        else:
+            # bin into buffers of fixed size, without reading the count back
+            cum_tiles_hit = torch.cumsum(num_tiles_hit, dim=0, dtype=torch.int32)
+            num_intersects = max_intersects
+
+        xys_rendered = xys
         if num_intersects < 1:
             out_img = (
-                torch.ones(img_height, img_width, colors.shape[-1], device=xys.device)
+                torch.ones(
+                    render_height, img_width, colors.shape[-1], device=xys.device
+                )
                 * background
             )
             gaussian_ids_sorted = torch.zeros(0, 1, device=xys.device)
             tile_bins = torch.zeros(0, 2, device=xys.device)
-            final_Ts = torch.zeros(img_height, img_width, device=xys.device)
-            final_idx = torch.zeros(img_height, img_width, device=xys.device)
+            final_Ts = torch.zeros(render_height, img_width, device=xys.device)
+            final_idx = torch.zeros(render_height, img_width, device=xys.device)
         else:
-            (
-                isect_ids_unsorted,
-                gaussian_ids_unsorted,
-                isect_ids_sorted,
-                gaussian_ids_sorted,
-                tile_bins,
-            ) = bin_and_sort_gaussians(
-                num_points,
-                num_intersects,
+            gaussian_ids_sorted, tile_bins = _bin_gaussians(
                 xys,
                 depths,
                 radii,
+                conics if exact_tiles else None,
                 cum_tiles_hit,
+                num_intersects,
                 tile_bounds,
                 block_width,
+                num_cameras,
+                max_intersects is not None,
+                workspace,
+                sort_mode,
             )
+            xys_rendered = _offset_cameras(xys, num_cameras, render_height)
             if colors.shape[-1] == 3:
                 rasterize_fn = _C.rasterize_forward
             else:
                 rasterize_fn = _C.nd_rasterize_forward
 
             out_img, final_Ts, final_idx = rasterize_fn(
-                tile_bounds,
+                (tile_bounds[0], num_cameras * tile_bounds[1], 1),
                 block,
                 img_size,
                 gaussian_ids_sorted,
                 tile_bins,
-                xys,
+                xys_rendered,
                 conics,
                 colors,
                 opacity,
@@ -163,46 +375,121 @@ class _RasterizeGaussians(Function):
 
         ctx.img_width = img_width
         ctx.img_height = img_height
+        ctx.render_height = render_height
+        ctx.num_cameras = num_cameras
         ctx.num_intersects = num_intersects
+        ctx.return_alpha = return_alpha
         ctx.block_width = block_width
-        ctx.save_for_backward(
-            gaussian_ids_sorted,
-            tile_bins,
-            xys,
-            conics,
-            colors,
-            opacity,
-            background,
-            final_Ts,
-            final_idx,
-        )
+        ctx.recompute_bins = recompute_bins and num_intersects >= 1
+        if ctx.recompute_bins:
+            # keep the inputs of the binning rather than its outputs, which grow
+            # with the number of intersections
+            ctx.binning = (
+                tile_bounds,
+                max_intersects is not None,
+                sort_mode,
+                exact_tiles,
+            )
+            ctx.save_for_backward(
+                depths,
+                radii,
+                num_tiles_hit,
+                xys,
+                conics,
+                colors,
+                opacity,
+                background,
+                final_Ts,
+                final_idx,
+            )
+        else:
+            ctx.save_for_backward(
+                gaussian_ids_sorted,
+                tile_bins,
+                xys_rendered,
+                conics,
+                colors,
+                opacity,
+                background,
+                final_Ts,
+                final_idx,
+            )
+
+        if num_cameras > 1:
+            out_img = out_img.view(num_cameras, -1, img_width, colors.shape[-1])
+            out_img = out_img[:, :img_height]
+            final_Ts = final_Ts.view(num_cameras, -1, img_width)[:, :img_height]
 
+        outputs = (out_img,)
         if return_alpha:
             out_alpha = 1 - final_Ts
-            return out_img, out_alpha
-        else:
-            return out_img
+            outputs += (out_alpha,)
+        if max_intersects is not None:
+            num_intersects_needed = cum_tiles_hit[-1]
+            ctx.mark_non_differentiable(num_intersects_needed)
+            outputs += (num_intersects_needed,)
+        return outputs if len(outputs) > 1 else out_img
 
     @staticmethod
-    def backward(ctx, v_out_img, v_out_alpha=None):
+    def backward(ctx, v_out_img, *v_outputs):
         img_height = ctx.img_height
         img_width = ctx.img_width
         num_intersects = ctx.num_intersects
 
+        v_out_alpha = v_outputs[0] if ctx.return_alpha else None
         if v_out_alpha is None:
             v_out_alpha = torch.zeros_like(v_out_img[..., 0])
 
-        (
-            gaussian_ids_sorted,
-            tile_bins,
-            xys,
-            conics,
-            colors,
-            opacity,
-            background,
-            final_Ts,
-            final_idx,
-        ) = ctx.saved_tensors
+        if ctx.num_cameras > 1:
+            # the padding rows of the stacked image get no gradient
+            pad = ctx.render_height // ctx.num_cameras - img_height
+            v_out_img = F.pad(v_out_img, (0, 0, 0, 0, 0, pad))
+            v_out_img = v_out_img.reshape(ctx.render_height, img_width, -1)
+            v_out_alpha = F.pad(v_out_alpha, (0, 0, 0, pad))
+            v_out_alpha = v_out_alpha.reshape(ctx.render_height, img_width)
+
+        if ctx.recompute_bins:
+            (
+                depths,
+                radii,
+                num_tiles_hit,
+                xys,
+                conics,
+                colors,
+                opacity,
+                background,
+                final_Ts,
+                final_idx,
+            ) = ctx.saved_tensors
+            tile_bounds, static_capacity, sort_mode, exact_tiles = ctx.binning
+            # the same inputs give the same intersections as the forward pass
+            gaussian_ids_sorted, tile_bins = _bin_gaussians(
+                xys,
+                depths,
+                radii,
+                conics if exact_tiles else None,
+                torch.cumsum(num_tiles_hit, dim=0, dtype=torch.int32),
+                num_intersects,
+                tile_bounds,
+                ctx.block_width,
+                ctx.num_cameras,
+                static_capacity,
+                None,
+                sort_mode,
+            )
+            xys = _offset_cameras(xys, ctx.num_cameras, ctx.render_height)
+        else:
+            (
+                gaussian_ids_sorted,
+                tile_bins,
+                xys,
+                conics,
+                colors,
+                opacity,
+                background,
+                final_Ts,
+                final_idx,
+            ) = ctx.saved_tensors
 
         if num_intersects < 1:
             v_xy = torch.zeros_like(xys)
@@ -217,7 +504,7 @@ class _RasterizeGaussians(Function):
             else:
                 rasterize_fn = _C.nd_rasterize_backward
             v_xy, v_xy_abs, v_conic, v_colors, v_opacity = rasterize_fn(
-                img_height,
+                ctx.render_height,
                 img_width,
                 ctx.block_width,
                 gaussian_ids_sorted,
@@ -256,4 +543,10 @@ class _RasterizeGaussians(Function):
             None,  # block_width
             v_background,  # background
             None,  # return_alpha
+            None,  # max_intersects
+            None,  # workspace
+            None,  # sort_mode
+            None,  # exact_tiles
+            None,  # num_cameras
+            None,  # recompute_bins
         )
@@ -0,0 +1,363 @@
+"""Python bindings for the fused rendering of 3D gaussians"""
+
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import torch
+from jaxtyping import Float
+from torch import Tensor
+from torch.autograd import Function
+
+import gsplat.backend as _C
+
+from .sh import deg_from_sh
+from .utils import bin_and_sort_gaussians, compute_cumulative_intersects
+
+
+def render(
+    means3d: Float[Tensor, "*batch 3"],
+    scales: Float[Tensor, "*batch 3"],
+    quats: Float[Tensor, "*batch 4"],
+    colors: Float[Tensor, "*batch ..."],
+    opacities: Float[Tensor, "*batch 1"],
+    viewmat: Float[Tensor, "4 4"],
+    fx: float,
+    fy: float,
+    cx: float,
+    cy: float,
+    img_height: int,
+    img_width: int,
+    block_width: int,
+    glob_scale: float = 1.0,
+    sh_degree: Optional[int] = None,
+    background: Optional[Float[Tensor, "channels"]] = None,
+    return_alpha: bool = False,
+    return_stats: bool = False,
+    clip_thresh: float = 0.01,
+) -> Tensor:
+    """Renders 3D gaussians from their raw parameters in a single autograd node.
+
+    The quaternions are normalized, the opacities and the colors go through a sigmoid, or colors of shape (N, D, C) are evaluated as
+    SH coefficients for the view direction of each gaussian, offset by 0.5 and clamped to be non negative. The gaussians are then projected,
+    binned and rasterized as with :func:`gsplat.project_gaussians` and :func:`gsplat.rasterize_gaussians`.
+
+    Separate autograd nodes keep the activated parameters and the projected gaussians alive for the backward pass. The fused node only
+    keeps the sorted intersections and the per pixel state of the rasterizer, and recomputes the activations and the projection in the
+    backward pass, which costs one more projection and SH evaluation per step.
+
+    Note:
+        This function is differentiable w.r.t the means3d, scales, quats, colors, opacities and background inputs.
+        The scales are used as is, and the view matrix gets no gradient.
+
+    Args:
+        means3d (Tensor): xyzs of gaussians.
+        scales (Tensor): scales of the gaussians.
+        quats (Tensor): rotations in quaternion [w,x,y,z] format, normalized by the function.
+        colors (Tensor): colors of the gaussians before the sigmoid, of shape (N, C), or SH coefficients of shape (N, D, C).
+        opacities (Tensor): opacities of the gaussians before the sigmoid, of shape (N, 1).
+        viewmat (Tensor): view matrix for rendering.
+        fx (float): focal length x.
+        fy (float): focal length y.
+        cx (float): principal point x.
+        cy (float): principal point y.
+        img_height (int): height of the rendered image.
+        img_width (int): width of the rendered image.
+        block_width (int): side length of tiles inside projection/rasterization in pixels, see :func:`gsplat.project_gaussians`.
+        glob_scale (float): A global scaling factor applied to the scene.
+        sh_degree (Optional[int]): degree of SHs to use for SH coefficients, all of them by default.
+        background (Optional[Tensor]): background color
+        return_alpha (bool): whether to return alpha channel
+        return_stats (bool): whether to return the bytes kept for the backward pass.
+        clip_thresh (float): minimum z depth threshold.
+
+    Returns:
+        A Tensor:
+
+        - **out_img** (Tensor): N-dimensional rendered output image.
+        - **out_alpha** (Optional[Tensor]): Alpha channel of the rendered output image.
+        - **stats** (Optional[Dict]): with return_stats, the bytes "saved_bytes" kept for the backward pass by the fused node,
+          the bytes "unfused_saved_bytes" kept by separate projection, activation and rasterization nodes, and their difference "bytes_saved".
+    """
+    _C.check_block_width(block_width, means3d.device)
+    if means3d.ndimension() != 2 or means3d.shape[-1] != 3:
+        raise ValueError(f"Invalid shape for means3d: {means3d.shape}")
+    if colors.ndimension() == 2:
+        sh_degree = None
+    elif colors.ndimension() == 3:
+        if sh_degree is None:
+            sh_degree = deg_from_sh(colors.shape[-2])
+    else:
+        raise ValueError("colors must have dimensions (N, C) or (N, D, C)")
+    if background is None:
+        background = torch.ones(
+            colors.shape[-1], dtype=torch.float32, device=means3d.device
+        )
+
+    stats = {}
+    outputs = _Render.apply(
+        means3d.contiguous(),
+        scales.contiguous(),
+        quats.contiguous(),
+        colors.contiguous(),
+        opacities.contiguous(),
+        viewmat.contiguous(),
+        background.contiguous(),
+        _Settings(
+            glob_scale, fx, fy, cx, cy, img_height, img_width, block_width, clip_thresh
+        ),
+        sh_degree,
+        stats,
+    )
+    out_img, final_Ts = outputs
+    outputs = (out_img,)
+    if return_alpha:
+        outputs += (1 - final_Ts,)
+    if return_stats:
+        outputs += (stats,)
+    return outputs if len(outputs) > 1 else out_img
+
+
+class _Settings(NamedTuple):
+    glob_scale: float
+    fx: float
+    fy: float
+    cx: float
+    cy: float
+    img_height: int
+    img_width: int
+    block_width: int
+    clip_thresh: float
+
+
+def _activate(means3d, scales, quats, colors, opacities, viewmat, settings, sh_degree):
+    # activations and projection, run again in the backward pass
+    quats = quats / quats.norm(dim=-1, keepdim=True)
+    projected = _C.project_gaussians_forward(
+        means3d.shape[0],
+        means3d,
+        scales,
+        settings.glob_scale,
+        quats,
+        viewmat,
+        *settings[1:],
+    )
+    viewdirs = None
+    if sh_degree is None:
+        colors = torch.sigmoid(colors)
+    else:
+        viewdirs = means3d - torch.inverse(viewmat)[:3, 3]
+        colors = _C.compute_sh_forward(
+            "fast",
+            means3d.shape[0],
+            deg_from_sh(colors.shape[-2]),
+            sh_degree,
+            viewdirs,
+            colors,
+        )
+        colors = torch.clamp_min(colors + 0.5, 0.0)
+    return quats, projected, viewdirs, colors, torch.sigmoid(opacities)
+
+
+def _num_bytes(*tensors: Optional[Tensor]) -> int:
+    return sum(x.numel() * x.element_size() for x in tensors if x is not None)
+
+
+class _Render(Function):
+    """Projects, shades and rasterizes 3D gaussians."""
+
+    @staticmethod
+    def forward(
+        ctx,
+        means3d: Float[Tensor, "*batch 3"],
+        scales: Float[Tensor, "*batch 3"],
+        quats: Float[Tensor, "*batch 4"],
+        colors: Float[Tensor, "*batch ..."],
+        opacities: Float[Tensor, "*batch 1"],
+        viewmat: Float[Tensor, "4 4"],
+        background: Float[Tensor, "channels"],
+        settings: _Settings,
+        sh_degree: Optional[int],
+        stats: Dict[str, int],
+    ) -> Tuple[Tensor, Tensor]:
+        img_height, img_width = settings.img_height, settings.img_width
+        block_width = settings.block_width
+        quats_n, projected, viewdirs, rgbs, alphas = _activate(
+            means3d, scales, quats, colors, opacities, viewmat, settings, sh_degree
+        )
+        cov3d, xys, depths, radii, conics, compensation, num_tiles_hit = projected
+        tile_bounds = (
+            (img_width + block_width - 1) // block_width,
+            (img_height + block_width - 1) // block_width,
+            1,
+        )
+        num_intersects, cum_tiles_hit = compute_cumulative_intersects(num_tiles_hit)
+        if num_intersects < 1:
+            out_img = (
+                torch.ones(img_height, img_width, rgbs.shape[-1], device=xys.device)
+                * background
+            )
+            gaussian_ids_sorted = torch.zeros(0, 1, device=xys.device)
+            tile_bins = torch.zeros(0, 2, device=xys.device)
+            final_Ts = torch.ones(img_height, img_width, device=xys.device)
+            final_idx = torch.zeros(img_height, img_width, device=xys.device)
+        else:
+            _, _, _, gaussian_ids_sorted, tile_bins = bin_and_sort_gaussians(
+                means3d.shape[0],
+                num_intersects,
+                xys,
+                depths,
+                radii,
+                cum_tiles_hit,
+                tile_bounds,
+                block_width,
+            )
+            if rgbs.shape[-1] == 3:
+                rasterize_fn = _C.rasterize_forward
+            else:
+                rasterize_fn = _C.nd_rasterize_forward
+            out_img, final_Ts, final_idx = rasterize_fn(
+                tile_bounds,
+                (block_width, block_width, 1),
+                (img_width, img_height, 1),
+                gaussian_ids_sorted,
+                tile_bins,
+                xys,
+                conics,
+                rgbs,
+                alphas,
+                background,
+            )
+
+        ctx.settings = settings
+        ctx.sh_degree = sh_degree
+        ctx.num_intersects = num_intersects
+        # the inputs are kept by their owners, only the binning and the state of
+        # the rasterizer are kept for the backward pass
+        ctx.save_for_backward(
+            means3d,
+            scales,
+            quats,
+            colors,
+            opacities,
+            viewmat,
+            background,
+            gaussian_ids_sorted,
+            tile_bins,
+            final_Ts,
+            final_idx,
+        )
+
+        saved_bytes = _num_bytes(gaussian_ids_sorted, tile_bins, final_Ts, final_idx)
+        # tensors kept by separate projection, activation and rasterization nodes
+        intermediate_bytes = _num_bytes(
+            quats_n, cov3d, radii, conics, compensation, xys, viewdirs, rgbs, alphas
+        )
+        stats["saved_bytes"] = saved_bytes
+        stats["unfused_saved_bytes"] = saved_bytes + intermediate_bytes
+        stats["bytes_saved"] = intermediate_bytes
+        return out_img, final_Ts
+
+    @staticmethod
+    def backward(ctx, v_out_img, v_final_Ts):
+        (
+            means3d,
+            scales,
+            quats,
+            colors,
+            opacities,
+            viewmat,
+            background,
+            gaussian_ids_sorted,
+            tile_bins,
+            final_Ts,
+            final_idx,
+        ) = ctx.saved_tensors
+        settings = ctx.settings
+        img_height, img_width = settings.img_height, settings.img_width
+        quats_n, projected, viewdirs, rgbs, alphas = _activate(
+            means3d, scales, quats, colors, opacities, viewmat, settings, ctx.sh_degree
+        )
+        cov3d, xys, depths, radii, conics, compensation, _ = projected
+
+        # out_alpha is 1 - final_Ts
+        v_out_alpha = -v_final_Ts
+        if ctx.num_intersects < 1:
+            v_xy = torch.zeros_like(xys)
+            v_conic = torch.zeros_like(conics)
+            v_rgbs = torch.zeros_like(rgbs)
+            v_alphas = torch.zeros_like(alphas)
+        else:
+            if rgbs.shape[-1] == 3:
+                rasterize_fn = _C.rasterize_backward
+            else:
+                rasterize_fn = _C.nd_rasterize_backward
+            v_xy, _, v_conic, v_rgbs, v_alphas = rasterize_fn(
+                img_height,
+                img_width,
+                settings.block_width,
+                gaussian_ids_sorted,
+                tile_bins,
+                xys,
+                conics,
+                rgbs,
+                alphas,
+                background,
+                final_Ts,
+                final_idx,
+                v_out_img,
+                v_out_alpha,
+            )
+
+        v_opacities = v_alphas * alphas * (1 - alphas)
+        if ctx.sh_degree is None:
+            v_colors = v_rgbs * rgbs * (1 - rgbs)
+        else:
+            # rgbs were clamped at 0
+            v_colors = _C.compute_sh_backward(
+                "fast",
+                means3d.shape[0],
+                deg_from_sh(colors.shape[-2]),
+                ctx.sh_degree,
+                viewdirs,
+                v_rgbs * (rgbs > 0),
+            )
+
+        _, _, v_means3d, v_scales, v_quats_n = _C.project_gaussians_backward(
+            means3d.shape[0],
+            means3d,
+            scales,
+            settings.glob_scale,
+            quats_n,
+            viewmat,
+            *settings[1:7],
+            cov3d,
+            radii,
+            conics,
+            compensation,
+            v_xy,
+            torch.zeros_like(depths),
+            v_conic,
+            torch.zeros_like(compensation),
+        )
+        # backward of the normalization of the quaternions
+        v_quats = (
+            v_quats_n - quats_n * (quats_n * v_quats_n).sum(dim=-1, keepdim=True)
+        ) / quats.norm(dim=-1, keepdim=True)
+
+        v_background = None
+        if background.requires_grad:
+            v_background = torch.matmul(
+                v_out_img.reshape(-1, v_out_img.shape[-1]).t(), final_Ts.view(-1, 1)
+            ).squeeze(-1)
+
+        return (
+            v_means3d,  # means3d
+            v_scales,  # scales
+            v_quats,  # quats
+            v_colors,  # colors
+            v_opacities,  # opacities
+            None,  # viewmat
+            v_background,  # background
+            None,  # settings
+            None,  # sh_degree
+            None,  # stats
+        )
@@ -1,11 +1,16 @@
 """Python bindings for SH"""
 
-import gsplat.cuda as _C
+import gsplat.backend as _C
 
-from jaxtyping import Float
+import torch
+import torch.nn.functional as F
+from jaxtyping import Float, Int
 from torch import Tensor
 from torch.autograd import Function
-from typing import Literal
+from typing import Literal, Optional, Tuple
+
+from . import _torch_impl
+from .utils import to_float32
 
 
 def num_sh_bases(degree: int):
@@ -39,6 +44,7 @@ def spherical_harmonics(
     viewdirs: Float[Tensor, "*batch 3"],
     coeffs: Float[Tensor, "*batch D C"],
     method: Literal["poly", "fast"] = "fast",
+    degrees: Optional[Int[Tensor, "*batch"]] = None,
 ) -> Float[Tensor, "*batch C"]:
     """Compute spherical harmonics
 
@@ -48,18 +54,148 @@ def spherical_harmonics(
     Args:
         degrees_to_use (int): degree of SHs to use (<= total number available).
         viewdirs (Tensor): viewing directions.
-        coeffs (Tensor): harmonic coefficients.
+        coeffs (Tensor): harmonic coefficients, in float32, float16 or bfloat16. The colors are evaluated in float32 and the gradients are returned in the dtype of coeffs.
+        degrees (Optional[Tensor]): SH degree of each gaussian. When given, coeffs holds the packed coefficients of shape (M, C) returned by :func:`gsplat.pack_sh_coeffs`, and each gaussian uses up to min(degree, degrees_to_use). The forward and backward passes skip the bands a gaussian does not have.
 
     Returns:
         The spherical harmonics.
     """
-    assert coeffs.shape[-2] >= num_sh_bases(degrees_to_use)
     assert method in ["poly", "fast"]
+    # the colors are evaluated in float32
+    viewdirs = to_float32(viewdirs, "viewdirs")
+    coeffs = to_float32(coeffs, "coeffs")
+    if degrees is not None:
+        if coeffs.ndimension() != 2:
+            raise ValueError("packed coeffs must have dimensions (M, C)")
+        return _PackedSphericalHarmonics.apply(
+            method,
+            degrees_to_use,
+            viewdirs.contiguous(),
+            coeffs.contiguous(),
+            degrees.contiguous(),
+        )
+    assert coeffs.shape[-2] >= num_sh_bases(degrees_to_use)
     return _SphericalHarmonics.apply(
         method, degrees_to_use, viewdirs.contiguous(), coeffs.contiguous()
     )
 
 
+def _packed_offsets(degrees: Tensor) -> Tensor:
+    num_bases = (degrees.long() + 1) ** 2
+    return torch.cumsum(num_bases, dim=0) - num_bases
+
+
+def _packed_mask(degrees: Tensor, num_bases: int) -> Tensor:
+    bases = torch.arange(num_bases, device=degrees.device)
+    return bases < ((degrees.long() + 1) ** 2)[:, None]
+
+
+def pack_sh_coeffs(
+    coeffs: Float[Tensor, "*batch D C"], degrees: Int[Tensor, "*batch"]
+) -> Float[Tensor, "packed C"]:
+    """Packs the SH coefficients of each gaussian up to its degree.
+
+    The packed layout stores the (degree + 1)^2 coefficients of each gaussian one
+    after the other, so gaussians of low degree do not hold the coefficients of the
+    highest one.
+
+    Args:
+        coeffs (Tensor): dense harmonic coefficients of shape (N, D, C).
+        degrees (Tensor): SH degree of each gaussian, at most the degree of coeffs.
+
+    Returns:
+        The packed coefficients of shape (M, C), with M the total number of bases.
+    """
+    assert (degrees <= deg_from_sh(coeffs.shape[-2])).all(), "degrees too high"
+    return coeffs[_packed_mask(degrees, coeffs.shape[-2])]
+
+
+def unpack_sh_coeffs(
+    coeffs: Float[Tensor, "packed C"],
+    degrees: Int[Tensor, "*batch"],
+    degree: Optional[int] = None,
+) -> Float[Tensor, "*batch D C"]:
+    """Unpacks SH coefficients to a dense tensor, the absent bands are zero.
+
+    Args:
+        coeffs (Tensor): packed harmonic coefficients of shape (M, C).
+        degrees (Tensor): SH degree of each gaussian.
+        degree (Optional[int]): degree of the dense tensor, the largest of degrees by
+            default.
+
+    Returns:
+        The dense coefficients of shape (N, D, C).
+    """
+    if degree is None:
+        degree = int(degrees.max().item()) if len(degrees) > 0 else 0
+    mask = _packed_mask(degrees, num_sh_bases(degree))
+    dense = coeffs.new_zeros((*mask.shape, coeffs.shape[-1]))
+    dense[mask] = coeffs
+    return dense
+
+
+def select_packed_coeffs(
+    coeffs: Float[Tensor, "packed C"],
+    degrees: Int[Tensor, "*batch"],
+    indices: Int[Tensor, "num_selected"],
+) -> Float[Tensor, "selected C"]:
+    """Selects the packed coefficients of some gaussians.
+
+    Args:
+        coeffs (Tensor): packed harmonic coefficients of shape (M, C).
+        degrees (Tensor): SH degree of each gaussian.
+        indices (Tensor): indices of the selected gaussians.
+
+    Returns:
+        The packed coefficients of the selected gaussians, in the order of indices.
+    """
+    starts = _packed_offsets(degrees)[indices]
+    num_bases = (degrees[indices].long() + 1) ** 2
+    # shift the position of each selected row to the start of its gaussian
+    shifts = torch.repeat_interleave(
+        starts - (torch.cumsum(num_bases, dim=0) - num_bases), num_bases
+    )
+    return coeffs[shifts + torch.arange(len(shifts), device=shifts.device)]
+
+
+def demote_sh_degrees(
+    coeffs: Float[Tensor, "packed C"],
+    degrees: Int[Tensor, "*batch"],
+    threshold: float = 1e-3,
+) -> Tuple[Float[Tensor, "packed C"], Int[Tensor, "*batch"]]:
+    """Lowers the SH degree of the gaussians whose high order bands are negligible.
+
+    The SH bases are orthonormal, so the energy of a band is the sum of its
+    squared coefficients. The highest bands of a gaussian are dropped while their
+    energy is at most threshold times the energy of all its bands.
+
+    Args:
+        coeffs (Tensor): packed harmonic coefficients of shape (M, C).
+        degrees (Tensor): SH degree of each gaussian.
+        threshold (float): largest relative energy of the dropped bands.
+
+    Returns:
+        A tuple of {Tensor, Tensor}:
+
+        - **coeffs** (Tensor): packed coefficients of the kept bands.
+        - **degrees** (Tensor): new SH degree of each gaussian.
+    """
+    with torch.no_grad():
+        dense = unpack_sh_coeffs(coeffs, degrees)
+        max_degree = deg_from_sh(dense.shape[-2])
+        bands = torch.arange(dense.shape[-2], device=dense.device).sqrt().long()
+        energy = torch.zeros(
+            (dense.shape[0], max_degree + 1), dtype=dense.dtype, device=dense.device
+        )
+        energy.index_add_(1, bands, dense.square().sum(dim=-1))
+        # energy of each band and the ones above it
+        tail = energy.flip(-1).cumsum(dim=-1).flip(-1)
+        needed = tail[:, 1:] > threshold * tail[:, :1]
+        new_degrees = torch.minimum(needed.sum(dim=-1), degrees.long())
+        new_degrees = new_degrees.to(degrees.dtype)
+    return pack_sh_coeffs(dense, new_degrees), new_degrees
+
+
 class _SphericalHarmonics(Function):
     """Compute spherical harmonics
 
@@ -102,3 +238,58 @@ class _SphericalHarmonics(Function):
                 method, num_points, degree, degrees_to_use, viewdirs, v_colors
             ),
         )
+
+
+class _PackedSphericalHarmonics(Function):
+    """Compute spherical harmonics from packed coefficients of varying degree"""
+
+    @staticmethod
+    def forward(
+        ctx,
+        method: Literal["poly", "fast"],
+        degrees_to_use: int,
+        viewdirs: Float[Tensor, "*batch 3"],
+        coeffs: Float[Tensor, "packed C"],
+        degrees: Int[Tensor, "*batch"],
+    ):
+        ctx.method = method
+        ctx.degrees_to_use = degrees_to_use
+        ctx.num_packed = coeffs.shape[0]
+        ctx.save_for_backward(viewdirs, degrees)
+        colors = coeffs.new_zeros((viewdirs.shape[0], coeffs.shape[-1]))
+        for idx, rows, bases in _packed_bases(
+            method, degrees_to_use, viewdirs, degrees
+        ):
+            colors[idx] = (bases[..., None] * coeffs[rows]).sum(dim=-2)
+        return colors
+
+    @staticmethod
+    def backward(ctx, v_colors: Float[Tensor, "*batch C"]):
+        viewdirs, degrees = ctx.saved_tensors
+        v_coeffs = None
+        if ctx.needs_input_grad[3]:
+            v_coeffs = v_colors.new_zeros((ctx.num_packed, v_colors.shape[-1]))
+            for idx, rows, bases in _packed_bases(
+                ctx.method, ctx.degrees_to_use, viewdirs, degrees
+            ):
+                v_coeffs[rows] = bases[..., None] * v_colors[idx, None, :]
+        return None, None, None, v_coeffs, None
+
+
+def _packed_bases(method, degrees_to_use, viewdirs, degrees):
+    # the gaussians are evaluated in groups of equal degree, with the bases and
+    # packed rows of their bands only
+    offsets = _packed_offsets(degrees)
+    used = degrees.long().clamp(max=degrees_to_use)
+    viewdirs = F.normalize(viewdirs, dim=-1)
+    for degree in range(degrees_to_use + 1):
+        idx = (used == degree).nonzero().squeeze(-1)
+        if len(idx) == 0:
+            continue
+        num_bases = num_sh_bases(degree)
+        rows = offsets[idx, None] + torch.arange(num_bases, device=idx.device)
+        if method == "poly":
+            bases = _torch_impl.eval_sh_bases(num_bases, viewdirs[idx])
+        else:
+            bases = _torch_impl.eval_sh_bases_fast(num_bases, viewdirs[idx])
+        yield idx, rows, bases
@@ -0,0 +1,139 @@
+"""Cache of view dependent colors across nearby camera poses"""
+
+import math
+from typing import Dict, Literal, Optional
+
+import torch
+import torch.nn.functional as F
+from jaxtyping import Float, Int
+from torch import Tensor
+
+from .sh import select_packed_coeffs, spherical_harmonics
+
+
+class SHColorCache:
+    """Reuses the colors evaluated by :func:`gsplat.spherical_harmonics` on the
+    previous frames.
+
+    The cache holds the last color of every gaussian along with the view direction
+    it was evaluated for. On the next call, only the gaussians whose view direction
+    turned by more than angle_tolerance since their last evaluation are evaluated
+    again, which in an interactive viewer moving by small steps is a fraction of
+    the scene. The cache is reset when the number of gaussians, the shape of the
+    coefficients, the tensor of packed degrees, the degree or the method change,
+    e.g. after :func:`gsplat.demote_sh_degrees`; call :meth:`invalidate` after
+    editing the coefficients in place.
+
+    Note:
+        The cached colors are not differentiable, the cache is meant for rendering
+        trained scenes.
+
+    Example:
+        >>> cache = gsplat.SHColorCache(angle_tolerance=0.01)
+        >>> for viewmat in camera_path:
+        >>>     viewdirs = means3d - torch.inverse(viewmat)[:3, 3]
+        >>>     colors = cache(3, viewdirs, sh_coeffs)
+        >>>     print(cache.stats()["fraction"])
+
+    Args:
+        angle_tolerance (float): largest angle in radians between the current and
+            the cached view directions of a gaussian for its cached color to be
+            reused.
+    """
+
+    def __init__(self, angle_tolerance: float = 0.01):
+        assert angle_tolerance >= 0, "angle_tolerance must be non negative"
+        self.angle_tolerance = angle_tolerance
+        self._cos_tolerance = math.cos(angle_tolerance)
+        self._key = None
+        self._degrees: Optional[Tensor] = None
+        self.colors: Optional[Tensor] = None
+        self.viewdirs: Optional[Tensor] = None
+        self._stale: Optional[Tensor] = None
+        self.num_evaluated = 0
+        self.num_points = 0
+
+    def __call__(
+        self,
+        degrees_to_use: int,
+        viewdirs: Float[Tensor, "*batch 3"],
+        coeffs: Float[Tensor, "*batch D C"],
+        method: Literal["poly", "fast"] = "fast",
+        degrees: Optional[Int[Tensor, "*batch"]] = None,
+    ) -> Float[Tensor, "*batch C"]:
+        """Returns the colors of the gaussians, evaluating the ones that turned.
+
+        Args:
+            degrees_to_use (int): degree of SHs to use (<= total number available).
+            viewdirs (Tensor): viewing directions.
+            coeffs (Tensor): harmonic coefficients, dense or packed.
+            method (str): evaluation method, "poly" or "fast".
+            degrees (Optional[Tensor]): SH degree of each gaussian for packed
+                coefficients, see :func:`gsplat.spherical_harmonics`.
+
+        Returns:
+            The colors of the gaussians.
+        """
+        num_points = viewdirs.shape[0]
+        # the packed layout changes with the degrees, which are compared by
+        # identity and version to avoid reading them back
+        layout = None if degrees is None else (id(degrees), degrees._version)
+        key = (num_points, tuple(coeffs.shape), layout, degrees_to_use, method)
+        with torch.no_grad():
+            viewdirs = F.normalize(viewdirs.detach(), dim=-1)
+            coeffs = coeffs.detach()
+            if key != self._key or self.colors is None:
+                self._key = key
+                # keeps the degrees alive so that their id is not reused
+                self._degrees = degrees
+                self.colors = spherical_harmonics(
+                    degrees_to_use, viewdirs, coeffs, method, degrees
+                )
+                self.viewdirs = viewdirs.clone()
+                self._stale = torch.zeros(
+                    num_points, dtype=torch.bool, device=viewdirs.device
+                )
+                self.num_evaluated = num_points
+            else:
+                cos = (viewdirs * self.viewdirs).sum(dim=-1)
+                stale = (cos < self._cos_tolerance) | self._stale
+                idx = stale.nonzero().squeeze(-1)
+                if len(idx) > 0:
+                    if degrees is None:
+                        subset, subset_degrees = coeffs[idx], None
+                    else:
+                        subset = select_packed_coeffs(coeffs, degrees, idx)
+                        subset_degrees = degrees[idx]
+                    self.colors[idx] = spherical_harmonics(
+                        degrees_to_use, viewdirs[idx], subset, method, subset_degrees
+                    )
+                    self.viewdirs[idx] = viewdirs[idx]
+                    self._stale[idx] = False
+                self.num_evaluated = len(idx)
+            self.num_points = num_points
+        return self.colors.clone()
+
+    def invalidate(self, indices: Optional[Int[Tensor, "num_changed"]] = None) -> None:
+        """Forces the next call to evaluate some gaussians, or all of them.
+
+        Args:
+            indices (Optional[Tensor]): indices of the gaussians whose coefficients
+                changed, all of them by default.
+        """
+        if indices is None or self.viewdirs is None:
+            self._key = None
+            self._degrees = None
+            self.colors = None
+            self.viewdirs = None
+            self._stale = None
+        else:
+            self._stale[indices] = True
+
+    def stats(self) -> Dict[str, float]:
+        """Returns the number of gaussians evaluated by the last call, the number of
+        gaussians and the fraction that was evaluated."""
+        return {
+            "num_evaluated": self.num_evaluated,
+            "num_points": self.num_points,
+            "fraction": self.num_evaluated / max(self.num_points, 1),
+        }
@@ -0,0 +1,275 @@
+"""Bounding volume hierarchy over 3D gaussians for view and radius queries"""
+
+import math
+from typing import List, Optional, Tuple
+
+import torch
+from jaxtyping import Float, Int
+from torch import Tensor
+
+
+def _spread_bits(x: Tensor) -> Tensor:
+    # insert two zero bits between each of the 10 lowest bits
+    x = (x | (x << 16)) & 0x030000FF
+    x = (x | (x << 8)) & 0x0300F00F
+    x = (x | (x << 4)) & 0x030C30C3
+    x = (x | (x << 2)) & 0x09249249
+    return x
+
+
+def _morton_codes(points: Tensor) -> Tensor:
+    lo = points.amin(dim=0)
+    size = (points.amax(dim=0) - lo).clamp(min=1e-12)
+    cells = ((points - lo) / size * 1023).to(torch.int64).clamp(0, 1023)
+    return (
+        (_spread_bits(cells[:, 0]) << 2)
+        | (_spread_bits(cells[:, 1]) << 1)
+        | _spread_bits(cells[:, 2])
+    )
+
+
+def _group(x: Tensor, fanout: int) -> Tensor:
+    # pad by repeating the last node, which does not change a min or a max
+    pad = -x.shape[0] % fanout
+    if pad > 0:
+        x = torch.cat([x, x[-1:].expand(pad, *x.shape[1:])])
+    return x.view(-1, fanout, *x.shape[1:])
+
+
+class SpatialIndex:
+    """Bounding volume hierarchy over the means of 3D gaussians.
+
+    The gaussians are sorted along a Morton curve and grouped into leaves of
+    leaf_size consecutive gaussians, and every fanout consecutive nodes share a
+    parent. Each node keeps the bounding box of the means below it and the largest
+    gaussian extent, so that queries only visit the nodes they may intersect and
+    return index tensors ready to select the inputs of
+    :func:`gsplat.project_gaussians`.
+
+    The hierarchy is built once for a given set of gaussians. After the
+    parameters change, :meth:`refit` updates the bounds of the nodes without
+    changing the tree, which stays correct but loosens as the gaussians move away
+    from their initial order; build a new index when gaussians are added or
+    removed, or once queries slow down.
+
+    Args:
+        means3d (Tensor): xyzs of gaussians.
+        scales (Tensor): scales of the gaussians.
+        glob_scale (float): A global scaling factor applied to the scene.
+        leaf_size (int): number of gaussians per leaf.
+        fanout (int): number of children per inner node.
+    """
+
+    def __init__(
+        self,
+        means3d: Float[Tensor, "*batch 3"],
+        scales: Float[Tensor, "*batch 3"],
+        glob_scale: float,
+        leaf_size: int = 64,
+        fanout: int = 8,
+    ):
+        if means3d.ndimension() != 2 or means3d.shape[-1] != 3:
+            raise ValueError(f"Invalid shape for means3d: {means3d.shape}")
+        if means3d.shape[0] < 1:
+            raise ValueError("SpatialIndex needs at least one gaussian")
+        assert leaf_size > 0 and fanout > 1, "leaf_size must be positive, fanout > 1"
+        self.num_points = means3d.shape[0]
+        self.leaf_size = leaf_size
+        self.fanout = fanout
+
+        with torch.no_grad():
+            order = torch.argsort(_morton_codes(means3d.detach().float()))
+        num_leaves = math.ceil(self.num_points / leaf_size)
+        pad = num_leaves * leaf_size - self.num_points
+        # leaves are padded with their last gaussian, queries skip the padding
+        self.leaf_members = torch.cat([order, order[-1:].expand(pad)]).view(
+            num_leaves, leaf_size
+        )
+        self.leaf_valid = (
+            torch.arange(num_leaves * leaf_size, device=order.device) < self.num_points
+        ).view(num_leaves, leaf_size)
+        self.leaf_ids = torch.empty_like(order)
+        self.leaf_ids[order] = torch.arange(
+            self.num_points, device=order.device
+        ).div(leaf_size, rounding_mode="floor")
+
+        # the bounds of each level, from the leaves to the root
+        self.levels: List[Tuple[Tensor, Tensor, Tensor]] = []
+        self.refit(means3d, scales, glob_scale)
+
+    def refit(
+        self,
+        means3d: Float[Tensor, "*batch 3"],
+        scales: Float[Tensor, "*batch 3"],
+        glob_scale: float,
+        indices: Optional[Int[Tensor, "num_changed"]] = None,
+    ) -> None:
+        """Updates the bounds of the nodes after the gaussians changed.
+
+        Args:
+            means3d (Tensor): xyzs of gaussians, in the order the index was built with.
+            scales (Tensor): scales of the gaussians.
+            glob_scale (float): A global scaling factor applied to the scene.
+            indices (Optional[Tensor]): indices of the gaussians that changed, all of
+                them by default. Only their leaves and ancestors are updated.
+        """
+        if means3d.shape[0] != self.num_points:
+            raise ValueError(
+                f"SpatialIndex was built for {self.num_points} gaussians, "
+                f"got {means3d.shape[0]}, build a new index instead"
+            )
+        with torch.no_grad():
+            self.means3d = means3d.detach()
+            self.sigmas = glob_scale * scales.detach().amax(dim=-1)
+            if indices is None or not self.levels:
+                nodes = None
+            else:
+                nodes = torch.unique(self.leaf_ids[indices])
+
+            # leaves bound the means and the extents of their gaussians
+            members = self.leaf_members if nodes is None else self.leaf_members[nodes]
+            points = self.means3d[members]
+            bounds = (
+                points.amin(dim=1),
+                points.amax(dim=1),
+                self.sigmas[members].amax(dim=1),
+            )
+            level = 0
+            while True:
+                if nodes is not None:
+                    for x, update in zip(self.levels[level], bounds):
+                        x[nodes] = update
+                elif level < len(self.levels):
+                    self.levels[level] = bounds
+                else:
+                    self.levels.append(bounds)
+                num_nodes = len(self.levels[level][0])
+                if num_nodes == 1:
+                    break
+
+                # parents bound their children
+                if nodes is None:
+                    lo, hi, sigma = (_group(x, self.fanout) for x in self.levels[level])
+                else:
+                    nodes = torch.unique(nodes.div(self.fanout, rounding_mode="floor"))
+                    children = nodes[:, None] * self.fanout + torch.arange(
+                        self.fanout, device=nodes.device
+                    )
+                    children = children.clamp(max=num_nodes - 1)
+                    lo, hi, sigma = (x[children] for x in self.levels[level])
+                bounds = (lo.amin(dim=1), hi.amax(dim=1), sigma.amax(dim=1))
+                level += 1
+
+    def _query(self, node_test, point_test) -> Int[Tensor, "num_found"]:
+        device = self.leaf_members.device
+        nodes = torch.zeros(1, dtype=torch.int64, device=device)
+        for level in reversed(range(len(self.levels))):
+            nodes = nodes[node_test(*(x[nodes] for x in self.levels[level]))]
+            if level > 0:
+                nodes = nodes[:, None] * self.fanout + torch.arange(
+                    self.fanout, device=device
+                )
+                nodes = nodes[nodes < len(self.levels[level - 1][0])]
+        members = self.leaf_members[nodes][self.leaf_valid[nodes]]
+        members = members[point_test(self.means3d[members], self.sigmas[members])]
+        return torch.sort(members).values
+
+    def query_radius(
+        self, center: Float[Tensor, "3"], radius: float
+    ) -> Int[Tensor, "num_found"]:
+        """Finds the gaussians whose 3 sigma extent intersects a sphere.
+
+        Args:
+            center (Tensor): center of the sphere.
+            radius (float): radius of the sphere.
+
+        Returns:
+            A Tensor:
+
+            - **indices** (Tensor): sorted indices of the gaussians.
+        """
+        center = torch.as_tensor(center, device=self.means3d.device)
+
+        def node_test(lo, hi, sigma):
+            dist = torch.maximum(lo - center, center - hi).clamp(min=0).norm(dim=-1)
+            return dist <= radius + 3 * sigma
+
+        def point_test(means, sigmas):
+            return (means - center).norm(dim=-1) <= radius + 3 * sigmas
+
+        with torch.no_grad():
+            return self._query(node_test, point_test)
+
+    def query_frustum(
+        self,
+        viewmat: Float[Tensor, "4 4"],
+        fx: float,
+        fy: float,
+        cx: float,
+        cy: float,
+        img_height: int,
+        img_width: int,
+        block_width: int,
+        clip_thresh: float = 0.01,
+    ) -> Int[Tensor, "num_found"]:
+        """Finds the gaussians that can be visible in a camera.
+
+        The query is conservative with respect to :func:`gsplat.cull_gaussians`
+        and :func:`gsplat.project_gaussians`: every gaussian that they keep is
+        returned, along with a few gaussians close to the frustum.
+
+        Args:
+            viewmat (Tensor): view matrix for rendering.
+            fx (float): focal length x.
+            fy (float): focal length y.
+            cx (float): principal point x.
+            cy (float): principal point y.
+            img_height (int): height of the rendered image.
+            img_width (int): width of the rendered image.
+            block_width (int): side length of tiles inside projection/rasterization
+                in pixels.
+            clip_thresh (float): minimum z depth threshold.
+
+        Returns:
+            A Tensor:
+
+            - **indices** (Tensor): sorted indices of the gaussians.
+        """
+        device = self.means3d.device
+        R = viewmat[:3, :3].to(device)
+        t = viewmat[:3, 3].to(device)
+        # a gaussian covers at most 3 * sigma * K / z + margin pixels, with K
+        # bounding the norm of the clamped EWA jacobian; multiplied by z, the
+        # borders of the tile grid become planes through the camera center
+        lim_x = 1.3 * 0.5 * img_width / fx
+        lim_y = 1.3 * 0.5 * img_height / fy
+        K = math.sqrt(fx**2 * (1 + lim_x**2) + fy**2 * (1 + lim_y**2))
+        margin = 3 * math.sqrt(0.3) + 1
+        width = (img_width + block_width - 1) // block_width * block_width
+        height = (img_height + block_width - 1) // block_width * block_width
+        planes = torch.tensor(
+            [
+                [fx, 0.0, cx - width - margin],
+                [-fx, 0.0, -cx - block_width - margin],
+                [0.0, fy, cy - height - margin],
+                [0.0, -fy, -cy - block_width - margin],
+            ],
+            device=device,
+        )
+
+        def node_test(lo, hi, sigma):
+            center = (lo + hi) / 2 @ R.T + t
+            half = (hi - lo) / 2 @ R.abs().T
+            dist = center @ planes.T - half @ planes.abs().T
+            return ((center[:, 2] + half[:, 2]) > clip_thresh) & (
+                dist < 3 * K * sigma[:, None]
+            ).all(dim=-1)
+
+        def point_test(means, sigmas):
+            p_view = means @ R.T + t
+            return (p_view[:, 2] > clip_thresh) & (
+                p_view @ planes.T < 3 * K * sigmas[:, None]
+            ).all(dim=-1)
+
+        with torch.no_grad():
+            return self._query(node_test, point_test)
@@ -0,0 +1,166 @@
+"""Rendering of scenes streamed from storage in chunks"""
+
+from typing import Iterable, Optional, Tuple
+
+import torch
+from jaxtyping import Float
+from torch import Tensor
+
+from .project_gaussians import project_gaussians
+from .rasterize import rasterize_gaussians
+from .sh import deg_from_sh, spherical_harmonics
+from .utils import cull_gaussians
+
+
+def render_streaming(
+    chunks: Iterable[Tuple[Tensor, Tensor, Tensor, Tensor, Tensor]],
+    viewmat: Float[Tensor, "4 4"],
+    fx: float,
+    fy: float,
+    cx: float,
+    cy: float,
+    img_height: int,
+    img_width: int,
+    block_width: int,
+    glob_scale: float = 1.0,
+    sh_degree: Optional[int] = None,
+    background: Optional[Float[Tensor, "channels"]] = None,
+    return_alpha: Optional[bool] = False,
+    clip_thresh: float = 0.01,
+    exact_tiles: bool = False,
+) -> Tensor:
+    """Renders a scene streamed in chunks of gaussians, for scenes that do not fit in memory.
+
+    Every chunk is culled with :func:`gsplat.cull_gaussians` and projected, its colors are evaluated, and only the projected
+    attributes of its visible gaussians are kept before the next chunk is read. The visible gaussians of all the chunks are
+    then binned and rasterized in a single pass, so the peak memory is bounded by the visible set and one chunk rather than the scene.
+
+    The chunks are tuples (means3d, scales, quats, opacities, colors) on the rendering device, as yielded by
+    :meth:`gsplat.PlyGaussians.batches` and :meth:`gsplat.CompressedGaussians.batches`. Colors of shape (N, D, C) are SH coefficients,
+    evaluated with :func:`gsplat.spherical_harmonics` for the view direction of each gaussian, offset by 0.5 and clamped to be non negative.
+
+    Note:
+        This function is not differentiable, it is meant for rendering trained scenes.
+
+    Example:
+        >>> scene = gsplat.load_ply("point_cloud.ply")
+        >>> out_img = gsplat.render_streaming(
+        >>>     scene.batches(1_000_000, device="cuda"), viewmat, fx, fy, cx, cy, H, W, 16
+        >>> )
+
+    Args:
+        chunks (Iterable): chunks of (means3d, scales, quats, opacities, colors) tensors.
+        viewmat (Tensor): view matrix for rendering.
+        fx (float): focal length x.
+        fy (float): focal length y.
+        cx (float): principal point x.
+        cy (float): principal point y.
+        img_height (int): height of the rendered image.
+        img_width (int): width of the rendered image.
+        block_width (int): side length of tiles inside projection/rasterization in pixels.
+        glob_scale (float): A global scaling factor applied to the scene.
+        sh_degree (Optional[int]): degree of SHs to use for SH coefficients, all of them by default.
+        background (Optional[Tensor]): background color
+        return_alpha (bool): whether to return alpha channel
+        clip_thresh (float): minimum z depth threshold.
+        exact_tiles (bool): whether to only intersect the tiles overlapping the ellipses of the gaussians, see :func:`gsplat.project_gaussians`.
+
+    Returns:
+        A Tensor:
+
+        - **out_img** (Tensor): N-dimensional rendered output image.
+        - **out_alpha** (Optional[Tensor]): Alpha channel of the rendered output image.
+    """
+    campos = None
+    num_channels = None
+    visible = []
+    with torch.no_grad():
+        for means3d, scales, quats, opacities, colors in chunks:
+            if campos is None:
+                viewmat = viewmat.to(means3d.device)
+                campos = torch.inverse(viewmat)[:3, 3]
+            num_channels = colors.shape[-1]
+            ids = cull_gaussians(
+                means3d,
+                scales,
+                glob_scale,
+                viewmat,
+                fx,
+                fy,
+                cx,
+                cy,
+                img_height,
+                img_width,
+                block_width,
+                clip_thresh,
+            )
+            # empty chunks would launch empty grids
+            if len(ids) == 0:
+                continue
+            means3d, scales, quats = means3d[ids], scales[ids], quats[ids]
+            opacities, colors = opacities[ids], colors[ids]
+            # only keep the projected attributes of the gaussians hitting a tile
+            outputs = project_gaussians(
+                means3d,
+                scales,
+                glob_scale,
+                quats,
+                viewmat,
+                fx,
+                fy,
+                cx,
+                cy,
+                img_height,
+                img_width,
+                block_width,
+                clip_thresh=clip_thresh,
+                exact_tiles=exact_tiles,
+                opacity=opacities,
+                packed=True,
+            )
+            xys, depths, radii, conics, _, num_tiles_hit, _, ids = outputs
+            if len(ids) == 0:
+                continue
+            if colors.ndimension() == 3:
+                degree = sh_degree
+                if degree is None:
+                    degree = deg_from_sh(colors.shape[1])
+                viewdirs = means3d[ids] - campos
+                colors = spherical_harmonics(degree, viewdirs, colors[ids])
+                colors = torch.clamp_min(colors + 0.5, 0.0)
+            else:
+                colors = colors[ids]
+            visible.append(
+                (xys, depths, radii, conics, num_tiles_hit, colors, opacities[ids])
+            )
+        if num_channels is None:
+            raise ValueError("No chunk of gaussians to render")
+        if not visible:
+            # every gaussian was culled, only the background is left
+            device = campos.device
+            if background is None:
+                background = torch.ones(num_channels, device=device)
+            out_img = torch.ones(img_height, img_width, num_channels, device=device)
+            out_img = out_img * background.to(device)
+            if return_alpha:
+                return out_img, torch.zeros(img_height, img_width, device=device)
+            return out_img
+        xys, depths, radii, conics, num_tiles_hit, colors, opacities = (
+            torch.cat(x) for x in zip(*visible)
+        )
+        del visible
+        return rasterize_gaussians(
+            xys,
+            depths,
+            radii,
+            conics,
+            num_tiles_hit,
+            colors,
+            opacities,
+            img_height,
+            img_width,
+            block_width,
+            background=background,
+            return_alpha=return_alpha,
+            exact_tiles=exact_tiles,
+        )
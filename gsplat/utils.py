@@ -1,12 +1,41 @@
 """Python bindings for binning and sorting gaussians"""
 
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 
 import torch
+import torch.nn.functional as F
 from jaxtyping import Float, Int
 from torch import Tensor
 
-import gsplat.cuda as _C
+import gsplat.backend as _C
+
+from . import _torch_impl
+from .workspace import Workspace
+
+
+def to_float32(x: Tensor, name: str, allow_uint8: bool = False) -> Tensor:
+    """Converts a gaussian attribute stored in reduced precision to float32.
+
+    The kernels composite and accumulate gradients in float32, so attributes may be
+    stored as float16 or bfloat16 to halve their memory and are converted on the way
+    in. Autograd returns their gradients in the storage dtype. uint8 attributes, such
+    as quantized colors and opacities, are mapped to [0, 1] and get no gradient.
+
+    Args:
+        x (Tensor): attribute to convert.
+        name (str): name of the attribute, for error messages.
+        allow_uint8 (bool): whether the attribute may be stored as uint8.
+
+    Returns:
+        The attribute in float32.
+    """
+    if x.dtype == torch.float32:
+        return x
+    if x.dtype == torch.uint8 and allow_uint8:
+        return x.float() / 255
+    if not x.is_floating_point():
+        raise TypeError(f"{name} must be a floating point tensor, got {x.dtype}")
+    return x.float()
 
 
 def map_gaussian_to_intersects(
@@ -18,6 +47,7 @@ def map_gaussian_to_intersects(
     cum_tiles_hit: Float[Tensor, "batch 1"],
     tile_bounds: Tuple[int, int, int],
     block_size: int,
+    conics: Optional[Float[Tensor, "batch 3"]] = None,
 ) -> Tuple[Float[Tensor, "cum_tiles_hit 1"], Float[Tensor, "cum_tiles_hit 1"]]:
     """Map each gaussian intersection to a unique tile ID and depth value for sorting.
 
@@ -32,6 +62,7 @@ def map_gaussian_to_intersects(
         radii (Tensor): radii of 2D gaussian projections.
         cum_tiles_hit (Tensor): list of cumulative tiles hit.
         tile_bounds (Tuple): tile dimensions as a len 3 tuple (tiles.x , tiles.y, 1).
+        conics (Optional[Tensor]): conics of 2D gaussian projections. When given, only the tiles overlapping the ellipse of each gaussian are intersected, see :func:`gsplat.compute_num_tiles_hit`, which cum_tiles_hit must then be computed from. The exact test runs as PyTorch ops on every backend.
 
     Returns:
         A tuple of {Tensor, Tensor}:
@@ -39,17 +70,37 @@ def map_gaussian_to_intersects(
         - **isect_ids** (Tensor): unique IDs for each gaussian in the form (tile | depth id).
         - **gaussian_ids** (Tensor): Tensor that maps isect_ids back to cum_tiles_hit.
     """
-    isect_ids, gaussian_ids = _C.map_gaussian_to_intersects(
+    if conics is None:
+        isect_ids, gaussian_ids = _C.map_gaussian_to_intersects(
+            num_points,
+            num_intersects,
+            xys.contiguous(),
+            depths.contiguous(),
+            radii.contiguous(),
+            cum_tiles_hit.contiguous(),
+            tile_bounds,
+            block_size,
+        )
+        return (isect_ids, gaussian_ids)
+
+    isect_ids, gaussian_ids = _torch_impl.map_gaussian_to_intersects(
         num_points,
-        num_intersects,
-        xys.contiguous(),
+        xys,
         depths.contiguous(),
-        radii.contiguous(),
-        cum_tiles_hit.contiguous(),
+        radii.reshape(-1),
+        cum_tiles_hit,
         tile_bounds,
         block_size,
+        conics,
     )
-    return (isect_ids, gaussian_ids)
+    pad = num_intersects - isect_ids.shape[0]
+    if pad < 0:
+        raise ValueError(
+            f"Found {isect_ids.shape[0]} intersections for {num_intersects} entries, "
+            "compute num_tiles_hit with the exact test as well"
+        )
+    # fill buffers of num_intersects entries, like the kernel
+    return (F.pad(isect_ids, (0, pad)), F.pad(gaussian_ids, (0, pad)))
 
 
 def get_tile_bin_edges(
@@ -81,13 +132,81 @@ def get_tile_bin_edges(
     )
 
 
+def compute_num_tiles_hit(
+    xys: Float[Tensor, "batch 2"],
+    radii: Float[Tensor, "batch 1"],
+    conics: Float[Tensor, "batch 3"],
+    tile_bounds: Tuple[int, int, int],
+    block_size: int,
+    exact: bool = True,
+) -> Int[Tensor, "batch"]:
+    """Counts the tiles hit by each gaussian.
+
+    The projection marks every tile of the bounding square of the radius as hit, which for thin elongated gaussians
+    includes many tiles whose pixels never get any contribution. With exact, a tile is only hit when the ellipse of the conic,
+    at the level where a gaussian of opacity 1 falls below the alpha threshold of the rasterizer, overlaps the pixels of the tile.
+    Dropping the other tiles does not change the rendered images.
+
+    Note:
+        This function is not differentiable to any input. It runs as PyTorch ops on every backend.
+
+    Args:
+        xys (Tensor): x,y locations of 2D gaussian projections.
+        radii (Tensor): radii of 2D gaussian projections.
+        conics (Tensor): conics of 2D gaussian projections.
+        tile_bounds (Tuple): tile dimensions as a len 3 tuple (tiles.x , tiles.y, 1).
+        block_size (int): side length of the tiles in pixels.
+        exact (bool): test the ellipse against each tile of the bounding square.
+
+    Returns:
+        A Tensor:
+
+        - **num_tiles_hit** (Tensor): number of tiles hit per gaussian.
+    """
+    with torch.no_grad():
+        return _torch_impl.count_tiles_hit(
+            xys, radii.reshape(-1), tile_bounds, block_size, conics if exact else None
+        )
+
+
+def get_intersection_stats(
+    xys: Float[Tensor, "batch 2"],
+    radii: Float[Tensor, "batch 1"],
+    conics: Float[Tensor, "batch 3"],
+    tile_bounds: Tuple[int, int, int],
+    block_size: int,
+) -> Dict[str, int]:
+    """Returns the number of tile intersections of the bounding squares of the gaussians (bbox),
+    of the exact ellipse test (exact), and the number of intersections the exact test eliminates.
+
+    Args:
+        xys (Tensor): x,y locations of 2D gaussian projections.
+        radii (Tensor): radii of 2D gaussian projections.
+        conics (Tensor): conics of 2D gaussian projections.
+        tile_bounds (Tuple): tile dimensions as a len 3 tuple (tiles.x , tiles.y, 1).
+        block_size (int): side length of the tiles in pixels.
+    """
+    num_bbox = compute_num_tiles_hit(
+        xys, radii, conics, tile_bounds, block_size, exact=False
+    )
+    num_exact = compute_num_tiles_hit(xys, radii, conics, tile_bounds, block_size)
+    num_bbox, num_exact = num_bbox.sum().item(), num_exact.sum().item()
+    return {
+        "bbox": num_bbox,
+        "exact": num_exact,
+        "eliminated": num_bbox - num_exact,
+    }
+
+
 def compute_cov2d_bounds(
-    cov2d: Float[Tensor, "batch 3"]
+    cov2d: Float[Tensor, "batch 3"],
+    opacities: Optional[Float[Tensor, "batch 1"]] = None,
 ) -> Tuple[Float[Tensor, "batch_conics 3"], Float[Tensor, "batch_radii 1"]]:
     """Computes bounds of 2D covariance matrix
 
     Args:
         cov2d (Tensor): input cov2d of size  (batch, 3) of upper triangular 2D covariance values
+        opacities (Optional[Tensor]): opacities of the gaussians. When given, the radius is cut off where the alpha of the gaussian falls below the 1/255 threshold of the rasterizer, which shrinks the footprint of low opacity gaussians without changing the rendered images.
 
     Returns:
         A tuple of {Tensor, Tensor}:
@@ -100,11 +219,122 @@ def compute_cov2d_bounds(
     ), f"Expected input cov2d to be of shape (*batch, 3) (upper triangular values), but got {tuple(cov2d.shape)}"
     num_pts = cov2d.shape[0]
     assert num_pts > 0
-    return _C.compute_cov2d_bounds(num_pts, cov2d.contiguous())
+    conic, radius = _C.compute_cov2d_bounds(num_pts, cov2d.contiguous())
+    if opacities is not None:
+        radius = shrink_radii(radius, conic, opacities)
+    return conic, radius
+
+
+def shrink_radii(
+    radii: Float[Tensor, "*batch"],
+    conics: Float[Tensor, "*batch 3"],
+    opacities: Float[Tensor, "*batch 1"],
+) -> Float[Tensor, "*batch"]:
+    """Cuts the radii of 2D gaussians off where their alpha falls below the 1/255 threshold of the rasterizer.
+
+    The radius of a gaussian covers 3 standard deviations along its major axis, while a gaussian of opacity o
+    only blends the pixels where o * exp(-sigma) >= 1/255. Below an opacity of about 0.35 that cutoff is closer than 3 standard deviations,
+    and gaussians below 1/255 do not blend any pixel and get a radius of 0. Radii are never grown.
+
+    Note:
+        This function is not differentiable to any input.
+
+    Args:
+        radii (Tensor): radii of 2D gaussian projections.
+        conics (Tensor): conics of 2D gaussian projections.
+        opacities (Tensor): opacities the gaussians are rasterized with.
+
+    Returns:
+        A Tensor:
+
+        - **radii** (Tensor): radii of the same shape and dtype as the input.
+    """
+    with torch.no_grad():
+        opacity_radius = _torch_impl.compute_opacity_radius(
+            conics, opacities.reshape(conics.shape[:-1])
+        )
+        return torch.minimum(radii, opacity_radius.reshape(radii.shape).to(radii.dtype))
+
+
+def cull_gaussians(
+    means3d: Float[Tensor, "*batch 3"],
+    scales: Float[Tensor, "*batch 3"],
+    glob_scale: float,
+    viewmat: Float[Tensor, "4 4"],
+    fx: float,
+    fy: float,
+    cx: float,
+    cy: float,
+    img_height: int,
+    img_width: int,
+    block_width: int,
+    clip_thresh: float = 0.01,
+) -> Int[Tensor, "num_visible"]:
+    """Finds the gaussians that can be visible in a camera, before projecting them.
+
+    The test is conservative: every gaussian that :func:`gsplat.project_gaussians` would give a non zero radius is kept.
+    The means must lie past clip_thresh, and the screen space radius is bounded by the largest scale of the gaussian and the norm of the EWA projection jacobian.
+    Indexing the parameters with the returned indices runs projection, spherical harmonics and rasterization on the visible gaussians only,
+    and autograd scatters the gradients back to the full parameter tensors.
+
+    Note:
+        This function is not differentiable to any input. Compacting the indices synchronizes with the device.
+
+    Args:
+        means3d (Tensor): xyzs of gaussians.
+        scales (Tensor): scales of the gaussians.
+        glob_scale (float): A global scaling factor applied to the scene.
+        viewmat (Tensor): view matrix for rendering.
+        fx (float): focal length x.
+        fy (float): focal length y.
+        cx (float): principal point x.
+        cy (float): principal point y.
+        img_height (int): height of the rendered image.
+        img_width (int): width of the rendered image.
+        block_width (int): side length of tiles inside projection/rasterization in pixels.
+        clip_thresh (float): minimum z depth threshold.
+
+    Returns:
+        A Tensor:
+
+        - **indices** (Tensor): indices of the gaussians that may be visible.
+    """
+    with torch.no_grad():
+        means3d = to_float32(means3d, "means3d")
+        scales = to_float32(scales, "scales")
+        viewmat = to_float32(viewmat, "viewmat")
+        p_view = means3d @ viewmat[:3, :3].T + viewmat[:3, 3]
+        tz = p_view[..., 2]
+        depth = tz.clamp(min=clip_thresh)
+        # the jacobian is evaluated with the same clamped directions as the kernel
+        lim_x = 1.3 * 0.5 * img_width / fx
+        lim_y = 1.3 * 0.5 * img_height / fy
+        tx = (p_view[..., 0] / depth).clamp(-lim_x, lim_x)
+        ty = (p_view[..., 1] / depth).clamp(-lim_y, lim_y)
+        jac_sq = (fx / depth) ** 2 * (1 + tx**2) + (fy / depth) ** 2 * (1 + ty**2)
+        # the largest eigenvalue of the 2D covariance, with the low pass filter
+        max_var = (glob_scale * scales.max(dim=-1).values) ** 2 * jac_sq + 0.3
+        radius = 3 * max_var.sqrt() + 1
+
+        x = fx * p_view[..., 0] / depth + cx
+        y = fy * p_view[..., 1] / depth + cy
+        # tiles are found by truncating the bounds, which reaches one block past
+        # the top left border of the image
+        tiles_x = (img_width + block_width - 1) // block_width
+        tiles_y = (img_height + block_width - 1) // block_width
+        visible = (
+            (tz > clip_thresh)
+            & (x + radius > -block_width)
+            & (x - radius < tiles_x * block_width)
+            & (y + radius > -block_width)
+            & (y - radius < tiles_y * block_width)
+        )
+    return visible.nonzero().squeeze(-1)
 
 
 def compute_cumulative_intersects(
-    num_tiles_hit: Float[Tensor, "batch 1"]
+    num_tiles_hit: Float[Tensor, "batch 1"],
+    workspace: Optional[Workspace] = None,
 ) -> Tuple[int, Float[Tensor, "batch 1"]]:
     """Computes cumulative intersections of gaussians. This is useful for creating unique gaussian IDs and for sorting.
 
@@ -113,6 +343,7 @@ def compute_cumulative_intersects(
 
     Args:
         num_tiles_hit (Tensor): number of intersected tiles per gaussian.
+        workspace (Optional[Workspace]): workspace holding the output buffer.
 
     Returns:
         A tuple of {int, Tensor}:
@@ -120,11 +351,40 @@ def compute_cumulative_intersects(
         - **num_intersects** (int): total number of tile intersections.
         - **cum_tiles_hit** (Tensor): a tensor of cumulated intersections (used for sorting).
     """
-    cum_tiles_hit = torch.cumsum(num_tiles_hit, dim=0, dtype=torch.int32)
+    out = None
+    if workspace is not None:
+        out = workspace.get(
+            "cum_tiles_hit", num_tiles_hit.shape, torch.int32, num_tiles_hit.device
+        )
+    cum_tiles_hit = torch.cumsum(num_tiles_hit, dim=0, dtype=torch.int32, out=out)
     num_intersects = cum_tiles_hit[-1].item()
     return num_intersects, cum_tiles_hit
 
 
+SORT_MODES = ("global", "compact", "depth")
+
+
+def _depth_ranks(depths: Tensor) -> Tensor:
+    # rank of each gaussian front to back, ties broken by index
+    order = torch.sort(depths.reshape(-1), stable=True).indices
+    ranks = torch.empty_like(order)
+    ranks[order] = torch.arange(len(order), device=order.device)
+    return ranks
+
+
+def _gather_sorted(
+    x: Tensor,
+    sorted_indices: Tensor,
+    name: str,
+    workspace: Optional[Workspace],
+    key: Tuple,
+) -> Tensor:
+    if workspace is None:
+        return torch.gather(x, 0, sorted_indices)
+    out = workspace.get(name, x.shape, x.dtype, x.device, key)
+    return torch.gather(x, 0, sorted_indices, out=out)
+
+
 def bin_and_sort_gaussians(
     num_points: int,
     num_intersects: int,
@@ -134,6 +394,11 @@ def bin_and_sort_gaussians(
     cum_tiles_hit: Float[Tensor, "batch 1"],
     tile_bounds: Tuple[int, int, int],
     block_size: int,
+    num_cameras: int = 1,
+    static_capacity: bool = False,
+    workspace: Optional[Workspace] = None,
+    sort_mode: str = "global",
+    conics: Optional[Float[Tensor, "batch 3"]] = None,
 ) -> Tuple[
     Float[Tensor, "num_intersects 1"],
     Float[Tensor, "num_intersects 1"],
@@ -156,6 +421,15 @@ def bin_and_sort_gaussians(
         radii (Tensor): radii of 2D gaussian projections.
         cum_tiles_hit (Tensor): list of cumulative tiles hit.
         tile_bounds (Tuple): tile dimensions as a len 3 tuple (tiles.x , tiles.y, 1).
+        num_cameras (int): number of cameras the gaussians are stacked over. The inputs then hold num_points // num_cameras gaussians per camera, and camera c uses the tile ids following the ones of camera c - 1, i.e. the tile bins of the cameras stacked vertically.
+        static_capacity (bool): treat num_intersects as the capacity of the buffers rather than the exact number of intersections. The gaussians whose intersections do not fit are dropped and the unused entries are left out of the tile bins, without reading the number of intersections on the host.
+        workspace (Optional[Workspace]): workspace holding the sorted buffers, keyed by the tile bounds and block size.
+        sort_mode (str): strategy used to order the intersections, the results only differ in the order of gaussians at equal depths:
+
+            - ``"global"``: a single sort of the 64 bit (tile | depth id) keys.
+            - ``"compact"``: a sort of keys packing the tile id with the depth rank of the gaussian in as few bits as the tile bounds and number of gaussians allow, 32 bit keys when they fit. The depth ranks cost one more sort over the gaussians, which pays off when there are many more intersections than gaussians.
+            - ``"depth"``: a sort of the gaussians by depth, whose intersections are then bucketed by tile with a stable sort of the tile ids. With static_capacity, the farthest gaussians are dropped first, and the unsorted outputs follow the depth order.
+        conics (Optional[Tensor]): conics of 2D gaussian projections, to only intersect the tiles overlapping their ellipses, see :func:`gsplat.map_gaussian_to_intersects`.
 
     Returns:
         A tuple of {Tensor, Tensor, Tensor, Tensor, Tensor}:
@@ -166,6 +440,24 @@ def bin_and_sort_gaussians(
         - **gaussian_ids_sorted** (Tensor): sorted Tensor that maps isect_ids back to cum_tiles_hit. Useful for identifying gaussians.
         - **tile_bins** (Tensor): range of gaussians hit per tile.
     """
+    if sort_mode not in SORT_MODES:
+        raise ValueError(f"Unknown sort_mode {sort_mode}, expected one of {SORT_MODES}")
+    depth_order = None
+    if sort_mode == "depth":
+        # map the gaussians front to back, so that the intersections of every
+        # tile are generated in depth order
+        depth_order = torch.sort(depths.reshape(-1), stable=True).indices
+        num_tiles_hit = torch.diff(cum_tiles_hit, prepend=cum_tiles_hit.new_zeros(1))
+        cum_tiles_hit = torch.cumsum(
+            num_tiles_hit[depth_order], dim=0, dtype=torch.int32
+        )
+        xys, depths, radii = xys[depth_order], depths[depth_order], radii[depth_order]
+        if conics is not None:
+            conics = conics[depth_order]
+    if static_capacity:
+        # the offsets are increasing, so dropping the gaussians that end past
+        # the capacity keeps every write inside the buffers
+        radii = radii * (cum_tiles_hit <= num_intersects)
     isect_ids, gaussian_ids = map_gaussian_to_intersects(
         num_points,
         num_intersects,
@@ -175,8 +467,60 @@ def bin_and_sort_gaussians(
         cum_tiles_hit,
         tile_bounds,
         block_size,
+        conics,
+    )
+    if depth_order is not None:
+        gaussian_ids = depth_order.to(gaussian_ids.dtype)[gaussian_ids.long()]
+    if num_cameras > 1:
+        # fold the camera index into the tile id, so that a single sort groups
+        # the intersections by camera, tile and depth
+        num_tiles = tile_bounds[0] * tile_bounds[1]
+        camera_ids = gaussian_ids.long() // (num_points // num_cameras)
+        isect_ids = isect_ids + ((camera_ids * num_tiles) << 32)
+        tile_bounds = (tile_bounds[0], num_cameras * tile_bounds[1], 1)
+    num_tiles = tile_bounds[0] * tile_bounds[1]
+    bin_bounds = tile_bounds
+    if static_capacity:
+        # move the unused entries to an extra row of tiles past the last one,
+        # which is sliced off the tile bins
+        num_used = (cum_tiles_hit * (cum_tiles_hit <= num_intersects)).max()
+        unused = torch.arange(num_intersects, device=isect_ids.device) >= num_used
+        isect_ids = isect_ids.masked_fill(unused, num_tiles << 32)
+        bin_bounds = (tile_bounds[0], tile_bounds[1] + 1, 1)
+    key = (tile_bounds, block_size)
+    device = isect_ids.device
+    if sort_mode == "compact":
+        rank_bits = max((num_points - 1).bit_length(), 1)
+        tile_bits = (bin_bounds[0] * bin_bounds[1] - 1).bit_length()
+        ranks = _depth_ranks(depths)[gaussian_ids.long()]
+        sort_keys = ((isect_ids >> 32) << rank_bits) | ranks
+        if tile_bits + rank_bits <= 31:
+            sort_keys = sort_keys.int()
+    elif sort_mode == "depth":
+        # the intersections are in depth order, a stable sort keeps it
+        # within each tile
+        sort_keys = (isect_ids >> 32).int()
+    else:
+        sort_keys = isect_ids
+    stable = sort_mode == "depth"
+    if workspace is None:
+        keys_sorted, sorted_indices = torch.sort(sort_keys, stable=stable)
+    else:
+        name = "isect_ids_sorted" if sort_mode == "global" else "sort_keys_sorted"
+        keys_sorted = workspace.get(name, sort_keys.shape, sort_keys.dtype, device, key)
+        sorted_indices = workspace.get(
+            "sorted_indices", sort_keys.shape, torch.int64, device, key
+        )
+        torch.sort(sort_keys, stable=stable, out=(keys_sorted, sorted_indices))
+    if sort_mode == "global":
+        isect_ids_sorted = keys_sorted
+    else:
+        isect_ids_sorted = _gather_sorted(
+            isect_ids, sorted_indices, "isect_ids_sorted", workspace, key
+        )
+    gaussian_ids_sorted = _gather_sorted(
+        gaussian_ids, sorted_indices, "gaussian_ids_sorted", workspace, key
     )
-    isect_ids_sorted, sorted_indices = torch.sort(isect_ids)
-    gaussian_ids_sorted = torch.gather(gaussian_ids, 0, sorted_indices)
-    tile_bins = get_tile_bin_edges(num_intersects, isect_ids_sorted, tile_bounds)
+    tile_bins = get_tile_bin_edges(num_intersects, isect_ids_sorted, bin_bounds)
+    tile_bins = tile_bins[:num_tiles]
     return isect_ids, gaussian_ids, isect_ids_sorted, gaussian_ids_sorted, tile_bins
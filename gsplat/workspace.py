@@ -0,0 +1,95 @@
+"""Workspace reusing the binning buffers of the rasterizer across frames"""
+
+from typing import Dict, Hashable, Sequence
+
+import torch
+from torch import Tensor
+
+
+class Workspace:
+    """Pool of buffers reused by :func:`gsplat.rasterize_gaussians` across frames.
+
+    The rasterizer asks the workspace for the buffers of its binning stage instead
+    of allocating them on every frame: the cumulative tile counts, the sort keys
+    and permutation, the sorted intersection ids and the sorted gaussian ids.
+    Buffers are keyed by the tile grid and block width of the render and grow to
+    the largest size requested so far.
+
+    Only these buffers are pooled. The unsorted intersection ids, the tile bins,
+    the output image, the final transmittances and the final indices are
+    allocated by the kernels that fill them, and the outputs are returned to the
+    caller or saved for the backward pass, so they are allocated on every frame.
+
+    Note:
+        The sorted gaussian ids are saved for the backward pass and are overwritten
+        by the next frame rendered with the same workspace. Autograd detects this and
+        raises an error if backward is called after the next frame was rendered, so
+        use one workspace per frame in flight.
+
+    Example:
+        >>> workspace = gsplat.Workspace()
+        >>> for step in range(num_steps):
+        >>>     out_img = gsplat.rasterize_gaussians(..., workspace=workspace)
+        >>>     out_img.sum().backward()
+        >>> print(workspace.stats())
+    """
+
+    def __init__(self):
+        self._buffers: Dict[Hashable, Tensor] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        name: str,
+        shape: Sequence[int],
+        dtype: torch.dtype,
+        device: torch.device,
+        key: Hashable = (),
+    ) -> Tensor:
+        """Returns an uninitialized buffer of the given shape.
+
+        The buffer held for (name, key) is reused when it is large enough, otherwise
+        it is replaced by a new allocation.
+
+        Args:
+            name (str): name of the buffer.
+            shape (Sequence[int]): shape of the requested buffer.
+            dtype (torch.dtype): dtype of the requested buffer.
+            device (torch.device): device of the requested buffer.
+            key (Hashable): render configuration the buffer belongs to.
+
+        Returns:
+            A view of the held buffer with the requested shape.
+        """
+        numel = torch.Size(shape).numel()
+        buffer_key = (name, key, dtype, torch.device(device))
+        buffer = self._buffers.get(buffer_key)
+        if buffer is None or buffer.numel() < numel:
+            self.misses += 1
+            buffer = torch.empty(numel, dtype=dtype, device=device)
+            self._buffers[buffer_key] = buffer
+        else:
+            self.hits += 1
+        return buffer[:numel].view(shape)
+
+    @property
+    def bytes_held(self) -> int:
+        """Number of bytes held by the buffers of the workspace."""
+        return sum(x.numel() * x.element_size() for x in self._buffers.values())
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of buffer requests served from the pool (hits) or by a
+        new allocation (misses), and the number of bytes held."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes_held": self.bytes_held,
+            "num_buffers": len(self._buffers),
+        }
+
+    def clear(self) -> None:
+        """Releases every buffer and resets the statistics."""
+        self._buffers.clear()
+        self.hits = 0
+        self.misses = 0
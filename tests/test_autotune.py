@@ -0,0 +1,102 @@
+import json
+
+import pytest
+import torch
+
+
+def _random_scene(num_points, device):
+    means3d = torch.randn((num_points, 3), device=device)
+    means3d[:, 2] += 4
+    scales = 0.1 * torch.rand((num_points, 3), device=device) + 0.01
+    quats = torch.randn((num_points, 4), device=device)
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    colors = torch.rand((num_points, 3), device=device)
+    opacities = torch.rand((num_points, 1), device=device)
+    viewmat = torch.eye(4, device=device)
+    return means3d, scales, quats, colors, opacities, viewmat
+
+
+def test_autotune_block_width(tmp_path, monkeypatch):
+    import gsplat.cpu
+    from gsplat import autotune_block_width, get_autotune_cache_path
+
+    torch.manual_seed(42)
+    monkeypatch.setenv("GSPLAT_CACHE_DIR", str(tmp_path))
+
+    H, W = 32, 48
+    means3d, scales, quats, colors, opacities, viewmat = _random_scene(
+        100, torch.device("cpu")
+    )
+    args = (means3d, scales, 1.0, quats, viewmat, 40.0, 40.0, W / 2, H / 2, H, W)
+    candidates = (8, 16, 32)
+    block_width = autotune_block_width(
+        *args, colors, opacities, candidates=candidates, num_iters=1
+    )
+    assert block_width in candidates
+
+    cache_path = get_autotune_cache_path()
+    assert cache_path.startswith(str(tmp_path))
+    with open(cache_path) as f:
+        assert list(json.load(f).values()) == [block_width]
+
+    # the cached winner is returned without benchmarking
+    assert (
+        autotune_block_width(*args, colors, opacities, candidates=(), num_iters=1)
+        == block_width
+    )
+
+    # a block width tuned for another number of tile threads is not reused
+    num_threads = gsplat.cpu.get_num_threads()
+    gsplat.cpu.set_num_threads(num_threads + 1)
+    try:
+        with pytest.raises(ValueError):
+            autotune_block_width(*args, colors, opacities, candidates=(), num_iters=1)
+    finally:
+        gsplat.cpu.set_num_threads(num_threads)
+
+
+def test_large_block_width_cpu():
+    from gsplat import project_gaussians, rasterize_gaussians
+
+    torch.manual_seed(42)
+
+    H, W = 40, 56
+    means3d, scales, quats, colors, opacities, viewmat = _random_scene(
+        100, torch.device("cpu")
+    )
+
+    out_imgs = []
+    for block_width in (16, 32):
+        xys, depths, radii, conics, _, num_tiles_hit, _ = project_gaussians(
+            means3d,
+            scales,
+            1.0,
+            quats,
+            viewmat,
+            40.0,
+            40.0,
+            W / 2,
+            H / 2,
+            H,
+            W,
+            block_width,
+        )
+        out_imgs.append(
+            rasterize_gaussians(
+                xys,
+                depths,
+                radii,
+                conics,
+                num_tiles_hit,
+                colors,
+                opacities,
+                H,
+                W,
+                block_width,
+            )
+        )
+    torch.testing.assert_close(out_imgs[0], out_imgs[1])
+
+
+if __name__ == "__main__":
+    test_large_block_width_cpu()
@@ -0,0 +1,96 @@
+import pytest
+import torch
+
+import gsplat
+from gsplat import _torch_impl
+from gsplat.project_gaussians import project_gaussians
+from gsplat.rasterize import rasterize_gaussians
+from gsplat.sh import spherical_harmonics
+
+
+def _random_gaussians(num_points, device):
+    means3d = torch.randn((num_points, 3), device=device)
+    scales = torch.rand((num_points, 3), device=device) + 0.2
+    quats = torch.randn((num_points, 4), device=device)
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    viewmat = torch.eye(4, device=device)
+    viewmat[:3, :3] = _torch_impl.quat_to_rotmat(torch.randn(4, device=device))
+    viewmat[2, 3] = 8.0
+    return means3d, scales, quats, viewmat
+
+
+def _render(means3d, scales, quats, viewmat, colors, opacities, H, W):
+    xys, depths, radii, conics, _, num_tiles_hit, _ = project_gaussians(
+        means3d, scales, 0.1, quats, viewmat, W / 2, W / 2, W / 2, H / 2, H, W, 16
+    )
+    return rasterize_gaussians(
+        xys, depths, radii, conics, num_tiles_hit, colors, opacities, H, W, 16
+    )
+
+
+def test_cpu_backend():
+    torch.manual_seed(42)
+
+    assert gsplat.get_backend("cpu") == "cpu"
+    assert "cpu" in gsplat.available_backends()
+
+    num_points = 100
+    H, W = 40, 50
+    means3d, scales, quats, viewmat = _random_gaussians(num_points, "cpu")
+    means3d.requires_grad = True
+    colors = torch.rand((num_points, 3), requires_grad=True)
+    opacities = torch.rand((num_points, 1), requires_grad=True)
+
+    out_img = _render(means3d, scales, quats, viewmat, colors, opacities, H, W)
+    assert out_img.shape == (H, W, 3)
+    out_img.sum().backward()
+    for param in (means3d, colors, opacities):
+        assert torch.isfinite(param.grad).all()
+        assert param.grad.abs().sum() > 0
+
+    viewdirs = torch.randn((num_points, 3))
+    coeffs = torch.rand((num_points, 16, 3), requires_grad=True)
+    sh_colors = spherical_harmonics(3, viewdirs, coeffs)
+    _sh_colors = _torch_impl.compute_sh_color(
+        viewdirs / viewdirs.norm(dim=-1, keepdim=True), coeffs
+    )
+    torch.testing.assert_close(sh_colors, _sh_colors)
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="No CUDA device")
+def test_cpu_backend_matches_cuda():
+    torch.manual_seed(42)
+    device = torch.device("cuda:0")
+
+    num_points = 100
+    H, W = 64, 80
+    means3d, scales, quats, viewmat = _random_gaussians(num_points, device)
+    colors = torch.rand((num_points, 3), device=device)
+    # stay below the alpha clamp, which differs between the cuda passes
+    opacities = 0.9 * torch.rand((num_points, 1), device=device)
+
+    outputs = []
+    grads = []
+    for backend in ("cuda", "cpu"):
+        params = [
+            x.clone().requires_grad_(True)
+            for x in (means3d, scales, colors, opacities)
+        ]
+        with gsplat.use_backend(backend):
+            out_img = _render(
+                params[0], params[1], quats, viewmat, *params[2:], H, W
+            )
+            out_img.sum().backward()
+        outputs.append(out_img.detach())
+        grads.append([p.grad for p in params])
+
+    atol = 1e-3
+    rtol = 1e-3
+    torch.testing.assert_close(outputs[0], outputs[1], atol=atol, rtol=rtol)
+    for grad, _grad in zip(*grads):
+        torch.testing.assert_close(grad, _grad, atol=atol, rtol=rtol)
+
+
+if __name__ == "__main__":
+    test_cpu_backend()
+    test_cpu_backend_matches_cuda()
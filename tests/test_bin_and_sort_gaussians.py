@@ -0,0 +1,91 @@
+import pytest
+import torch
+
+
+@pytest.mark.parametrize("sort_mode", ["compact", "depth"])
+@pytest.mark.parametrize("num_cameras", [1, 2])
+@pytest.mark.parametrize("static_capacity", [False, True])
+def test_bin_and_sort_modes(sort_mode, num_cameras, static_capacity):
+    from gsplat.project_gaussians import project_gaussians
+    from gsplat.utils import bin_and_sort_gaussians
+
+    torch.manual_seed(42)
+
+    num_points = 200
+    H, W = 48, 64
+    block_width = 16
+    means3d = torch.randn((num_points, 3))
+    means3d[:, 2] += 4
+    scales = 0.2 * torch.rand((num_points, 3)) + 0.05
+    quats = torch.randn((num_points, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    tile_bounds = (
+        (W + block_width - 1) // block_width,
+        (H + block_width - 1) // block_width,
+        1,
+    )
+
+    projected = []
+    for _ in range(num_cameras):
+        viewmat = torch.eye(4)
+        viewmat[:3, 3] = 0.5 * torch.randn(3)
+        xys, depths, radii, _, _, num_tiles_hit, _ = project_gaussians(
+            means3d, scales, 1.0, quats, viewmat, W, W, W / 2, H / 2, H, W, block_width
+        )
+        projected.append((xys, depths, radii, num_tiles_hit))
+    xys, depths, radii, num_tiles_hit = (torch.cat(x) for x in zip(*projected))
+    cum_tiles_hit = torch.cumsum(num_tiles_hit, dim=0, dtype=torch.int32)
+    num_intersects = cum_tiles_hit[-1].item()
+    if static_capacity:
+        # leave unused entries at the end of the buffers
+        num_intersects += 100
+
+    args = (
+        num_cameras * num_points,
+        num_intersects,
+        xys,
+        depths,
+        radii,
+        cum_tiles_hit,
+        tile_bounds,
+        block_width,
+        num_cameras,
+        static_capacity,
+    )
+    _, _, _isect_ids_sorted, _gaussian_ids_sorted, _tile_bins = bin_and_sort_gaussians(
+        *args
+    )
+    _, _, isect_ids_sorted, gaussian_ids_sorted, tile_bins = bin_and_sort_gaussians(
+        *args, sort_mode=sort_mode
+    )
+
+    num_used = cum_tiles_hit[-1].item()
+    torch.testing.assert_close(tile_bins, _tile_bins)
+    torch.testing.assert_close(
+        isect_ids_sorted[:num_used], _isect_ids_sorted[:num_used]
+    )
+    torch.testing.assert_close(
+        gaussian_ids_sorted[:num_used], _gaussian_ids_sorted[:num_used]
+    )
+
+
+def test_bin_and_sort_invalid_mode():
+    from gsplat.utils import bin_and_sort_gaussians
+
+    with pytest.raises(ValueError):
+        bin_and_sort_gaussians(
+            1,
+            1,
+            torch.zeros(1, 2),
+            torch.ones(1),
+            torch.ones(1, dtype=torch.int32),
+            torch.ones(1, dtype=torch.int32),
+            (1, 1, 1),
+            16,
+            sort_mode="radix",
+        )
+
+
+if __name__ == "__main__":
+    for sort_mode in ["compact", "depth"]:
+        test_bin_and_sort_modes(sort_mode, 2, True)
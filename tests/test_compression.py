@@ -0,0 +1,75 @@
+import torch
+
+
+def test_compress_gaussians(tmp_path):
+    from gsplat.compression import CompressedGaussians, compress_gaussians
+
+    torch.manual_seed(42)
+
+    num_points = 1000
+    means3d = torch.randn((num_points, 3))
+    scales = torch.rand((num_points, 3)) + 0.01
+    quats = torch.randn((num_points, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    opacities = torch.rand((num_points, 1))
+    sh_coeffs = torch.randn((num_points, 16, 3))
+
+    # with as many codes as gaussians, only the float16 and uint8 storage is lossy
+    scene = compress_gaussians(
+        means3d,
+        scales,
+        quats,
+        opacities,
+        sh_coeffs,
+        num_scale_codes=num_points,
+        num_quat_codes=num_points,
+        num_sh_codes=num_points,
+    )
+    _means3d, _scales, _quats, _opacities, _sh_coeffs = scene.decode()
+    torch.testing.assert_close(_means3d, means3d, atol=5e-3, rtol=1e-3)
+    torch.testing.assert_close(_scales, scales)
+    # q and -q are the same rotation
+    sign = torch.where(quats[:, :1] < 0, -1.0, 1.0)
+    torch.testing.assert_close(_quats, sign * quats)
+    torch.testing.assert_close(_opacities, opacities, atol=1 / 255, rtol=0)
+    torch.testing.assert_close(_sh_coeffs, sh_coeffs, atol=5e-3, rtol=1e-3)
+
+    # small codebooks compress the scene
+    scene = compress_gaussians(
+        means3d,
+        scales,
+        quats,
+        opacities,
+        sh_coeffs,
+        num_scale_codes=64,
+        num_quat_codes=64,
+        num_sh_codes=64,
+    )
+    stats = scene.stats(num_iters=1)
+    assert stats["total"]["ratio"] > 5
+    assert stats["sh_coeffs"]["ratio"] > stats["means3d"]["ratio"]
+    decoded = scene.decode()
+    assert decoded[1].shape == scales.shape
+    assert decoded[4].shape == sh_coeffs.shape
+    assert torch.allclose(decoded[2].norm(dim=-1), torch.ones(num_points))
+
+    # the batches match the full decode
+    batches = list(scene.batches(300))
+    assert len(batches) == 4
+    for x, y in zip(zip(*batches), decoded):
+        torch.testing.assert_close(torch.cat(x), y)
+
+    path = str(tmp_path / "scene.pt")
+    scene.save(path)
+    loaded = CompressedGaussians.load(path)
+    assert len(loaded) == num_points
+    for x, y in zip(loaded.decode(), decoded):
+        torch.testing.assert_close(x, y)
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_compress_gaussians(pathlib.Path(tmp_dir))
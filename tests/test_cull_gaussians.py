@@ -0,0 +1,62 @@
+import torch
+
+
+def test_cull_gaussians():
+    from gsplat import _torch_impl
+    from gsplat.project_gaussians import project_gaussians
+    from gsplat.rasterize import rasterize_gaussians
+    from gsplat.utils import cull_gaussians
+
+    torch.manual_seed(42)
+
+    num_points = 500
+    H, W = 40, 60
+    glob_scale = 0.5
+    # spread the gaussians around and behind the camera
+    means3d = 10 * torch.randn((num_points, 3))
+    scales = torch.rand((num_points, 3)) + 0.1
+    quats = torch.randn((num_points, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    colors = torch.rand((num_points, 3))
+    opacities = torch.rand((num_points, 1))
+    viewmat = torch.eye(4)
+    viewmat[:3, :3] = _torch_impl.quat_to_rotmat(torch.randn(4))
+    intrins = (W / 2, W / 2, W / 2, H / 2)
+
+    indices = cull_gaussians(means3d, scales, glob_scale, viewmat, *intrins, H, W, 16)
+    assert 0 < len(indices) < num_points
+
+    outputs = []
+    grads = []
+    for culled in (False, True):
+        params = [
+            x.clone().requires_grad_(True)
+            for x in (means3d, scales, colors, opacities)
+        ]
+        _means3d, _scales, _colors, _opacities = params
+        _quats = quats
+        if culled:
+            _means3d, _scales, _colors, _opacities = (x[indices] for x in params)
+            _quats = quats[indices]
+        xys, depths, radii, conics, _, num_tiles_hit, _ = project_gaussians(
+            _means3d, _scales, glob_scale, _quats, viewmat, *intrins, H, W, 16
+        )
+        if not culled:
+            # every gaussian with a footprint in the image survives the culling
+            visible = torch.zeros(num_points, dtype=torch.bool)
+            visible[indices] = True
+            assert visible[radii > 0].all()
+        out_img = rasterize_gaussians(
+            xys, depths, radii, conics, num_tiles_hit, _colors, _opacities, H, W, 16
+        )
+        out_img.sum().backward()
+        outputs.append(out_img.detach())
+        grads.append([p.grad for p in params])
+
+    torch.testing.assert_close(outputs[0], outputs[1])
+    for grad, _grad in zip(*grads):
+        torch.testing.assert_close(grad, _grad)
+
+
+if __name__ == "__main__":
+    test_cull_gaussians()
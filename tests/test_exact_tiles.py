@@ -0,0 +1,116 @@
+import torch
+
+
+def test_ellipse_tile_overlap():
+    from gsplat import _torch_impl
+
+    torch.manual_seed(42)
+
+    num_points = 200
+    block_width = 8
+    tile_bounds = (8, 8, 1)
+    xys = 64 * torch.rand((num_points, 2))
+    # thin elongated ellipses in random directions
+    theta = torch.rand(num_points) * torch.pi
+    axes = torch.stack([torch.cos(theta), torch.sin(theta)], dim=-1)
+    normals = torch.stack([-axes[:, 1], axes[:, 0]], dim=-1)
+    cov2d = 40 * axes[:, :, None] * axes[:, None, :] + 0.5 * (
+        normals[:, :, None] * normals[:, None, :]
+    )
+    conics, radii, _ = _torch_impl.compute_cov2d_bounds(cov2d)
+
+    gaussian_ids, tile_x, tile_y = _torch_impl.get_tile_intersects(
+        xys, radii, tile_bounds, block_width
+    )
+    hit = _torch_impl.ellipse_tile_overlap(
+        xys[gaussian_ids], conics[gaussian_ids], tile_x, tile_y, block_width
+    )
+    assert 0 < hit.sum() < len(hit)
+
+    # brute force over the pixel centers of each tile
+    offsets = torch.arange(block_width) + 0.5
+    px = tile_x[:, None, None] * block_width + offsets[None, None, :]
+    py = tile_y[:, None, None] * block_width + offsets[None, :, None]
+    dx = xys[gaussian_ids, 0, None, None] - px
+    dy = xys[gaussian_ids, 1, None, None] - py
+    a, b, c = conics[gaussian_ids].unbind(-1)
+    q = a[:, None, None] * dx**2 + 2 * b[:, None, None] * dx * dy
+    q = q + c[:, None, None] * dy**2
+    q_min = q.flatten(1).min(dim=-1).values
+    # every tile with a blended pixel is kept
+    assert hit[q_min <= 2 * torch.log(torch.tensor(255.0))].all()
+
+
+def test_exact_tiles():
+    from gsplat import get_intersection_stats
+    from gsplat.project_gaussians import project_gaussians
+    from gsplat.rasterize import rasterize_gaussians
+
+    torch.manual_seed(42)
+
+    num_points = 100
+    H, W = 48, 64
+    block_width = 8
+    means3d = torch.randn((num_points, 3))
+    means3d[:, 2] += 5
+    # thin elongated gaussians
+    scales = 0.01 * torch.rand((num_points, 3))
+    scales[:, 0] = 0.5 * torch.rand(num_points) + 0.1
+    quats = torch.randn((num_points, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    colors = torch.rand((num_points, 3))
+    opacities = torch.rand((num_points, 1))
+    viewmat = torch.eye(4)
+    tile_bounds = (W // block_width, H // block_width, 1)
+
+    outputs = []
+    grads = []
+    num_intersects = []
+    for exact_tiles in (False, True):
+        params = [x.clone().requires_grad_(True) for x in (means3d, colors, opacities)]
+        xys, depths, radii, conics, _, num_tiles_hit, _ = project_gaussians(
+            params[0],
+            scales,
+            1.0,
+            quats,
+            viewmat,
+            W,
+            W,
+            W / 2,
+            H / 2,
+            H,
+            W,
+            block_width,
+            exact_tiles=exact_tiles,
+        )
+        out_img = rasterize_gaussians(
+            xys,
+            depths,
+            radii,
+            conics,
+            num_tiles_hit,
+            params[1],
+            params[2],
+            H,
+            W,
+            block_width,
+            exact_tiles=exact_tiles,
+        )
+        out_img.sum().backward()
+        outputs.append(out_img.detach())
+        grads.append([p.grad for p in params])
+        num_intersects.append(num_tiles_hit.sum().item())
+
+    stats = get_intersection_stats(xys, radii, conics, tile_bounds, block_width)
+    assert stats["bbox"] == num_intersects[0]
+    assert stats["exact"] == num_intersects[1]
+    assert stats["eliminated"] > 0
+
+    torch.testing.assert_close(outputs[0], outputs[1])
+    for grad, _grad in zip(*grads):
+        torch.testing.assert_close(grad, _grad)
+
+
+if __name__ == "__main__":
+    test_ellipse_tile_overlap()
+    test_exact_tiles()
@@ -0,0 +1,89 @@
+import torch
+
+
+def _random_gaussians(num_points):
+    means3d = torch.randn((num_points, 3))
+    scales = 0.1 * torch.rand((num_points, 3)) + 0.01
+    quats = torch.randn((num_points, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    return means3d, scales, quats
+
+
+def test_rotmat_to_quat():
+    from gsplat import _torch_impl
+
+    torch.manual_seed(42)
+
+    quats = torch.randn((100, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    rotmats = _torch_impl.normalized_quat_to_rotmat(quats)
+    _quats = _torch_impl.rotmat_to_quat(rotmats)
+    torch.testing.assert_close(
+        _torch_impl.normalized_quat_to_rotmat(_quats), rotmats, atol=1e-5, rtol=1e-5
+    )
+
+
+def test_lod_moments():
+    from gsplat import _torch_impl
+    from gsplat.lod import GaussianLOD
+
+    torch.manual_seed(42)
+
+    num_points = 8
+    glob_scale = 0.5
+    means3d, scales, quats = _random_gaussians(num_points)
+    # low opacities keep the merged opacity below 1
+    opacities = 0.01 * torch.rand((num_points, 1))
+    colors = torch.rand((num_points, 16, 3))
+    lod = GaussianLOD(means3d, scales, quats, opacities, colors, glob_scale, fanout=8)
+
+    assert len(lod.means3d) == num_points + 1
+    covs = _torch_impl.scale_rot_to_cov3d(scales, glob_scale, quats)
+    weights = opacities[:, 0] * torch.linalg.det(covs) ** (1 / 3)
+    weights = weights / weights.sum()
+    mean = (weights[:, None] * means3d).sum(0)
+    d = means3d - mean
+    cov = (weights[:, None, None] * (covs + d[:, :, None] * d[:, None, :])).sum(0)
+
+    _cov = _torch_impl.scale_rot_to_cov3d(lod.scales[-1:], glob_scale, lod.quats[-1:])
+    torch.testing.assert_close(lod.means3d[-1], mean)
+    torch.testing.assert_close(_cov[0], cov, atol=1e-5, rtol=1e-4)
+    torch.testing.assert_close(lod.colors[-1], (weights[:, None, None] * colors).sum(0))
+    # the inputs are the first nodes of the hierarchy
+    torch.testing.assert_close(lod.means3d[:num_points], means3d)
+    torch.testing.assert_close(lod.opacities[:num_points], opacities)
+
+
+def test_lod_select():
+    from gsplat.lod import GaussianLOD
+
+    torch.manual_seed(42)
+
+    num_points = 2000
+    means3d, scales, quats = _random_gaussians(num_points)
+    opacities = torch.rand((num_points, 1))
+    colors = torch.rand((num_points, 3))
+    lod = GaussianLOD(means3d, scales, quats, opacities, colors, 1.0, fanout=4)
+
+    H, W = 40, 60
+    viewmat = torch.eye(4)
+    viewmat[2, 3] = 20.0
+    intrins = (W / 2, W / 2, W / 2, H / 2)
+
+    # without a pixel size, every gaussian in view is selected
+    ids = lod.select(viewmat, *intrins, H, W, pixel_size=0.0)
+    assert (ids < num_points).all()
+    assert len(ids) == num_points
+    # a large pixel size renders the root only
+    ids = lod.select(viewmat, *intrins, H, W, pixel_size=1e6)
+    torch.testing.assert_close(ids, torch.tensor([len(lod.means3d) - 1]))
+    # the budget bounds the number of selected nodes
+    ids = lod.select(viewmat, *intrins, H, W, pixel_size=0.0, max_gaussians=100)
+    assert 0 < len(ids) <= 100
+    assert len(torch.unique(ids)) == len(ids)
+
+
+if __name__ == "__main__":
+    test_rotmat_to_quat()
+    test_lod_moments()
+    test_lod_select()
@@ -0,0 +1,181 @@
+import torch
+
+
+def test_compute_opacity_radius():
+    from gsplat import _torch_impl
+
+    torch.manual_seed(42)
+
+    num_points = 100
+    cov2d = torch.randn((num_points, 2, 2))
+    cov2d = 4 * cov2d @ cov2d.transpose(-1, -2) + 0.3 * torch.eye(2)
+    conics, radii, _ = _torch_impl.compute_cov2d_bounds(cov2d)
+    opacities = torch.rand(num_points)
+    opacity_radius = _torch_impl.compute_opacity_radius(conics, opacities)
+
+    # sample points on the ellipse where alpha reaches 1 / 255
+    level = 2 * torch.log(255 * opacities).clamp(min=0)
+    theta = torch.linspace(0, 2 * torch.pi, 64)
+    dirs = torch.stack([torch.cos(theta), torch.sin(theta)], dim=-1)
+    a, b, c = conics.unbind(-1)
+    q = (
+        a[:, None] * dirs[None, :, 0] ** 2
+        + 2 * b[:, None] * dirs[None, :, 0] * dirs[None, :, 1]
+        + c[:, None] * dirs[None, :, 1] ** 2
+    )
+    dist = torch.sqrt(level[:, None] / q)
+    assert (dist.max(dim=-1).values <= opacity_radius + 1e-4).all()
+    assert (opacity_radius[255 * opacities <= 1] == 0).all()
+    # the cutoff is closer than 3 sigma for low opacities
+    low = (opacities < 0.3) & (255 * opacities > 1)
+    assert (opacity_radius[low] <= radii[low]).all()
+
+
+def test_project_opacity_radius():
+    from gsplat.project_gaussians import project_gaussians
+    from gsplat.rasterize import rasterize_gaussians
+
+    torch.manual_seed(42)
+
+    num_points = 100
+    H, W = 48, 64
+    block_width = 8
+    means3d = torch.randn((num_points, 3))
+    means3d[:, 2] += 5
+    scales = 0.3 * torch.rand((num_points, 3)) + 0.05
+    quats = torch.randn((num_points, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    colors = torch.rand((num_points, 3))
+    # include gaussians too transparent to blend any pixel
+    opacities = 0.2 * torch.rand((num_points, 1))
+    viewmat = torch.eye(4)
+
+    outputs = []
+    grads = []
+    projected = []
+    for opacity in (None, opacities):
+        params = [x.clone().requires_grad_(True) for x in (means3d, colors, opacities)]
+        xys, depths, radii, conics, _, num_tiles_hit, _ = project_gaussians(
+            params[0],
+            scales,
+            1.0,
+            quats,
+            viewmat,
+            W,
+            W,
+            W / 2,
+            H / 2,
+            H,
+            W,
+            block_width,
+            opacity=opacity,
+        )
+        out_img = rasterize_gaussians(
+            xys,
+            depths,
+            radii,
+            conics,
+            num_tiles_hit,
+            params[1],
+            params[2],
+            H,
+            W,
+            block_width,
+        )
+        out_img.sum().backward()
+        outputs.append(out_img.detach())
+        grads.append([p.grad for p in params])
+        projected.append((radii, num_tiles_hit))
+
+    (_radii, _num_tiles_hit), (radii, num_tiles_hit) = projected
+    assert (radii <= _radii).all()
+    assert num_tiles_hit.sum() < _num_tiles_hit.sum()
+
+    torch.testing.assert_close(outputs[0], outputs[1])
+    for grad, _grad in zip(*grads):
+        torch.testing.assert_close(grad, _grad)
+
+
+def test_opacity_radius_border():
+    from gsplat.project_gaussians import project_gaussians
+    from gsplat.utils import compute_cumulative_intersects, map_gaussian_to_intersects
+
+    torch.manual_seed(42)
+
+    num_points = 200
+    H, W = 32, 48
+    block_width = 8
+    tile_bounds = (W // block_width, H // block_width, 1)
+    # low opacity gaussians straddling the left and the top borders of the image
+    pixels = torch.rand((num_points, 2)) * torch.tensor([W, H])
+    border = 12 * torch.rand(num_points) - 10
+    pixels[::2, 0] = border[::2]
+    pixels[1::2, 1] = border[1::2]
+    depth = 5.0
+    means3d = torch.cat(
+        [
+            (pixels - torch.tensor([W / 2, H / 2])) * depth / W,
+            torch.full((num_points, 1), depth),
+        ],
+        dim=-1,
+    )
+    scales = 0.3 * torch.rand((num_points, 3)) + 0.05
+    quats = torch.randn((num_points, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    opacities = 0.2 * torch.rand((num_points, 1)) + 0.01
+    viewmat = torch.eye(4)
+
+    devices = [torch.device("cpu")]
+    if torch.cuda.is_available():
+        devices.append(torch.device("cuda:0"))
+    for device in devices:
+        args = [x.to(device) for x in (means3d, scales, quats, viewmat, opacities)]
+        xys, depths, radii, conics, _, num_tiles_hit, _ = project_gaussians(
+            args[0],
+            args[1],
+            1.0,
+            args[2],
+            args[3],
+            W,
+            W,
+            W / 2,
+            H / 2,
+            H,
+            W,
+            block_width,
+            opacity=args[4],
+        )
+
+        # tile bounding boxes rounded like the cuda kernels
+        center = xys / block_width
+        radius = radii[:, None] / block_width
+        bounds = torch.tensor(tile_bounds[:2], device=device)
+        tile_min = torch.minimum((center - radius).int().clamp(min=0), bounds)
+        tile_max = torch.minimum((center + radius + 1).int().clamp(min=0), bounds)
+        expected = torch.where(radii > 0, (tile_max - tile_min).prod(dim=-1), 0)
+        torch.testing.assert_close(num_tiles_hit.long(), expected.long())
+        # the boxes of some gaussians end within a tile outside of the image
+        end = center + radius
+        assert ((radii[:, None] > 0) & (end > -1) & (end < 0)).any()
+
+        num_intersects, cum_tiles_hit = compute_cumulative_intersects(num_tiles_hit)
+        _, gaussian_ids = map_gaussian_to_intersects(
+            num_points,
+            num_intersects,
+            xys,
+            depths,
+            radii,
+            cum_tiles_hit,
+            tile_bounds,
+            block_width,
+        )
+        # unwritten intersections would be counted for the first gaussian
+        mapped = torch.bincount(gaussian_ids.long(), minlength=num_points)
+        assert cum_tiles_hit[-1] == mapped.sum()
+        torch.testing.assert_close(mapped, num_tiles_hit.long())
+
+
+if __name__ == "__main__":
+    test_compute_opacity_radius()
+    test_project_opacity_radius()
+    test_opacity_radius_border()
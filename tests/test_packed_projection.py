@@ -0,0 +1,75 @@
+import torch
+
+
+def test_packed_projection():
+    from gsplat.project_gaussians import project_gaussians
+    from gsplat.rasterize import rasterize_gaussians
+
+    torch.manual_seed(42)
+
+    num_points = 200
+    H, W = 32, 48
+    block_width = 8
+    # many gaussians are behind the camera or off screen
+    means3d = 4 * torch.randn((num_points, 3))
+    means3d[:, 2] += 2
+    scales = 0.3 * torch.rand((num_points, 3)) + 0.05
+    quats = torch.randn((num_points, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    colors = torch.rand((num_points, 3))
+    opacities = torch.rand((num_points, 1))
+    viewmat = torch.eye(4)
+
+    outputs = []
+    grads = []
+    for packed in (False, True):
+        params = [
+            x.clone().requires_grad_(True)
+            for x in (means3d, scales, quats, colors, opacities)
+        ]
+        projected = project_gaussians(
+            params[0],
+            params[1],
+            1.0,
+            params[2],
+            viewmat,
+            W,
+            W,
+            W / 2,
+            H / 2,
+            H,
+            W,
+            block_width,
+            packed=packed,
+        )
+        xys, depths, radii, conics, _, num_tiles_hit, cov3d = projected[:7]
+        indices = projected[7] if packed else None
+        if packed:
+            assert 0 < len(indices) < num_points
+            assert (num_tiles_hit > 0).all()
+            assert len(xys) == len(cov3d) == len(indices)
+        out_img = rasterize_gaussians(
+            xys,
+            depths,
+            radii,
+            conics,
+            num_tiles_hit,
+            params[3],
+            params[4],
+            H,
+            W,
+            block_width,
+            indices=indices,
+        )
+        out_img.sum().backward()
+        outputs.append(out_img.detach())
+        grads.append([p.grad for p in params])
+
+    torch.testing.assert_close(outputs[0], outputs[1])
+    for grad, _grad in zip(*grads):
+        assert grad.shape == _grad.shape
+        torch.testing.assert_close(grad, _grad)
+
+
+if __name__ == "__main__":
+    test_packed_projection()
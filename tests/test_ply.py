@@ -0,0 +1,84 @@
+import struct
+
+import torch
+
+
+def test_ply_round_trip(tmp_path):
+    from gsplat.ply import load_ply, save_ply
+
+    torch.manual_seed(42)
+
+    num_points = 1000
+    means3d = torch.randn((num_points, 3))
+    scales = torch.rand((num_points, 3)) + 0.01
+    quats = torch.randn((num_points, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    opacities = 0.98 * torch.rand((num_points, 1)) + 0.01
+    sh_coeffs = torch.randn((num_points, 16, 3))
+
+    path = str(tmp_path / "point_cloud.ply")
+    save_ply(path, means3d, scales, quats, opacities, sh_coeffs, batch_size=300)
+    scene = load_ply(path)
+    assert len(scene) == num_points
+    assert scene.num_sh_bases == 16
+
+    # the attributes are views of the file, f_rest is stored channel first
+    num_properties = 3 + 3 + 3 + 45 + 1 + 3 + 4
+    assert scene.means3d.stride() == (num_properties, 1)
+    assert scene.sh_rest.shape == (num_points, 15, 3)
+    assert scene.sh_rest.stride() == (num_properties, 1, 15)
+    torch.testing.assert_close(scene.means3d, means3d)
+    torch.testing.assert_close(scene.quats, quats)
+
+    decoded = scene.decode()
+    for x, y in zip(decoded, (means3d, scales, quats, opacities, sh_coeffs)):
+        assert x.shape == y.shape
+        torch.testing.assert_close(x, y)
+
+    batches = list(scene.batches(300))
+    assert len(batches) == 4
+    for x, y in zip(zip(*batches), decoded):
+        torch.testing.assert_close(torch.cat(x), y)
+
+    # writing to the views does not change the file
+    scene.means3d[0] = 0
+    torch.testing.assert_close(load_ply(path).means3d, means3d)
+
+
+def test_ply_header(tmp_path):
+    from gsplat.ply import load_ply
+
+    names = (
+        ["x", "y", "z", "f_dc_0", "f_dc_1", "f_dc_2", "opacity"]
+        + [f"scale_{i}" for i in range(3)]
+        + [f"rot_{i}" for i in range(4)]
+    )
+    header = "\n".join(
+        [
+            "ply",
+            "format binary_little_endian 1.0",
+            "comment degree 0",
+            "element vertex 2",
+        ]
+        + [f"property float {name}" for name in names]
+        + ["element face 0", "property list uchar int vertex_indices", "end_header\n"]
+    )
+    values = struct.pack(f"<{2 * len(names)}f", *range(2 * len(names)))
+    path = tmp_path / "point_cloud.ply"
+    path.write_bytes(header.encode("ascii") + values)
+
+    scene = load_ply(str(path))
+    assert scene.num_sh_bases == 1
+    means3d, scales, quats, opacities, sh_coeffs = scene.decode()
+    torch.testing.assert_close(means3d, torch.tensor([[0.0, 1, 2], [14, 15, 16]]))
+    assert sh_coeffs.shape == (2, 1, 3)
+    torch.testing.assert_close(opacities, torch.sigmoid(torch.tensor([[6.0], [20]])))
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_ply_round_trip(pathlib.Path(tmp_dir))
+        test_ply_header(pathlib.Path(tmp_dir))
@@ -0,0 +1,101 @@
+import torch
+
+
+def test_reduced_precision():
+    from gsplat.project_gaussians import project_gaussians
+    from gsplat.rasterize import rasterize_gaussians
+    from gsplat.sh import spherical_harmonics
+
+    torch.manual_seed(42)
+
+    num_points = 100
+    H, W = 32, 48
+    block_width = 8
+    means3d = torch.randn((num_points, 3))
+    means3d[:, 2] += 5
+    scales = 0.3 * torch.rand((num_points, 3)) + 0.05
+    quats = torch.randn((num_points, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    coeffs = 0.3 * torch.randn((num_points, 16, 3))
+    opacities = torch.rand((num_points, 1))
+    viewmat = torch.eye(4)
+
+    def render(dtype):
+        params = [
+            x.to(dtype).requires_grad_(True) for x in (means3d, coeffs, opacities)
+        ]
+        xys, depths, radii, conics, _, num_tiles_hit, _ = project_gaussians(
+            params[0],
+            scales.to(dtype),
+            1.0,
+            quats.to(dtype),
+            viewmat,
+            W,
+            W,
+            W / 2,
+            H / 2,
+            H,
+            W,
+            block_width,
+        )
+        assert xys.dtype == torch.float32
+        colors = spherical_harmonics(3, params[0].detach(), params[1]) + 0.5
+        assert colors.dtype == torch.float32
+        out_img = rasterize_gaussians(
+            xys,
+            depths,
+            radii,
+            conics,
+            num_tiles_hit,
+            colors,
+            params[2],
+            H,
+            W,
+            block_width,
+        )
+        assert out_img.dtype == torch.float32
+        out_img.sum().backward()
+        for p in params:
+            assert p.grad.dtype == dtype
+        return out_img.detach(), [p.grad.float() for p in params]
+
+    _img, _grads = render(torch.float32)
+    for dtype in (torch.float16, torch.bfloat16):
+        img, grads = render(dtype)
+        torch.testing.assert_close(img, _img, atol=5e-2, rtol=0)
+        for grad, _grad in zip(grads, _grads):
+            assert (grad - _grad).norm() < 0.1 * _grad.norm()
+
+
+def test_uint8_colors_opacity():
+    from gsplat.project_gaussians import project_gaussians
+    from gsplat.rasterize import rasterize_gaussians
+
+    torch.manual_seed(42)
+
+    num_points = 100
+    H, W = 32, 48
+    block_width = 8
+    means3d = torch.randn((num_points, 3))
+    means3d[:, 2] += 5
+    scales = 0.3 * torch.rand((num_points, 3)) + 0.05
+    quats = torch.randn((num_points, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    colors = torch.randint(0, 256, (num_points, 3), dtype=torch.uint8)
+    opacities = torch.randint(0, 256, (num_points, 1), dtype=torch.uint8)
+    viewmat = torch.eye(4)
+
+    xys, depths, radii, conics, _, num_tiles_hit, _ = project_gaussians(
+        means3d, scales, 1.0, quats, viewmat, W, W, W / 2, H / 2, H, W, block_width
+    )
+    args = (xys, depths, radii, conics, num_tiles_hit)
+    out_img = rasterize_gaussians(*args, colors, opacities, H, W, block_width)
+    _out_img = rasterize_gaussians(
+        *args, colors.float() / 255, opacities.float() / 255, H, W, block_width
+    )
+    torch.testing.assert_close(out_img, _out_img)
+
+
+if __name__ == "__main__":
+    test_reduced_precision()
+    test_uint8_colors_opacity()
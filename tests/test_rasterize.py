@@ -0,0 +1,431 @@
+import pytest
+import torch
+
+
+device = torch.device("cuda:0")
+
+
+def _setup_scene(num_points, H, W, BLOCK_SIZE, channels=3, device=device):
+    from gsplat import _torch_impl
+
+    means3d = torch.randn((num_points, 3), device=device)
+    scales = torch.rand((num_points, 3), device=device) + 0.2
+    glob_scale = 0.1
+    quats = torch.randn((num_points, 4), device=device)
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    viewmat = torch.eye(4, device=device)
+    viewmat[2, 3] = 8.0
+    fx, fy = W / 2, W / 2
+    clip_thresh = 0.01
+
+    (
+        _cov3d,
+        _cov2d,
+        xys,
+        depths,
+        radii,
+        conics,
+        _compensation,
+        num_tiles_hit,
+        _masks,
+    ) = _torch_impl.project_gaussians_forward(
+        means3d,
+        scales,
+        glob_scale,
+        quats,
+        viewmat,
+        (fx, fy, W / 2, H / 2),
+        (W, H),
+        BLOCK_SIZE,
+        clip_thresh,
+    )
+    colors = torch.rand((num_points, channels), device=device)
+    # stay below the alpha clamp, which has no gradient
+    opacities = 0.9 * torch.rand((num_points, 1), device=device)
+    return xys, depths, radii, conics, num_tiles_hit, colors, opacities
+
+
+def _bin_gaussians(num_points, xys, depths, radii, num_tiles_hit, tile_bounds, B):
+    from gsplat import _torch_impl
+
+    cum_tiles_hit = torch.cumsum(num_tiles_hit, dim=0, dtype=torch.int32)
+    num_intersects = cum_tiles_hit[-1].item()
+    isect_ids, gaussian_ids = _torch_impl.map_gaussian_to_intersects(
+        num_points, xys, depths, radii, cum_tiles_hit, tile_bounds, B
+    )
+    isect_ids_sorted, sorted_indices = torch.sort(isect_ids)
+    gaussian_ids_sorted = torch.gather(gaussian_ids, 0, sorted_indices)
+    tile_bins = _torch_impl.get_tile_bin_edges(
+        num_intersects, isect_ids_sorted, tile_bounds
+    )
+    return gaussian_ids_sorted, tile_bins
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="No CUDA device")
+def test_rasterize_forward():
+    from gsplat import _torch_impl
+    import gsplat.cuda as _C
+
+    torch.manual_seed(42)
+
+    num_points = 100
+    H, W = 100, 120
+    BLOCK_SIZE = 16
+    tile_bounds = (
+        (W + BLOCK_SIZE - 1) // BLOCK_SIZE,
+        (H + BLOCK_SIZE - 1) // BLOCK_SIZE,
+        1,
+    )
+    block = (BLOCK_SIZE, BLOCK_SIZE, 1)
+    img_size = (W, H, 1)
+
+    xys, depths, radii, conics, num_tiles_hit, colors, opacities = _setup_scene(
+        num_points, H, W, BLOCK_SIZE
+    )
+    background = torch.rand(3, device=device)
+    gaussian_ids_sorted, tile_bins = _bin_gaussians(
+        num_points, xys, depths, radii, num_tiles_hit, tile_bounds, BLOCK_SIZE
+    )
+
+    out_img, final_Ts, final_idx = _C.rasterize_forward(
+        tile_bounds,
+        block,
+        img_size,
+        gaussian_ids_sorted,
+        tile_bins,
+        xys,
+        conics,
+        colors,
+        opacities,
+        background,
+    )
+    _out_img, _final_Ts, _final_idx = _torch_impl.rasterize_forward(
+        tile_bounds,
+        block,
+        img_size,
+        gaussian_ids_sorted,
+        tile_bins,
+        xys,
+        conics,
+        colors,
+        opacities,
+        background,
+        batch_size=32,
+    )
+
+    atol = 1e-4
+    rtol = 1e-4
+    torch.testing.assert_close(out_img, _out_img, atol=atol, rtol=rtol)
+    torch.testing.assert_close(final_Ts, _final_Ts, atol=atol, rtol=rtol)
+    torch.testing.assert_close(final_idx, _final_idx)
+
+
+@pytest.mark.parametrize("channels", [3, 5])
+def test_rasterize_backward(channels):
+    from gsplat import _torch_impl
+
+    torch.manual_seed(42)
+
+    cpu = torch.device("cpu")
+    num_points = 100
+    H, W = 50, 70
+    BLOCK_SIZE = 16
+    tile_bounds = (
+        (W + BLOCK_SIZE - 1) // BLOCK_SIZE,
+        (H + BLOCK_SIZE - 1) // BLOCK_SIZE,
+        1,
+    )
+    block = (BLOCK_SIZE, BLOCK_SIZE, 1)
+    img_size = (W, H, 1)
+
+    xys, depths, radii, conics, num_tiles_hit, colors, opacities = _setup_scene(
+        num_points, H, W, BLOCK_SIZE, channels, cpu
+    )
+    background = torch.rand(channels)
+    gaussian_ids_sorted, tile_bins = _bin_gaussians(
+        num_points, xys, depths, radii, num_tiles_hit, tile_bounds, BLOCK_SIZE
+    )
+
+    inputs = [x.clone().requires_grad_(True) for x in (xys, conics, colors, opacities)]
+    out_img, final_Ts, final_idx = _torch_impl.rasterize_forward(
+        tile_bounds,
+        block,
+        img_size,
+        gaussian_ids_sorted,
+        tile_bins,
+        *inputs,
+        background,
+        batch_size=32,
+    )
+    v_out_img = torch.randn_like(out_img)
+    v_out_alpha = torch.randn_like(final_Ts)
+    _grads = torch.autograd.grad(
+        (out_img, 1 - final_Ts), inputs, (v_out_img, v_out_alpha)
+    )
+
+    v_xy, v_xy_abs, v_conic, v_colors, v_opacity = _torch_impl.rasterize_backward(
+        tile_bounds,
+        block,
+        img_size,
+        gaussian_ids_sorted,
+        tile_bins,
+        xys,
+        conics,
+        colors,
+        opacities,
+        background,
+        final_Ts.detach(),
+        final_idx,
+        v_out_img,
+        v_out_alpha,
+        batch_size=32,
+    )
+
+    atol = 1e-4
+    rtol = 1e-3
+    for grad, _grad in zip((v_xy, v_conic, v_colors, v_opacity), _grads):
+        torch.testing.assert_close(grad, _grad, atol=atol, rtol=rtol)
+    assert (v_xy_abs >= v_xy.abs() - atol).all()
+
+
+def test_rasterize_threads():
+    from gsplat import _torch_impl
+
+    torch.manual_seed(42)
+
+    cpu = torch.device("cpu")
+    num_points = 200
+    H, W = 70, 90
+    BLOCK_SIZE = 16
+    tile_bounds = (
+        (W + BLOCK_SIZE - 1) // BLOCK_SIZE,
+        (H + BLOCK_SIZE - 1) // BLOCK_SIZE,
+        1,
+    )
+    block = (BLOCK_SIZE, BLOCK_SIZE, 1)
+    img_size = (W, H, 1)
+
+    xys, depths, radii, conics, num_tiles_hit, colors, opacities = _setup_scene(
+        num_points, H, W, BLOCK_SIZE, device=cpu
+    )
+    background = torch.rand(3)
+    gaussian_ids_sorted, tile_bins = _bin_gaussians(
+        num_points, xys, depths, radii, num_tiles_hit, tile_bounds, BLOCK_SIZE
+    )
+    inputs = (xys, conics, colors, opacities, background)
+    v_out_img = torch.randn((H, W, 3))
+    v_out_alpha = torch.randn((H, W))
+
+    outputs = []
+    for num_threads in (1, 4):
+        out_img, final_Ts, final_idx = _torch_impl.rasterize_forward(
+            tile_bounds,
+            block,
+            img_size,
+            gaussian_ids_sorted,
+            tile_bins,
+            *inputs,
+            num_threads=num_threads,
+        )
+        grads = _torch_impl.rasterize_backward(
+            tile_bounds,
+            block,
+            img_size,
+            gaussian_ids_sorted,
+            tile_bins,
+            *inputs,
+            final_Ts,
+            final_idx,
+            v_out_img,
+            v_out_alpha,
+            num_threads=num_threads,
+        )
+        outputs.append((out_img, final_Ts, final_idx, *grads))
+
+    # the threaded output must match the single threaded one bit for bit
+    for output, _output in zip(*outputs):
+        assert torch.equal(output, _output)
+
+
+def test_rasterize_gaussians_batch():
+    from gsplat import _torch_impl
+    from gsplat.project_gaussians import project_gaussians, project_gaussians_batch
+    from gsplat.rasterize import rasterize_gaussians, rasterize_gaussians_batch
+
+    torch.manual_seed(42)
+
+    num_points = 100
+    num_cameras = 3
+    # a height that is not a multiple of the block width pads every camera
+    H, W = 45, 50
+    means3d = torch.randn((num_points, 3))
+    scales = torch.rand((num_points, 3)) + 0.2
+    quats = torch.randn((num_points, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    colors = torch.rand((num_points, 3))
+    opacities = torch.rand((num_points, 1))
+    viewmats = torch.eye(4).repeat(num_cameras, 1, 1)
+    viewmats[:, :3, :3] = _torch_impl.quat_to_rotmat(torch.randn(num_cameras, 4))
+    viewmats[:, 2, 3] = 8.0
+    fx = torch.tensor([40.0, 50.0, 60.0])
+    v_out_img = torch.randn((num_cameras, H, W, 3))
+
+    outputs = []
+    grads = []
+    for batched in (True, False):
+        params = [x.clone().requires_grad_(True) for x in (means3d, colors, opacities)]
+        if batched:
+            xys, depths, radii, conics, _, num_tiles_hit, _ = project_gaussians_batch(
+                params[0], scales, 1, quats, viewmats, fx, fx, W / 2, H / 2, H, W, 16
+            )
+            out_img = rasterize_gaussians_batch(
+                xys, depths, radii, conics, num_tiles_hit, *params[1:], H, W, 16
+            )
+        else:
+            out_img = []
+            for i in range(num_cameras):
+                xys, depths, radii, conics, _, num_tiles_hit, _ = project_gaussians(
+                    params[0],
+                    scales,
+                    1,
+                    quats,
+                    viewmats[i],
+                    fx[i].item(),
+                    fx[i].item(),
+                    W / 2,
+                    H / 2,
+                    H,
+                    W,
+                    16,
+                )
+                out_img.append(
+                    rasterize_gaussians(
+                        xys, depths, radii, conics, num_tiles_hit, *params[1:], H, W, 16
+                    )
+                )
+            out_img = torch.stack(out_img)
+        (out_img * v_out_img).sum().backward()
+        outputs.append(out_img.detach())
+        grads.append([p.grad for p in params])
+
+    # the cameras are offset in the stacked image, which changes the rounding
+    atol = 1e-4
+    rtol = 1e-4
+    assert outputs[0].shape == (num_cameras, H, W, 3)
+    torch.testing.assert_close(outputs[0], outputs[1], atol=atol, rtol=rtol)
+    for grad, _grad in zip(*grads):
+        torch.testing.assert_close(grad, _grad, atol=atol, rtol=rtol)
+
+
+def test_rasterize_max_intersects():
+    from gsplat.rasterize import rasterize_gaussians
+
+    torch.manual_seed(42)
+
+    cpu = torch.device("cpu")
+    num_points = 100
+    H, W = 50, 70
+    xys, depths, radii, conics, num_tiles_hit, colors, opacities = _setup_scene(
+        num_points, H, W, 16, device=cpu
+    )
+    num_intersects = num_tiles_hit.sum().item()
+
+    outputs = []
+    for max_intersects in (None, num_intersects, 2 * num_intersects):
+        _colors = colors.clone().requires_grad_(True)
+        out = rasterize_gaussians(
+            xys,
+            depths,
+            radii,
+            conics,
+            num_tiles_hit,
+            _colors,
+            opacities,
+            H,
+            W,
+            16,
+            max_intersects=max_intersects,
+        )
+        if max_intersects is not None:
+            out, _num_intersects = out
+            assert _num_intersects.item() == num_intersects
+        out.sum().backward()
+        outputs.append((out.detach(), _colors.grad))
+    for out, _out in zip(outputs[0], outputs[1]):
+        torch.testing.assert_close(out, _out)
+    for out, _out in zip(outputs[0], outputs[2]):
+        torch.testing.assert_close(out, _out)
+
+    # gaussians that do not fit are dropped, the count reports the overflow
+    out, _num_intersects = rasterize_gaussians(
+        xys,
+        depths,
+        radii,
+        conics,
+        num_tiles_hit,
+        colors,
+        opacities,
+        H,
+        W,
+        16,
+        max_intersects=num_intersects // 2,
+    )
+    assert _num_intersects.item() == num_intersects
+    assert torch.isfinite(out).all()
+
+
+def test_rasterize_workspace():
+    from gsplat.rasterize import rasterize_gaussians
+    from gsplat.workspace import Workspace
+
+    torch.manual_seed(42)
+
+    cpu = torch.device("cpu")
+    num_points = 100
+    H, W = 50, 70
+    xys, depths, radii, conics, num_tiles_hit, colors, opacities = _setup_scene(
+        num_points, H, W, 16, device=cpu
+    )
+    colors.requires_grad = True
+    out_img = rasterize_gaussians(
+        xys, depths, radii, conics, num_tiles_hit, colors, opacities, H, W, 16
+    )
+    (v_colors,) = torch.autograd.grad(out_img.sum(), colors)
+
+    workspace = Workspace()
+    for step in range(3):
+        _out_img = rasterize_gaussians(
+            xys,
+            depths,
+            radii,
+            conics,
+            num_tiles_hit,
+            colors,
+            opacities,
+            H,
+            W,
+            16,
+            workspace=workspace,
+        )
+        (_v_colors,) = torch.autograd.grad(_out_img.sum(), colors)
+        torch.testing.assert_close(_out_img, out_img)
+        torch.testing.assert_close(_v_colors, v_colors)
+        if step == 0:
+            stats = workspace.stats()
+            assert stats["hits"] == 0
+            assert stats["bytes_held"] > 0
+
+    # the buffers are allocated on the first frame only
+    assert workspace.stats()["misses"] == stats["misses"]
+    assert workspace.stats()["hits"] == 2 * stats["misses"]
+    workspace.clear()
+    assert workspace.bytes_held == 0
+
+
+if __name__ == "__main__":
+    test_rasterize_forward()
+    test_rasterize_backward(3)
+    test_rasterize_threads()
+    test_rasterize_gaussians_batch()
+    test_rasterize_max_intersects()
+    test_rasterize_workspace()
@@ -0,0 +1,94 @@
+import torch
+
+
+def test_recompute_bins():
+    from gsplat.project_gaussians import project_gaussians_batch
+    from gsplat.rasterize import rasterize_gaussians, rasterize_gaussians_batch
+
+    torch.manual_seed(42)
+
+    num_points = 100
+    num_cameras = 2
+    H, W = 32, 48
+    block_width = 8
+    means3d = torch.randn((num_points, 3))
+    means3d[:, 2] += 5
+    scales = 0.3 * torch.rand((num_points, 3)) + 0.05
+    quats = torch.randn((num_points, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    colors = torch.rand((num_points, 3))
+    opacities = torch.rand((num_points, 1))
+    viewmats = torch.eye(4).repeat(num_cameras, 1, 1)
+    viewmats[1, 0, 3] = 0.5
+
+    projected = project_gaussians_batch(
+        means3d, scales, 1.0, quats, viewmats, W, W, W / 2, H / 2, H, W, block_width
+    )
+    xys, depths, radii, conics, _, num_tiles_hit, _ = (x.detach() for x in projected)
+
+    def saved_bytes(fn):
+        # bytes of the tensors kept for the backward pass
+        num_bytes = []
+
+        def pack(x):
+            num_bytes.append(x.numel() * x.element_size())
+            return x
+
+        with torch.autograd.graph.saved_tensors_hooks(pack, lambda x: x):
+            out = fn()
+        return out, sum(num_bytes)
+
+    for batched in (False, True):
+        outputs = []
+        grads = []
+        num_bytes = []
+        for recompute_bins in (False, True):
+            params = [x.clone().requires_grad_(True) for x in (xys, conics, colors)]
+
+            def fn():
+                if batched:
+                    return rasterize_gaussians_batch(
+                        params[0],
+                        depths,
+                        radii,
+                        params[1],
+                        num_tiles_hit,
+                        params[2],
+                        opacities,
+                        H,
+                        W,
+                        block_width,
+                        return_alpha=True,
+                        recompute_bins=recompute_bins,
+                    )
+                return rasterize_gaussians(
+                    params[0][0],
+                    depths[0],
+                    radii[0],
+                    params[1][0],
+                    num_tiles_hit[0],
+                    params[2],
+                    opacities,
+                    H,
+                    W,
+                    block_width,
+                    return_alpha=True,
+                    recompute_bins=recompute_bins,
+                )
+
+            (out_img, out_alpha), _num_bytes = saved_bytes(fn)
+            (out_img.sum() + out_alpha.sum()).backward()
+            outputs.append((out_img.detach(), out_alpha.detach()))
+            grads.append([p.grad for p in params])
+            num_bytes.append(_num_bytes)
+
+        for x, y in zip(*outputs):
+            torch.testing.assert_close(x, y)
+        for grad, _grad in zip(*grads):
+            torch.testing.assert_close(grad, _grad)
+        # the intersections outnumber the gaussians
+        assert num_bytes[1] < num_bytes[0]
+
+
+if __name__ == "__main__":
+    test_recompute_bins()
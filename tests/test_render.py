@@ -0,0 +1,93 @@
+import torch
+
+
+def test_render():
+    from gsplat.project_gaussians import project_gaussians
+    from gsplat.rasterize import rasterize_gaussians
+    from gsplat.render import render
+    from gsplat.sh import spherical_harmonics
+
+    torch.manual_seed(42)
+
+    num_points = 100
+    H, W = 32, 48
+    block_width = 8
+    means3d = torch.randn((num_points, 3))
+    means3d[:, 2] += 5
+    scales = 0.3 * torch.rand((num_points, 3)) + 0.05
+    quats = torch.randn((num_points, 4))
+    opacities = torch.randn((num_points, 1))
+    viewmat = torch.eye(4)
+    background = torch.rand(3)
+
+    for colors in (torch.randn((num_points, 3)), 0.3 * torch.randn((num_points, 9, 3))):
+        outputs = []
+        grads = []
+        for fused in (False, True):
+            params = [
+                x.clone().requires_grad_(True)
+                for x in (means3d, scales, quats, colors, opacities)
+            ]
+            if fused:
+                out_img, out_alpha, stats = render(
+                    *params,
+                    viewmat,
+                    W,
+                    W,
+                    W / 2,
+                    H / 2,
+                    H,
+                    W,
+                    block_width,
+                    background=background,
+                    return_alpha=True,
+                    return_stats=True,
+                )
+                assert 0 < stats["saved_bytes"] < stats["unfused_saved_bytes"]
+                assert stats["bytes_saved"] > 0
+            else:
+                xys, depths, radii, conics, _, num_tiles_hit, _ = project_gaussians(
+                    params[0],
+                    params[1],
+                    1.0,
+                    params[2] / params[2].norm(dim=-1, keepdim=True),
+                    viewmat,
+                    W,
+                    W,
+                    W / 2,
+                    H / 2,
+                    H,
+                    W,
+                    block_width,
+                )
+                if colors.ndimension() == 3:
+                    rgbs = spherical_harmonics(2, params[0], params[3])
+                    rgbs = torch.clamp_min(rgbs + 0.5, 0.0)
+                else:
+                    rgbs = torch.sigmoid(params[3])
+                out_img, out_alpha = rasterize_gaussians(
+                    xys,
+                    depths,
+                    radii,
+                    conics,
+                    num_tiles_hit,
+                    rgbs,
+                    torch.sigmoid(params[4]),
+                    H,
+                    W,
+                    block_width,
+                    background=background,
+                    return_alpha=True,
+                )
+            (out_img.sum() + out_alpha.sum()).backward()
+            outputs.append((out_img.detach(), out_alpha.detach()))
+            grads.append([p.grad for p in params])
+
+        for x, y in zip(*outputs):
+            torch.testing.assert_close(x, y)
+        for grad, _grad in zip(*grads):
+            torch.testing.assert_close(grad, _grad)
+
+
+if __name__ == "__main__":
+    test_render()
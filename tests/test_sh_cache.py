@@ -0,0 +1,81 @@
+import math
+
+import torch
+
+
+def test_sh_color_cache():
+    from gsplat import sh
+    from gsplat.sh_cache import SHColorCache
+
+    torch.manual_seed(42)
+
+    num_points = 200
+    degree = 3
+    means3d = torch.randn(num_points, 3)
+    coeffs = torch.rand(num_points, sh.num_sh_bases(degree), 3)
+    degrees = torch.randint(0, degree + 1, (num_points,))
+    packed = sh.pack_sh_coeffs(coeffs, degrees)
+    tolerance = 0.02
+
+    for packed_layout in (False, True):
+        cache = SHColorCache(angle_tolerance=tolerance)
+        kwargs = {"degrees": degrees} if packed_layout else {}
+        _coeffs = packed if packed_layout else coeffs
+        camera = torch.tensor([0.0, 0.0, -5.0])
+        num_evaluated = 0
+        for step in range(5):
+            viewdirs = means3d - camera
+            colors = cache(degree, viewdirs, _coeffs, **kwargs)
+            stats = cache.stats()
+            if step == 0:
+                assert stats["fraction"] == 1
+            else:
+                assert stats["fraction"] < 1
+                num_evaluated += stats["num_evaluated"]
+
+            # the cached colors were evaluated within the tolerance
+            dirs = torch.nn.functional.normalize(viewdirs, dim=-1)
+            cos = (dirs * cache.viewdirs).sum(dim=-1)
+            assert (cos >= math.cos(tolerance) - 1e-6).all()
+            _colors = sh.spherical_harmonics(degree, cache.viewdirs, _coeffs, **kwargs)
+            torch.testing.assert_close(colors, _colors)
+            camera = camera + torch.tensor([0.05, 0.0, 0.0])
+        assert num_evaluated > 0
+
+        cache.invalidate(torch.arange(10))
+        cache(degree, viewdirs, _coeffs, **kwargs)
+        assert cache.stats()["num_evaluated"] == 10
+
+    # the cache is reset when the packed layout changes
+    cache = SHColorCache(angle_tolerance=tolerance)
+    viewdirs = means3d - torch.tensor([0.0, 0.0, -5.0])
+    cache(degree, viewdirs, packed, degrees=degrees)
+    coeffs[:, 1:] *= 1e-3
+    packed = sh.pack_sh_coeffs(coeffs, degrees)
+    packed, demoted = sh.demote_sh_degrees(packed, degrees)
+    assert len(packed) < len(sh.pack_sh_coeffs(coeffs, degrees))
+    colors = cache(degree, viewdirs, packed, degrees=demoted)
+    assert cache.stats()["fraction"] == 1
+    _colors = sh.spherical_harmonics(degree, cache.viewdirs, packed, degrees=demoted)
+    torch.testing.assert_close(colors, _colors)
+
+
+def test_select_packed_coeffs():
+    from gsplat import sh
+
+    torch.manual_seed(42)
+
+    num_points = 50
+    coeffs = torch.rand(num_points, sh.num_sh_bases(4), 3)
+    degrees = torch.randint(0, 5, (num_points,))
+    packed = sh.pack_sh_coeffs(coeffs, degrees)
+    indices = torch.randperm(num_points)[:20]
+    torch.testing.assert_close(
+        sh.select_packed_coeffs(packed, degrees, indices),
+        sh.pack_sh_coeffs(coeffs[indices], degrees[indices]),
+    )
+
+
+if __name__ == "__main__":
+    test_sh_color_cache()
+    test_select_packed_coeffs()
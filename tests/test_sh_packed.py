@@ -0,0 +1,64 @@
+import pytest
+import torch
+
+
+@pytest.mark.parametrize("method", ["poly", "fast"])
+def test_sh_packed(method):
+    from gsplat import sh
+
+    torch.manual_seed(42)
+
+    num_points = 100
+    degree = 4
+    degrees_to_use = 3
+    viewdirs = torch.randn(num_points, 3)
+    degrees = torch.randint(0, degree + 1, (num_points,))
+    coeffs = torch.rand(num_points, sh.num_sh_bases(degree), 3)
+    # the dense reference has zeros past the degree of each gaussian
+    coeffs = sh.unpack_sh_coeffs(sh.pack_sh_coeffs(coeffs, degrees), degrees)
+    coeffs.requires_grad = True
+    packed = sh.pack_sh_coeffs(coeffs.detach(), degrees).requires_grad_(True)
+    assert packed.shape[0] == ((degrees + 1) ** 2).sum()
+
+    _colors = sh.spherical_harmonics(degrees_to_use, viewdirs, coeffs, method)
+    colors = sh.spherical_harmonics(
+        degrees_to_use, viewdirs, packed, method, degrees=degrees
+    )
+    torch.testing.assert_close(colors, _colors)
+
+    v_colors = torch.randn_like(colors)
+    (_colors * v_colors).sum().backward()
+    (colors * v_colors).sum().backward()
+    torch.testing.assert_close(
+        packed.grad, sh.pack_sh_coeffs(coeffs.grad, degrees), atol=1e-5, rtol=1e-5
+    )
+
+
+def test_demote_sh_degrees():
+    from gsplat import sh
+
+    torch.manual_seed(42)
+
+    num_points = 100
+    degrees = torch.full((num_points,), 3)
+    coeffs = torch.rand(num_points, sh.num_sh_bases(3), 3)
+    # the bands above degree 1 of the first half are negligible
+    coeffs[: num_points // 2, 4:] *= 1e-4
+    # the last gaussian has no view dependent color
+    coeffs[-1, 1:] = 0
+    packed = sh.pack_sh_coeffs(coeffs, degrees)
+
+    packed, new_degrees = sh.demote_sh_degrees(packed, degrees, threshold=1e-3)
+    assert (new_degrees[: num_points // 2] == 1).all()
+    assert (new_degrees[num_points // 2 : -1] == 3).all()
+    assert new_degrees[-1] == 0
+
+    dense = sh.unpack_sh_coeffs(packed, new_degrees, degree=3)
+    kept = sh._packed_mask(new_degrees, sh.num_sh_bases(3))
+    torch.testing.assert_close(dense[kept], coeffs[kept])
+    assert (dense[~kept] == 0).all()
+
+
+if __name__ == "__main__":
+    test_sh_packed("fast")
+    test_demote_sh_degrees()
@@ -0,0 +1,72 @@
+import torch
+
+
+def _random_scene(num_points):
+    means3d = 10 * torch.randn((num_points, 3))
+    scales = 0.2 * torch.rand((num_points, 3))
+    return means3d, scales
+
+
+def test_query_radius():
+    from gsplat.spatial_index import SpatialIndex
+
+    torch.manual_seed(42)
+
+    num_points = 5000
+    glob_scale = 0.5
+    means3d, scales = _random_scene(num_points)
+    index = SpatialIndex(means3d, scales, glob_scale, leaf_size=16, fanout=4)
+
+    def brute_force(center, radius):
+        sigmas = glob_scale * scales.amax(dim=-1)
+        dist = (means3d - center).norm(dim=-1)
+        return (dist <= radius + 3 * sigmas).nonzero().squeeze(-1)
+
+    center = torch.tensor([1.0, 2.0, -1.0])
+    indices = index.query_radius(center, 5.0)
+    assert 0 < len(indices) < num_points
+    torch.testing.assert_close(indices, brute_force(center, 5.0))
+
+    # move some of the gaussians and refit the nodes they belong to
+    moved = torch.randperm(num_points)[:500]
+    means3d[moved] = 10 * torch.randn((500, 3))
+    scales[moved] = 0.5 * torch.rand((500, 3))
+    index.refit(means3d, scales, glob_scale, moved)
+    torch.testing.assert_close(
+        index.query_radius(center, 5.0), brute_force(center, 5.0)
+    )
+    index.refit(means3d, scales, glob_scale)
+    torch.testing.assert_close(
+        index.query_radius(center, 5.0), brute_force(center, 5.0)
+    )
+
+
+def test_query_frustum():
+    from gsplat import _torch_impl
+    from gsplat.spatial_index import SpatialIndex
+    from gsplat.utils import cull_gaussians
+
+    torch.manual_seed(42)
+
+    num_points = 5000
+    glob_scale = 1.0
+    means3d, scales = _random_scene(num_points)
+    index = SpatialIndex(means3d, scales, glob_scale, leaf_size=16)
+
+    H, W = 40, 60
+    viewmat = torch.eye(4)
+    viewmat[:3, :3] = _torch_impl.quat_to_rotmat(torch.randn(4))
+    intrins = (W / 2, W / 2, W / 2, H / 2)
+    indices = index.query_frustum(viewmat, *intrins, H, W, 16)
+    _indices = cull_gaussians(means3d, scales, glob_scale, viewmat, *intrins, H, W, 16)
+
+    # the query keeps every gaussian kept by the culling, and few others
+    assert len(indices) < num_points
+    found = torch.zeros(num_points, dtype=torch.bool)
+    found[indices] = True
+    assert found[_indices].all()
+
+
+if __name__ == "__main__":
+    test_query_radius()
+    test_query_frustum()
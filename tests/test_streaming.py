@@ -0,0 +1,163 @@
+import pytest
+import torch
+
+
+def test_render_streaming(tmp_path):
+    from gsplat.ply import load_ply, save_ply
+    from gsplat.project_gaussians import project_gaussians
+    from gsplat.rasterize import rasterize_gaussians
+    from gsplat.sh import spherical_harmonics
+    from gsplat.streaming import render_streaming
+
+    torch.manual_seed(42)
+
+    num_points = 500
+    H, W = 32, 48
+    block_width = 8
+    # half of the gaussians are behind the camera
+    means3d = 4 * torch.randn((num_points, 3))
+    means3d[:, 2] += 2
+    scales = 0.3 * torch.rand((num_points, 3)) + 0.05
+    quats = torch.randn((num_points, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    opacities = 0.98 * torch.rand((num_points, 1)) + 0.01
+    sh_coeffs = 0.3 * torch.randn((num_points, 9, 3))
+    viewmat = torch.eye(4)
+    background = torch.rand(3)
+
+    xys, depths, radii, conics, _, num_tiles_hit, _ = project_gaussians(
+        means3d, scales, 1.0, quats, viewmat, W, W, W / 2, H / 2, H, W, block_width
+    )
+    colors = spherical_harmonics(2, means3d, sh_coeffs)
+    colors = torch.clamp_min(colors + 0.5, 0.0)
+    _out_img = rasterize_gaussians(
+        xys,
+        depths,
+        radii,
+        conics,
+        num_tiles_hit,
+        colors,
+        opacities,
+        H,
+        W,
+        block_width,
+        background=background,
+    )
+
+    path = str(tmp_path / "point_cloud.ply")
+    save_ply(path, means3d, scales, quats, opacities, sh_coeffs)
+    scene = load_ply(path)
+    args = (viewmat, W, W, W / 2, H / 2, H, W, block_width)
+    out_img = render_streaming(scene.batches(128), *args, background=background)
+    torch.testing.assert_close(out_img, _out_img)
+
+    # precomputed colors are rasterized as is
+    chunks = [
+        (means3d[i : i + 128], scales[i : i + 128], quats[i : i + 128])
+        + (opacities[i : i + 128], colors[i : i + 128])
+        for i in range(0, num_points, 128)
+    ]
+    out_img = render_streaming(chunks, *args, background=background)
+    torch.testing.assert_close(out_img, _out_img)
+
+
+def test_render_streaming_culled_chunks():
+    from gsplat.streaming import render_streaming
+
+    torch.manual_seed(42)
+
+    num_points = 100
+    H, W = 32, 48
+    block_width = 8
+    means3d = torch.randn((num_points, 3))
+    means3d[:, 2] += 4
+    scales = 0.3 * torch.rand((num_points, 3)) + 0.05
+    quats = torch.randn((num_points, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    opacities = 0.98 * torch.rand((num_points, 1)) + 0.01
+    colors = torch.rand((num_points, 3))
+    viewmat = torch.eye(4)
+    background = torch.rand(3)
+    args = (viewmat, W, W, W / 2, H / 2, H, W, block_width)
+
+    visible = (means3d, scales, quats, opacities, colors)
+    # the same gaussians behind the camera are all culled
+    behind = (means3d * torch.tensor([1.0, 1.0, -1.0]),) + visible[1:]
+    _out_img = render_streaming([visible], *args, background=background)
+    out_img = render_streaming([behind, visible, behind], *args, background=background)
+    torch.testing.assert_close(out_img, _out_img)
+
+    # an all culled scene renders the background
+    out_img, out_alpha = render_streaming(
+        [behind], *args, background=background, return_alpha=True
+    )
+    torch.testing.assert_close(out_img, background.expand(H, W, 3))
+    torch.testing.assert_close(out_alpha, torch.zeros(H, W))
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="No CUDA device")
+def test_render_streaming_cuda_border():
+    from gsplat.project_gaussians import project_gaussians
+    from gsplat.rasterize import rasterize_gaussians
+    from gsplat.streaming import render_streaming
+
+    torch.manual_seed(42)
+
+    device = torch.device("cuda:0")
+    num_points = 400
+    H, W = 32, 48
+    block_width = 8
+    # low opacity gaussians around the borders, whose radii are cut off by
+    # their opacity when streamed
+    pixels = 1.5 * torch.rand((num_points, 2)) * torch.tensor([W, H]) - 12
+    depth = 5.0
+    means3d = torch.cat(
+        [
+            (pixels - torch.tensor([W / 2, H / 2])) * depth / W,
+            torch.full((num_points, 1), depth),
+        ],
+        dim=-1,
+    ).to(device)
+    scales = (0.3 * torch.rand((num_points, 3)) + 0.05).to(device)
+    quats = torch.randn((num_points, 4), device=device)
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    opacities = (0.2 * torch.rand((num_points, 1)) + 0.01).to(device)
+    colors = torch.rand((num_points, 3), device=device)
+    viewmat = torch.eye(4, device=device)
+    background = torch.rand(3, device=device)
+
+    xys, depths, radii, conics, _, num_tiles_hit, _ = project_gaussians(
+        means3d, scales, 1.0, quats, viewmat, W, W, W / 2, H / 2, H, W, block_width
+    )
+    _out_img = rasterize_gaussians(
+        xys,
+        depths,
+        radii,
+        conics,
+        num_tiles_hit,
+        colors,
+        opacities,
+        H,
+        W,
+        block_width,
+        background=background,
+    )
+
+    chunks = [
+        (means3d[i : i + 128], scales[i : i + 128], quats[i : i + 128])
+        + (opacities[i : i + 128], colors[i : i + 128])
+        for i in range(0, num_points, 128)
+    ]
+    args = (viewmat, W, W, W / 2, H / 2, H, W, block_width)
+    out_img = render_streaming(chunks, *args, background=background)
+    torch.testing.assert_close(out_img, _out_img)
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_render_streaming(pathlib.Path(tmp_dir))
+    test_render_streaming_culled_chunks()
+    test_render_streaming_cuda_border()